@@ -40,6 +40,20 @@ def create_app():
     # Initialiser mail
     mail.init_app(app)
     
+    # Diffusion en direct des votes
+    from app.services.vote_events import vote_events
+    vote_events.init_app(app)
+    
+    # Journal d'écriture différée des votes (rejoue les bulletins en attente)
+    from app.services.vote_journal import vote_journal
+    vote_journal.init_app(app)
+    
+    # Pool de traitement des images en modèles 3D et cache des maillages
+    from app.services.processing_jobs import processing_jobs
+    processing_jobs.init_app(app)
+    from app.services.mesh_cache import mesh_cache
+    mesh_cache.init_app(app)
+    
     Session(app)  # Initialiser la session Flask
     
     # Configurer Flask-Login
@@ -62,6 +76,10 @@ def create_app():
     app.register_blueprint(processing.bp, url_prefix='/processing')
     app.register_blueprint(artists.bp, url_prefix='/artists')
     
+    # Commandes CLI (flask rebuild-vote-counters, ...)
+    from app.cli import register_commands
+    register_commands(app)
+    
     return app
 
 if __name__ == '__main__':
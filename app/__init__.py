@@ -13,6 +13,16 @@ def create_app():
     # Initialiser les extensions
     mail.init_app(app)
     
+    # Diffusion en direct des votes
+    from app.services.vote_events import vote_events
+    vote_events.init_app(app)
+    
+    # Pool de traitement des images en modèles 3D et cache des maillages
+    from app.services.processing_jobs import processing_jobs
+    processing_jobs.init_app(app)
+    from app.services.mesh_cache import mesh_cache
+    mesh_cache.init_app(app)
+    
     # Import blueprints
     from app.routes import auth, artists, admin, artworks, test, processing, main
     
@@ -49,6 +59,10 @@ def create_app():
     app.register_blueprint(processing.bp, url_prefix='/processing')
     app.register_blueprint(admin.admin_bp, url_prefix='/admin')
     
+    # Commandes CLI (flask rebuild-vote-counters, ...)
+    from app.cli import register_commands
+    register_commands(app)
+    
     # Lister toutes les routes
     logger.info("Routes disponibles :")
     for rule in app.url_map.iter_rules():
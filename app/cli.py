@@ -0,0 +1,100 @@
+"""
+Commandes Flask en ligne de commande (flask <commande>).
+"""
+import click
+from flask.cli import with_appcontext
+
+
+@click.command('rebuild-vote-counters')
+@with_appcontext
+def rebuild_vote_counters_command():
+    """Installe les triggers et recalcule les compteurs de votes des œuvres."""
+    from app.services.vote_counters import install_vote_counter_triggers, rebuild_vote_counters
+
+    install_vote_counter_triggers()
+    count = rebuild_vote_counters()
+    click.echo(f"Compteurs de votes recalculés pour {count} œuvres")
+
+
+@click.command('rank-artworks')
+@click.option('--top', default=20, show_default=True, help="Nombre d'œuvres affichées")
+@click.option('--min-score', default=None, type=float, help='Score de Wilson minimal pour la sélection proposée')
+@click.option('--max-selected', default=None, type=int, help="Nombre maximal d'œuvres sélectionnées")
+@click.option('--per-category', default=None, type=int, help="Nombre maximal d'œuvres sélectionnées par catégorie")
+@click.option('--round', 'round_id', default=None, type=int, help="Classer les votes figés d'un tour clôturé")
+@click.option('--json', 'as_json', is_flag=True, help='Sortie JSON (classement complet et sélection proposée)')
+@with_appcontext
+def rank_artworks_command(top, min_score, max_selected, per_category, round_id, as_json):
+    """Classe les œuvres par consensus du jury et propose une sélection."""
+    import json
+    from app.services.ranking import SELECTION_MIN_SCORE, compute_ranking, propose_selection, ranking_to_json
+
+    ranking = compute_ranking(round_id=round_id)
+    selection = propose_selection(
+        ranking,
+        min_score=SELECTION_MIN_SCORE if min_score is None else min_score,
+        max_selected=max_selected,
+        per_category=per_category
+    )
+
+    if as_json:
+        data = ranking_to_json(ranking)
+        data['proposed_selection'] = selection
+        click.echo(json.dumps(data, ensure_ascii=False, indent=2))
+        return
+
+    data = ranking_to_json(ranking, limit=top)
+    click.echo(f"{'Rang':>5} {'Œuvre':>7} {'Pour':>5} {'Contre':>6} {'Wilson':>7} {'Bayes':>6}  Catégorie (rang)")
+    for artwork in data['artworks']:
+        proposed = selection.get(f"selection_{artwork['id']}") == 'selectionner'
+        click.echo(
+            f"{artwork['rank']:>5} {artwork['id']:>7} {artwork['up_votes']:>5} {artwork['down_votes']:>6} "
+            f"{artwork['wilson']:>7.3f} {artwork['bayesian']:>6.3f}  "
+            f"{artwork['categorie'] or '-'} ({artwork['category_rank']}){'  *' if proposed else ''}"
+        )
+    nb_selected = sum(1 for value in selection.values() if value == 'selectionner')
+    click.echo(f"{nb_selected} œuvres proposées à la sélection (*)")
+
+
+@click.command('select-artworks')
+@click.option('--min-approval', required=True, type=float, help='Proportion minimale de votes « pour » (0 à 1)')
+@click.option('--categorie', default=None, help="Catégorie de l'artiste")
+@click.option('--statut', default='selectionne', show_default=True,
+              type=click.Choice(['selectionne', 'refuse', 'en_attente']), help='Statut à appliquer')
+@click.option('--min-votes', default=1, show_default=True, help='Nombre minimal de votes exprimés')
+@click.option('--pending-only', is_flag=True, help='Ne modifier que les œuvres en attente')
+@with_appcontext
+def select_artworks_command(min_approval, categorie, statut, min_votes, pending_only):
+    """Applique une règle de sélection aux œuvres, directement en SQL."""
+    from app.services.selection import select_by_rule
+
+    changes = select_by_rule(
+        min_approval,
+        categorie=categorie,
+        statut=statut,
+        min_votes=min_votes,
+        from_statuts=('en_attente',) if pending_only else None
+    )
+    click.echo(f"{len(changes)} œuvres passées au statut « {statut} » : {sorted(changes)}")
+
+
+@click.command('close-round')
+@click.option('--nom', default=None, help='Nom du tour de vote')
+@with_appcontext
+def close_round_command(nom):
+    """Clôture le tour de vote et fige décomptes, sélections et participation."""
+    from app.services.voting_rounds import close_round
+
+    voting_round = close_round(nom=nom)
+    click.echo(
+        f"Tour {voting_round.id} « {voting_round.nom} » clôturé : {voting_round.nb_artworks} œuvres "
+        f"({voting_round.nb_selected} sélectionnées), {voting_round.nb_votes} votes, {voting_round.nb_jurors} jurés"
+    )
+
+
+def register_commands(app):
+    """Enregistre les commandes CLI sur l'application."""
+    app.cli.add_command(rebuild_vote_counters_command)
+    app.cli.add_command(rank_artworks_command)
+    app.cli.add_command(select_artworks_command)
+    app.cli.add_command(close_round_command)
@@ -0,0 +1,120 @@
+"""
+Stockage des cartes de profondeur sur disque, en mémoire projetée.
+
+Une carte de profondeur ne dépend que de l'image, du facteur de réduction
+du décodage, du flou et de son implémentation : changer scale_factor ou
+le budget de triangles ne la modifie pas. Elle est donc enregistrée en
+.npy float32, sous une clé dérivée de ces paramètres, et rouverte avec
+np.load(mmap_mode='r') : un nouveau maillage de la même image évite le
+décodage et le flou, et plusieurs processus lisant la même carte en
+partagent les pages dans le cache du système, sans copie.
+
+Les fichiers sont écrits sous un nom temporaire puis renommés, et les
+moins récemment utilisés sont supprimés au-delà d'une taille totale.
+"""
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+
+from .depth import resolve_backend
+
+logger = logging.getLogger(__name__)
+
+# À incrémenter quand le calcul de la carte de profondeur change
+DEPTH_STORE_VERSION = 1
+
+
+class DepthMapStore:
+    """Dossier de cartes de profondeur .npy."""
+
+    def __init__(self, directory, max_bytes=2 * 1024 ** 3):
+        """
+        Args:
+            directory (str): Dossier des cartes
+            max_bytes (int): Taille totale maximale des cartes (octets)
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, image_digest, reduction, blur_sigma, backend=None):
+        """
+        Clé d'une carte de profondeur.
+
+        Args:
+            image_digest (str): Empreinte de l'image encodée
+            reduction (float): Facteur de réduction du décodage
+            blur_sigma (float): Flou appliqué à l'image décodée
+            backend (str): Implémentation du flou (auto résolu selon le sigma)
+
+        Returns:
+            str: Empreinte hexadécimale
+        """
+        params = [DEPTH_STORE_VERSION, image_digest, reduction, float(blur_sigma),
+                  resolve_backend(backend, blur_sigma)]
+        return hashlib.sha256(json.dumps(params).encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        """Chemin du fichier d'une carte."""
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def load(self, key):
+        """
+        Ouvre une carte enregistrée, en lecture seule et sans la copier.
+
+        Args:
+            key (str): Clé de la carte
+
+        Returns:
+            numpy.memmap: Carte H×W float32, ou None si elle est absente
+        """
+        path = self.path(key)
+        try:
+            depth_map = np.load(path, mmap_mode='r')
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            return None
+        return depth_map
+
+    def save(self, key, depth_map):
+        """
+        Enregistre une carte, puis applique le quota.
+
+        Args:
+            key (str): Clé de la carte
+            depth_map (ndarray): Carte de profondeur H×W
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key)
+        partial_path = f"{path}.{os.getpid()}.partiel"
+        try:
+            with open(partial_path, 'wb') as f:
+                np.save(f, depth_map.astype(np.float32, copy=False))
+            os.replace(partial_path, path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+        self._evict(keep=path)
+
+    def _evict(self, keep):
+        """Supprime les cartes les moins récemment utilisées au-delà du quota."""
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith('.npy'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.path, stat.st_size))
+        total = sum(size for _, _, size in files)
+        for _, path, size in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                # Un processus qui l'a déjà projetée en mémoire garde l'accès aux pages
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            logger.info(f"Carte de profondeur {os.path.basename(path)} supprimée ({size} octets)")
@@ -0,0 +1,149 @@
+"""
+Chargement des images à traiter, depuis un fichier ou depuis la mémoire.
+
+Une image peut être donnée par son chemin, par ses octets encodés (bytes,
+bytearray, memoryview ou tout objet exposant le protocole buffer, décodés
+par cv2.imdecode sans copie préalable) ou déjà décodée (ndarray). Le
+décodage peut réduire l'image d'un facteur 2, 4 ou 8 : pour un JPEG, les
+modes IMREAD_REDUCED_* d'OpenCV décodent directement à la taille réduite,
+plus vite et avec moins de mémoire qu'un décodage complet suivi d'un
+redimensionnement.
+"""
+import hashlib
+import io
+import os
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# Modes de décodage en niveaux de gris par facteur de réduction
+REDUCED_GRAYSCALE = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8
+}
+
+# Triangles de la grille réduite par triangle du maillage simplifié visé :
+# la simplification garde ainsi assez de détail pour placer ses sommets
+REDUCTION_FACE_MARGIN = 16
+
+
+def is_path(source):
+    """Indique si la source est un chemin de fichier."""
+    return isinstance(source, (str, os.PathLike))
+
+
+def source_digest(source, chunk_size=1 << 20):
+    """
+    Empreinte SHA-256 d'une image : octets du fichier ou du tampon, ou
+    pixels et forme d'un ndarray.
+
+    Args:
+        source: Chemin, octets encodés ou ndarray
+
+    Returns:
+        str: Empreinte hexadécimale
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, np.ndarray):
+        digest.update(f"{source.dtype.str}{source.shape}".encode('ascii'))
+        digest.update(np.ascontiguousarray(source).data)
+    elif is_path(source):
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+    else:
+        digest.update(memoryview(source))
+    return digest.hexdigest()
+
+
+def image_size(source):
+    """
+    Dimensions d'une image, sans la décoder.
+
+    Args:
+        source: Chemin, octets encodés ou ndarray
+
+    Returns:
+        tuple: (largeur, hauteur)
+    """
+    if isinstance(source, np.ndarray):
+        return source.shape[1], source.shape[0]
+    with Image.open(source if is_path(source) else io.BytesIO(source)) as img:
+        return img.size
+
+
+def reduction_for(width, height, target_faces):
+    """
+    Plus grand facteur de réduction compatible avec un budget de triangles.
+
+    Args:
+        width (int): Largeur de l'image
+        height (int): Hauteur de l'image
+        target_faces (int): Nombre maximal de triangles visé
+
+    Returns:
+        int: 1, 2, 4 ou 8
+    """
+    factor = 1
+    while factor < 8:
+        reduced_faces = 2 * (width // (2 * factor) - 1) * (height // (2 * factor) - 1)
+        if reduced_faces < REDUCTION_FACE_MARGIN * target_faces:
+            break
+        factor *= 2
+    return factor
+
+
+def reduction_for_side(width, height, min_side):
+    """
+    Plus grand facteur de réduction gardant un côté d'au moins min_side pixels.
+
+    Args:
+        width (int): Largeur de l'image
+        height (int): Hauteur de l'image
+        min_side (int): Plus grand côté minimal après réduction
+
+    Returns:
+        int: 1, 2, 4 ou 8
+    """
+    factor = 1
+    while factor < 8 and max(width, height) // (2 * factor) >= min_side:
+        factor *= 2
+    return factor
+
+
+def decode_grayscale(source, reduction=1):
+    """
+    Décode une image en niveaux de gris.
+
+    Args:
+        source: Chemin, octets encodés ou ndarray (niveaux de gris, BGR ou BGRA)
+        reduction (int): Facteur de réduction (1, 2, 4 ou 8)
+
+    Returns:
+        ndarray: Image uint8 H×W (dimensions arrondies au supérieur si réduite)
+    """
+    if reduction not in REDUCED_GRAYSCALE:
+        raise ValueError(f"Facteur de réduction non supporté : {reduction}")
+
+    if isinstance(source, np.ndarray):
+        image = source
+        if image.ndim == 3:
+            code = cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+            image = cv2.cvtColor(image, code)
+        if reduction > 1:
+            height, width = image.shape
+            size = (-(-width // reduction), -(-height // reduction))
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        return image
+
+    if is_path(source):
+        image = cv2.imread(os.fspath(source), REDUCED_GRAYSCALE[reduction])
+    else:
+        # Vue uint8 sur le tampon, sans copie des octets
+        image = cv2.imdecode(np.frombuffer(source, dtype=np.uint8), REDUCED_GRAYSCALE[reduction])
+    if image is None:
+        raise ValueError("Impossible de décoder l'image")
+    return image
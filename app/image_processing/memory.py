@@ -0,0 +1,207 @@
+"""
+Mémoire consommée par le traitement d'une image en modèle 3D.
+
+estimate_peak_memory prévoit, avant tout décodage, le pic de mémoire d'un
+traitement à partir des dimensions de l'image et des options : coût fixe,
+puis selon le mode coût par pixel traité (grille complète, flux), par
+cellule de la grille RTIN et par triangle (simplification), et coût de la
+validation (par bloc de triangles, ou par triangle pour un solide). Les
+coefficients de MEMORY_MODEL ont été mesurés avec MemoryProbe ; les
+rapports mesure/estimation des travaux (route /processing/memory)
+indiquent quand les réajuster.
+
+MemoryProbe mesure le pic de chaque étape du traitement au-dessus de la
+mémoire du processus au départ. Sous Linux, le pic de mémoire résidente
+(VmHWM) est remis à zéro à chaque étape par /proc/self/clear_refs, sans
+surcoût ; ailleurs, tracemalloc mesure les allocations Python et NumPy.
+Dans un processus réutilisé (pool de traitement), la mémoire libérée par
+le travail précédent mais gardée par l'allocateur est d'abord rendue au
+système (malloc_trim de la glibc) : comptée dans la mémoire de départ,
+elle masquerait les allocations du travail suivant.
+"""
+import gc
+import ctypes
+import tracemalloc
+
+from .ingest import reduction_for
+from .simplify import _grid_shape
+from .validator import MeshValidator
+
+MiB = 1024 ** 2
+
+try:
+    _malloc_trim = ctypes.CDLL('libc.so.6').malloc_trim
+except (OSError, AttributeError):
+    # Pas de glibc (macOS, musl…)
+    _malloc_trim = None
+
+# Coefficients du modèle, mesurés par scripts/benchmark_memory_model.py
+MEMORY_MODEL = {
+    'base': 20 * MiB,               # bibliothèques et tampons fixes du traitement
+    'grid_pixel': 46,               # grille complète : carte, sommets float32, faces int32
+    'rtin_cell': 32,                # simplification : grille RTIN (tuiles 2^k) et ses erreurs
+    'simplified_face': 60,          # simplification : triangles extraits et renumérotés
+    'validation_face': 100,         # validation d'une surface, par triangle d'un bloc
+    'solid_validation_face': 272,   # validation d'un solide (copie trimesh float64, étanchéité)
+    'streaming_pixel': 5,           # mode streaming : image décodée et flou par bandes
+    'tile_pixel': 16                # mode streaming : sommets et faces d'une bande
+}
+
+
+def processed_size(width, height, options):
+    """
+    Dimensions de l'image effectivement traitée, après réduction éventuelle
+    du décodage.
+
+    Args:
+        width (int): Largeur de l'image
+        height (int): Hauteur de l'image
+        options (dict): Paramètres de ImageProcessor.process_image_to_3d
+
+    Returns:
+        tuple: (largeur, hauteur)
+    """
+    reduction = options.get('reduction')
+    if reduction is None:
+        reduction = 1
+        if options.get('target_faces') is not None and not options.get('streaming'):
+            reduction = reduction_for(width, height, options['target_faces'])
+    return -(-width // reduction), -(-height // reduction)
+
+
+def memory_mode(options):
+    """
+    Mode de traitement, au sens du modèle de mémoire.
+
+    Args:
+        options (dict): Paramètres de ImageProcessor.process_image_to_3d
+
+    Returns:
+        str: streaming, grid ou simplified, préfixé par solid- pour un solide
+    """
+    if options.get('streaming'):
+        return 'streaming'
+    simplified = options.get('target_faces') is not None or options.get('max_error') is not None
+    mode = 'simplified' if simplified else 'grid'
+    return 'solid-' + mode if options.get('solid') else mode
+
+
+def estimate_peak_memory(width, height, options, validate=True):
+    """
+    Pic de mémoire prévu pour un traitement, au-dessus de la mémoire du
+    processus au départ.
+
+    Args:
+        width (int): Largeur de l'image
+        height (int): Hauteur de l'image
+        options (dict): Paramètres de ImageProcessor.process_image_to_3d
+        validate (bool): Le maillage est validé avant l'écriture
+
+    Returns:
+        int: Octets
+    """
+    model = MEMORY_MODEL
+    width, height = processed_size(width, height, options)
+    pixels = width * height
+    mode = memory_mode(options)
+    if mode == 'streaming':
+        tile_rows = options.get('tile_rows') or 256
+        return model['base'] + model['streaming_pixel'] * pixels + model['tile_pixel'] * width * tile_rows
+
+    if mode.endswith('simplified'):
+        # Sans budget, un seuil d'erreur peut garder tous les triangles
+        faces = min(options.get('target_faces') or 2 * pixels, 2 * pixels)
+        rows, cols = _grid_shape(height, width, options.get('target_faces'))
+        cells = rows * cols
+        building = model['rtin_cell'] * cells + model['simplified_face'] * faces
+        # La grille RTIN est libérée avant la validation
+        kept = model['simplified_face'] * faces
+    else:
+        faces = 2 * pixels
+        building = kept = model['grid_pixel'] * pixels
+
+    if not validate:
+        return model['base'] + building
+    if options.get('solid'):
+        validation = model['solid_validation_face'] * faces
+    else:
+        validation = model['validation_face'] * min(faces, MeshValidator.HEIGHTFIELD_CHUNK)
+    return model['base'] + max(building, kept + validation)
+
+
+def _read_status(field):
+    """Valeur d'un champ de /proc/self/status, en octets."""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) * 1024
+    raise KeyError(field)
+
+
+def release_free_memory():
+    """Rend au système la mémoire libérée que l'allocateur garde encore."""
+    gc.collect()
+    if _malloc_trim is not None:
+        _malloc_trim(0)
+
+
+class MemoryProbe:
+    """Pics de mémoire par étape d'un traitement."""
+
+    def __init__(self):
+        self.stages = {}
+        self._stage = None
+        try:
+            release_free_memory()
+            self._reset_peak()
+            self.use_proc = True
+            self.baseline = _read_status('VmRSS')
+        except (OSError, KeyError):
+            self.use_proc = False
+            tracemalloc.start()
+            self.baseline = 0
+
+    def _reset_peak(self):
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+
+    def _peak(self):
+        if self.use_proc:
+            peak = _read_status('VmHWM') - self.baseline
+            self._reset_peak()
+        else:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+        return max(peak, 0)
+
+    def stage(self, name):
+        """
+        Termine l'étape en cours et commence la suivante.
+
+        Args:
+            name (str): Nom de l'étape (une étape répétée garde son plus grand pic)
+        """
+        if name == self._stage:
+            return
+        if self._stage is not None:
+            self.stages[self._stage] = max(self.stages.get(self._stage, 0), self._peak())
+        else:
+            self._peak()
+        self._stage = name
+
+    def close(self):
+        """
+        Termine la dernière étape.
+
+        Returns:
+            dict: Pic de mémoire (octets) par étape
+        """
+        self.stage(None)
+        if not self.use_proc:
+            tracemalloc.stop()
+        return self.stages
+
+    @property
+    def peak(self):
+        """Plus grand pic des étapes terminées."""
+        return max(self.stages.values(), default=0)
@@ -0,0 +1,164 @@
+"""
+Construction vectorisée des maillages de champs de hauteur.
+
+Une carte de profondeur H×W donne une grille de H·W sommets et
+2·(H−1)·(W−1) triangles. Les tableaux sont produits par arithmétique
+d'indices NumPy, sans boucle Python : sommets en float32, faces en int32
+(suffisant jusqu'à 2³¹ sommets, soit bien au-delà de 4096×4096).
+Un champ de hauteur peut être fermé en solide imprimable (parois le long
+du bord et socle plat), pour quelques triangles par sommet du bord.
+"""
+import numpy as np
+
+VERTEX_DTYPE = np.float32
+FACE_DTYPE = np.int32
+
+
+def grid_vertices(depth_map, scale_factor=1.0, row_offset=0):
+    """
+    Sommets (x, y, z) d'une grille, un par pixel de la carte de profondeur.
+
+    Args:
+        depth_map (ndarray): Carte de profondeur H×W
+        scale_factor (float): Facteur d'échelle de la hauteur
+        row_offset (int): Ordonnée de la première ligne (découpage en bandes)
+
+    Returns:
+        ndarray: Sommets float32 de forme (H·W, 3), ligne par ligne
+    """
+    height, width = depth_map.shape
+    vertices = np.empty((height, width, 3), dtype=VERTEX_DTYPE)
+    vertices[:, :, 0] = np.arange(width, dtype=VERTEX_DTYPE)
+    vertices[:, :, 1] = np.arange(row_offset, row_offset + height, dtype=VERTEX_DTYPE)[:, np.newaxis]
+    np.multiply(depth_map, scale_factor, out=vertices[:, :, 2])
+    return vertices.reshape(-1, 3)
+
+
+def grid_faces(height, width, first_vertex=0):
+    """
+    Triangles d'une grille H×W de sommets numérotés ligne par ligne.
+
+    Chaque cellule (i, j) donne les triangles (v0, v1, v2) et (v1, v3, v2)
+    avec v0 = i·W + j, v1 = v0 + 1, v2 = v0 + W, v3 = v2 + 1.
+
+    Args:
+        height (int): Nombre de lignes de sommets
+        width (int): Nombre de colonnes de sommets
+        first_vertex (int): Indice du premier sommet de la grille
+
+    Returns:
+        ndarray: Faces int32 de forme (2·(H−1)·(W−1), 3)
+    """
+    if height < 2 or width < 2:
+        return np.empty((0, 3), dtype=FACE_DTYPE)
+    if first_vertex + height * width > np.iinfo(FACE_DTYPE).max:
+        raise ValueError(f"Grille trop grande pour des indices int32 : {width}x{height}")
+
+    faces = np.empty((height - 1, width - 1, 2, 3), dtype=FACE_DTYPE)
+    v0 = faces[:, :, 0, 0]
+    v0[:] = np.arange(first_vertex, first_vertex + (height - 1) * width, width, dtype=FACE_DTYPE)[:, np.newaxis]
+    v0 += np.arange(width - 1, dtype=FACE_DTYPE)
+
+    np.add(v0, 1, out=faces[:, :, 0, 1])          # v1
+    np.add(v0, width, out=faces[:, :, 0, 2])      # v2
+    faces[:, :, 1, 0] = faces[:, :, 0, 1]         # v1
+    np.add(v0, width + 1, out=faces[:, :, 1, 1])  # v3
+    faces[:, :, 1, 2] = faces[:, :, 0, 2]         # v2
+    return faces.reshape(-1, 3)
+
+
+def heightfield_mesh(depth_map, scale_factor=1.0):
+    """
+    Maillage complet d'une carte de profondeur.
+
+    Args:
+        depth_map (ndarray): Carte de profondeur H×W
+        scale_factor (float): Facteur d'échelle de la hauteur
+
+    Returns:
+        tuple: (sommets float32 (N, 3), faces int32 (M, 3))
+    """
+    height, width = depth_map.shape
+    return grid_vertices(depth_map, scale_factor), grid_faces(height, width)
+
+
+def border_loop(vertices):
+    """
+    Sommets du bord d'un champ de hauteur, dans le sens trigonométrique.
+
+    Le bord est celui du rectangle englobant les sommets (x, y) : il
+    contient tous les sommets d'une grille complète, ou ceux conservés
+    par la simplification.
+
+    Args:
+        vertices (ndarray): Sommets (N, 3), tous utilisés par les faces
+
+    Returns:
+        ndarray: Indices des sommets du bord, en partant du coin (xmin, ymin)
+    """
+    x, y = vertices[:, 0], vertices[:, 1]
+    x_min, x_max, y_min, y_max = x.min(), x.max(), y.min(), y.max()
+    loop = np.flatnonzero((x == x_min) | (x == x_max) | (y == y_min) | (y == y_max))
+
+    # Abscisse curviligne le long du bord ; un coin prend celle du premier côté
+    x, y = x[loop].astype(np.float64), y[loop].astype(np.float64)
+    width, height = float(x_max - x_min), float(y_max - y_min)
+    curvilinear = np.select(
+        [y == y_min, x == x_max, y == y_max],
+        [x - x_min, width + (y - y_min), width + height + (x_max - x)],
+        2 * width + height + (y_max - y)
+    )
+    return loop[np.argsort(curvilinear, kind='stable')]
+
+
+def solid_heightfield_mesh(vertices, faces, base_z):
+    """
+    Ferme un champ de hauteur en solide : parois verticales et socle plat.
+
+    Chaque arête du bord est reliée par deux triangles à sa copie dans le
+    plan z = base_z ; le socle est un éventail de triangles autour de son
+    centre, qui n'est aligné avec aucune arête du bord (aucun triangle
+    dégénéré). Les faces sont orientées vers l'extérieur, comme la surface
+    (normales +z) : le maillage obtenu est étanche et cohérent sans
+    réparation.
+
+    Args:
+        vertices (ndarray): Sommets de la surface (N, 3)
+        faces (ndarray): Faces de la surface (M, 3)
+        base_z (float): Altitude du socle, sous le point le plus bas
+
+    Returns:
+        tuple: (sommets float32 (N + P + 1, 3), faces int32 (M + 3·P, 3)),
+            P étant le nombre de sommets du bord
+    """
+    if base_z >= vertices[:, 2].min():
+        raise ValueError("Le socle doit être sous la surface")
+    loop = border_loop(vertices)
+    count = len(loop)
+    first_base = len(vertices)
+    center = first_base + count
+    if center > np.iinfo(FACE_DTYPE).max:
+        raise ValueError("Maillage trop grand pour des indices int32")
+
+    solid_vertices = np.empty((center + 1, 3), dtype=VERTEX_DTYPE)
+    solid_vertices[:first_base] = vertices
+    solid_vertices[first_base:center, :2] = vertices[loop, :2]
+    solid_vertices[first_base:center, 2] = base_z
+    # Centre du rectangle du bord (bornes atteintes par les sommets du bord)
+    border = vertices[loop, :2]
+    solid_vertices[center, :2] = (border.min(axis=0) + border.max(axis=0)) / 2
+    solid_vertices[center, 2] = base_z
+
+    # Arête a → b du bord (sens trigonométrique vu de dessus), copies a', b' sur le socle
+    a = loop
+    b = np.roll(loop, -1)
+    a_base = np.arange(first_base, center, dtype=FACE_DTYPE)
+    b_base = np.roll(a_base, -1)
+    walls = np.stack([a, a_base, b, b, a_base, b_base], axis=1).reshape(-1, 3)
+    base = np.stack([np.full(count, center), b_base, a_base], axis=1)
+
+    solid_faces = np.empty((len(faces) + 3 * count, 3), dtype=FACE_DTYPE)
+    solid_faces[:len(faces)] = faces
+    solid_faces[len(faces):len(faces) + 2 * count] = walls
+    solid_faces[len(faces) + 2 * count:] = base
+    return solid_vertices, solid_faces
@@ -6,102 +6,351 @@ import cv2
 import numpy as np
 import trimesh
 from PIL import Image
-from scipy.ndimage import gaussian_filter
+from .depth import compute_depth_map
+from .ingest import decode_grayscale, image_size, is_path, reduction_for, reduction_for_side, source_digest
+from .mesh import heightfield_mesh, solid_heightfield_mesh
+from .simplify import simplified_heightfield_mesh
+from .streaming import DEFAULT_TILE_ROWS, stream_heightfield_mesh
+from .writers import mesh_format, write_mesh
+from .quantized_glb import write_quantized_glb
+from .validator import MeshValidator
+
+# Épaisseur par défaut du socle d'un solide, en fraction de scale_factor
+SOLID_BASE_RATIO = 0.1
+
+# Plus grand côté de la grille d'un aperçu (moins de 65 536 sommets)
+PREVIEW_MAX_SIDE = 192
 
 class ImageProcessor:
-    def __init__(self, image_path):
+    def __init__(self, source):
         """
         Initialise le processeur d'image.
         
         Args:
-            image_path (str): Chemin vers l'image à traiter
+            source: Image à traiter : chemin, octets encodés (bytes,
+                bytearray, memoryview…) décodés sans copie, ou ndarray
+                déjà décodé (niveaux de gris ou BGR)
         """
-        self.image_path = image_path
+        self.source = source
+        self.image_path = source if is_path(source) else None
         self.image = None
+        self.reduction = 1
+        self.source_size = None
+        self._digest = None
         self.depth_map = None
-        self.mesh = None
+        self.vertices = None
+        self.faces = None
+        self._mesh = None
+        self.solid = False
         
-    def load_image(self):
-        """Charge l'image et la convertit en niveaux de gris."""
-        self.image = cv2.imread(self.image_path, cv2.IMREAD_GRAYSCALE)
-        if self.image is None:
-            raise ValueError(f"Impossible de charger l'image: {self.image_path}")
+    def load_image(self, reduction=1):
+        """
+        Charge l'image et la convertit en niveaux de gris.
+        
+        Args:
+            reduction (int): Décoder l'image réduite d'un facteur 2, 4 ou 8 ;
+                les sommets restent dans le repère de l'image d'origine
+        """
+        try:
+            self.image = decode_grayscale(self.source, reduction)
+        except ValueError:
+            raise ValueError(f"Impossible de charger l'image: {self.image_path or type(self.source).__name__}")
+        self.reduction = reduction
+        if reduction == 1:
+            self.source_size = (self.image.shape[1], self.image.shape[0])
+        else:
+            self.source_size = image_size(self.source)
         return self.image
         
-    def create_depth_map(self, blur_sigma=2.0):
+    def digest(self):
+        """Empreinte SHA-256 de l'image source (calculée une fois)."""
+        if self._digest is None:
+            self._digest = source_digest(self.source)
+        return self._digest
+        
+    def save_original(self, path):
+        """
+        Enregistre l'image d'origine, telle que reçue.
+        
+        Args:
+            path (str): Chemin du fichier à écrire
+        """
+        if isinstance(self.source, np.ndarray):
+            raise ValueError("L'image a été fournie décodée, sans fichier d'origine")
+        if self.image_path is not None:
+            with open(self.image_path, 'rb') as src, open(path, 'wb') as dst:
+                dst.write(src.read())
+        else:
+            with open(path, 'wb') as f:
+                f.write(self.source)
+        return path
+        
+    def reduced(self, max_side):
+        """
+        Processeur travaillant sur une copie réduite de l'image déjà décodée.
+        
+        Les sommets qu'il produit restent dans le repère de l'image d'origine.
+        
+        Args:
+            max_side (int): Plus grand côté de l'image réduite
+            
+        Returns:
+            ImageProcessor: Processeur dont l'image est chargée
+        """
+        if self.image is None:
+            self.load_image()
+        height, width = self.image.shape
+        ratio = max(width, height) / max_side
+        if ratio <= 1:
+            small = self.image
+        else:
+            size = (max(round(width / ratio), 2), max(round(height / ratio), 2))
+            small = cv2.resize(self.image, size, interpolation=cv2.INTER_AREA)
+        child = ImageProcessor(small)
+        child.image = small
+        child.source_size = self.source_size
+        child.reduction = self.reduction * width / small.shape[1]
+        return child
+        
+    def create_preview(self, output_path, scale_factor=1.0, blur_sigma=2.0, max_side=PREVIEW_MAX_SIDE,
+                       depth_backend=None):
+        """
+        Maillage d'aperçu : grille complète d'au plus max_side pixels de
+        côté, écrite en GLB quantifié.
+        
+        Si l'image n'est pas encore chargée, une copie décodée réduite
+        (voir ingest.reduction_for_side) sert à l'aperçu sans être gardée :
+        le traitement complet qui suit sur ce même processeur décode
+        l'image à sa propre réduction. Sinon l'image décodée est réutilisée.
+        
+        Args:
+            output_path (str): Chemin du GLB d'aperçu
+            scale_factor (float): Facteur d'échelle pour la hauteur du maillage
+            blur_sigma (float): Force du flou gaussien (en pixels de l'image d'origine)
+            max_side (int): Plus grand côté de la grille
+            depth_backend (str): Implémentation du flou de la carte de profondeur
+            
+        Returns:
+            str: Chemin du GLB écrit
+        """
+        source = self
+        if self.image is None:
+            source = ImageProcessor(self.source)
+            source.load_image(reduction_for_side(*image_size(self.source), max_side))
+        preview = source.reduced(max_side)
+        preview.create_depth_map(blur_sigma=blur_sigma / preview.reduction, backend=depth_backend)
+        preview.generate_mesh(scale_factor=scale_factor)
+        return preview.save_mesh(output_path, 'glb', quantize=True)
+        
+    def create_depth_map(self, blur_sigma=2.0, backend=None):
         """
         Crée une carte de profondeur à partir de l'image en niveaux de gris.
         
         Args:
             blur_sigma (float): Force du flou gaussien
+            backend (str): Implémentation du flou : auto, opencv, pyramid
+                ou scipy (voir depth.py)
         """
         if self.image is None:
             self.load_image()
             
-        # Appliquer un flou gaussien pour réduire le bruit
-        self.depth_map = gaussian_filter(self.image.astype(float), sigma=blur_sigma)
-        
-        # Normaliser les valeurs entre 0 et 1
-        self.depth_map = (self.depth_map - self.depth_map.min()) / (self.depth_map.max() - self.depth_map.min())
+        # Flou gaussien pour réduire le bruit, puis normalisation entre 0 et 1
+        self.depth_map = compute_depth_map(self.image, blur_sigma, backend)
         return self.depth_map
         
-    def generate_mesh(self, scale_factor=1.0):
+    def generate_mesh(self, scale_factor=1.0, max_error=None, target_faces=None, solid=False, base_thickness=None):
         """
         Génère un maillage 3D à partir de la carte de profondeur.
         
+        Sans max_error ni target_faces, le maillage contient deux triangles
+        par pixel ; sinon il est simplifié de façon adaptative (RTIN).
+        Avec solid, la surface est fermée par des parois et un socle plat
+        (solide imprimable en 3D).
+        
         Args:
             scale_factor (float): Facteur d'échelle pour la hauteur du maillage
+            max_error (float): Erreur verticale tolérée (fraction de la profondeur)
+            target_faces (int): Nombre maximal de triangles (surface seule)
+            solid (bool): Fermer le maillage en solide
+            base_thickness (float): Épaisseur du socle sous le point le plus
+                bas (SOLID_BASE_RATIO · scale_factor par défaut)
+                
+        Returns:
+            tuple: (sommets float32 (N, 3), faces int32 (M, 3))
         """
         if self.depth_map is None:
             self.create_depth_map()
             
+        # Sommets float32 et faces int32 construits sans boucle Python
+        if max_error is not None or target_faces is not None:
+            self.vertices, self.faces = simplified_heightfield_mesh(
+                self.depth_map, scale_factor, max_error=max_error, target_faces=target_faces
+            )
+        else:
+            self.vertices, self.faces = heightfield_mesh(self.depth_map, scale_factor)
         height, width = self.depth_map.shape
+        if (width, height) != tuple(self.source_size):
+            # Image décodée réduite : sommets ramenés dans le repère d'origine
+            self.vertices[:, :2] *= np.array([
+                (self.source_size[0] - 1) / max(width - 1, 1),
+                (self.source_size[1] - 1) / max(height - 1, 1)
+            ], dtype=self.vertices.dtype)
+        if solid:
+            if base_thickness is None:
+                base_thickness = SOLID_BASE_RATIO * scale_factor
+            if base_thickness <= 0:
+                raise ValueError("L'épaisseur du socle doit être positive")
+            self.vertices, self.faces = solid_heightfield_mesh(self.vertices, self.faces, -base_thickness)
+        self.solid = solid
+        self._mesh = None
+        return self.vertices, self.faces
         
-        # Créer les coordonnées x, y
-        x, y = np.meshgrid(np.arange(width), np.arange(height))
-        
-        # Créer les vertices
-        vertices = np.stack([x.flatten(), y.flatten(), self.depth_map.flatten() * scale_factor], axis=1)
-        
-        # Créer les faces
-        faces = []
-        for i in range(height - 1):
-            for j in range(width - 1):
-                v0 = i * width + j
-                v1 = v0 + 1
-                v2 = (i + 1) * width + j
-                v3 = v2 + 1
-                faces.extend([[v0, v1, v2], [v1, v3, v2]])
-                
-        faces = np.array(faces)
+    @property
+    def mesh(self):
+        """
+        Maillage trimesh des sommets et faces, construit au premier accès.
+        
+        Trimesh copie les tableaux en float64/int64 (trois fois la mémoire
+        des tableaux float32/int32) : seule la validation d'un solide en a
+        besoin, la surface est validée et écrite depuis les tableaux.
+        """
+        if self._mesh is None and self.vertices is not None:
+            # La grille est déjà propre : pas de fusion de sommets
+            self._mesh = trimesh.Trimesh(vertices=self.vertices, faces=self.faces, process=False)
+        return self._mesh
         
-        # Créer le maillage
-        self.mesh = trimesh.Trimesh(vertices=vertices, faces=faces)
-        return self.mesh
+    def validate_mesh(self):
+        """
+        Valide le maillage en mémoire, sans le relire depuis un fichier.
+        
+        Returns:
+            tuple: (bool, str) - (est_valide, message)
+        """
+        if self.vertices is None:
+            raise ValueError("Aucun maillage n'a été généré")
+        if self.solid:
+            return MeshValidator.validate_closed_mesh(self.mesh)
+        return MeshValidator.validate_heightfield(self.vertices, self.faces)
         
-    def save_mesh(self, output_path):
+    def save_mesh(self, output_path, file_format=None, quantize=False):
         """
-        Sauvegarde le maillage au format OBJ.
+        Sauvegarde le maillage.
+        
+        Les formats binaires (PLY, STL, GLB) sont écrits directement depuis
+        les tableaux de sommets et de faces. Un GLB quantifié, destiné au
+        visualiseur web, porte aussi des coordonnées de texture pour y
+        plaquer l'image d'origine.
         
         Args:
-            output_path (str): Chemin de sortie pour le fichier OBJ
+            output_path (str): Chemin de sortie du fichier
+            file_format (str): obj, ply, stl ou glb (déduit de l'extension par défaut)
+            quantize (bool): GLB quantifié (KHR_mesh_quantization)
         """
-        if self.mesh is None:
+        if self.vertices is None:
             raise ValueError("Aucun maillage n'a été généré")
             
-        self.mesh.export(output_path)
-        return output_path
+        if quantize:
+            if mesh_format(output_path, file_format) != 'glb':
+                raise ValueError("La quantification n'est disponible qu'au format GLB")
+            return write_quantized_glb(output_path, self.vertices, self.faces, uvs=self.texture_coordinates())
+        return write_mesh(output_path, self.vertices, self.faces, file_format)
+        
+    def texture_coordinates(self):
+        """
+        Coordonnées de texture des sommets : position dans l'image, entre 0 et 1.
         
-    def process_image_to_3d(self, output_path, scale_factor=1.0, blur_sigma=2.0):
+        Returns:
+            ndarray: Coordonnées float32 (N, 2)
+        """
+        width, height = self.source_size
+        return self.vertices[:, :2] / np.array([max(width - 1, 1), max(height - 1, 1)], dtype=np.float32)
+        
+    def process_image_to_3d(self, output_path, scale_factor=1.0, blur_sigma=2.0, max_error=None, target_faces=None,
+                            streaming=False, tile_rows=DEFAULT_TILE_ROWS, file_format=None, quantize=False,
+                            depth_backend=None, progress=None, validate=False, solid=False, base_thickness=None,
+                            reduction=None, depth_store=None):
         """
         Traite une image en un modèle 3D en une seule étape.
         
+        En mode streaming, la carte de profondeur et le maillage sont
+        calculés et écrits par bandes de lignes : ni la carte complète ni
+        le maillage ne sont gardés en mémoire (self.vertices reste à None).
+        
+        Pour un maillage simplifié à target_faces triangles, l'image est
+        par défaut décodée réduite tant que la grille garde assez de
+        détail (voir ingest.reduction_for) ; le flou est réduit d'autant.
+        
+        Avec depth_store, une carte de profondeur déjà calculée pour la
+        même image, la même réduction et le même flou est rouverte en
+        mémoire projetée : ni décodage ni flou.
+        
         Args:
-            output_path (str): Chemin de sortie pour le fichier OBJ
+            output_path (str): Chemin de sortie du fichier
             scale_factor (float): Facteur d'échelle pour la hauteur du maillage
             blur_sigma (float): Force du flou gaussien
+            max_error (float): Erreur verticale tolérée pour la simplification
+            target_faces (int): Nombre maximal de triangles
+            streaming (bool): Écrire le maillage complet par bandes
+            tile_rows (int): Nombre de lignes par bande en mode streaming
+            file_format (str): obj, ply, stl ou glb (déduit de l'extension par défaut)
+            quantize (bool): GLB quantifié pour le visualiseur web
+            depth_backend (str): Implémentation du flou de la carte de profondeur
+            progress (callable): Appelée avec (étape, fraction ou None) au début
+                de chaque étape, et par bande en mode streaming
+            validate (bool): Valider le maillage avant de l'écrire (ValueError
+                s'il est invalide) ; sans effet en mode streaming, où la
+                grille est valide par construction
+            solid (bool): Fermer le maillage en solide (parois et socle)
+            base_thickness (float): Épaisseur du socle du solide
+            reduction (int): Facteur de réduction du décodage (1, 2, 4 ou 8 ;
+                automatique si None)
+            depth_store (DepthMapStore): Cartes de profondeur enregistrées
+                (hors mode streaming)
         """
-        self.load_image()
-        self.create_depth_map(blur_sigma=blur_sigma)
-        self.generate_mesh(scale_factor=scale_factor)
-        return self.save_mesh(output_path)
+        progress = progress or (lambda stage, fraction=None: None)
+        progress('chargement')
+        if reduction is None:
+            if target_faces is not None and not streaming:
+                reduction = reduction_for(*image_size(self.source), target_faces)
+            else:
+                reduction = 1
+                
+        self.depth_map = None
+        if depth_store is not None and not streaming:
+            depth_key = depth_store.key(self.digest(), reduction, blur_sigma / reduction, depth_backend)
+            self.depth_map = depth_store.load(depth_key)
+            if self.depth_map is not None:
+                self.reduction = reduction
+                self.source_size = self.source_size or image_size(self.source)
+                
+        if self.depth_map is None and (self.image is None or reduction != self.reduction):
+            self.load_image(reduction)
+        if streaming:
+            if max_error is not None or target_faces is not None or quantize or solid or self.reduction != 1:
+                raise ValueError(
+                    "La simplification, la quantification, les solides et la réduction ne sont pas "
+                    "disponibles en mode streaming"
+                )
+            stream_heightfield_mesh(
+                self.image, output_path, scale_factor, blur_sigma, tile_rows, file_format, depth_backend,
+                progress=lambda fraction: progress('export', fraction)
+            )
+            return output_path
+
+        if self.depth_map is None:
+            progress('profondeur')
+            self.create_depth_map(blur_sigma=blur_sigma / self.reduction, backend=depth_backend)
+            if depth_store is not None:
+                depth_store.save(depth_key, self.depth_map)
+        progress('maillage')
+        self.generate_mesh(
+            scale_factor=scale_factor, max_error=max_error, target_faces=target_faces,
+            solid=solid, base_thickness=base_thickness
+        )
+        if validate:
+            progress('validation')
+            is_valid, message = self.validate_mesh()
+            if not is_valid:
+                raise ValueError(message)
+        progress('export')
+        return self.save_mesh(output_path, file_format, quantize)
@@ -0,0 +1,251 @@
+"""
+Export GLB compact pour le visualiseur 3D web (KHR_mesh_quantization).
+
+Les positions sont quantifiées en int16 par axe (le nœud porte l'échelle
+et la translation qui les ramènent dans le repère d'origine), les
+coordonnées de texture en uint16 normalisés et les indices en uint16
+quand le maillage a moins de 65 536 sommets. Avant quantification, les
+triangles sont triés selon une courbe de Morton et les sommets
+renumérotés dans leur ordre de première utilisation : les triangles
+voisins partagent les sommets encore en cache GPU, et les indices
+varient peu d'un triangle au suivant, ce qui les rend très compressibles
+(gzip/brotli du serveur web).
+"""
+import io
+import json
+import struct
+
+import numpy as np
+from PIL import Image
+
+from .writers import GLTF_ARRAY_BUFFER, GLTF_ELEMENT_ARRAY_BUFFER, GLTF_TRIANGLES
+
+QUANTIZATION_EXTENSION = 'KHR_mesh_quantization'
+
+# Valeur maximale des positions quantifiées (int16 symétrique)
+POSITION_RANGE = 32767
+
+# Bits par axe du code de Morton (3 × 21 bits dans un uint64)
+MORTON_BITS = 21
+
+GLTF_SHORT = 5122
+GLTF_UNSIGNED_SHORT = 5123
+GLTF_UNSIGNED_INT = 5125
+
+TEXTURE_MIME_TYPES = {'JPEG': 'image/jpeg', 'PNG': 'image/png'}
+
+
+def _spread_bits(values):
+    """Intercale deux bits nuls entre chaque bit des 21 bits de poids faible."""
+    values = values.astype(np.uint64) & np.uint64(0x1FFFFF)
+    for shift, mask in ((32, 0x1F00000000FFFF), (16, 0x1F0000FF0000FF), (8, 0x100F00F00F00F00F),
+                        (4, 0x10C30C30C30C30C3), (2, 0x1249249249249249)):
+        values = (values | (values << np.uint64(shift))) & np.uint64(mask)
+    return values
+
+
+def morton_codes(points):
+    """
+    Codes de Morton 3D de points.
+
+    La même échelle est appliquée aux trois axes : un axe de faible
+    amplitude (le relief d'un champ de hauteur) pèse peu dans l'ordre.
+
+    Args:
+        points (ndarray): Points (N, 3)
+
+    Returns:
+        ndarray: Codes uint64 (N,)
+    """
+    low = points.min(axis=0)
+    extent = float((points.max(axis=0) - low).max()) or 1.0
+    cells = np.floor((points - low) * (((1 << MORTON_BITS) - 1) / extent)).astype(np.uint64)
+    return (_spread_bits(cells[:, 0]) << np.uint64(2)) | (_spread_bits(cells[:, 1]) << np.uint64(1)) | \
+        _spread_bits(cells[:, 2])
+
+
+def reorder_for_locality(vertices, faces, uvs=None):
+    """
+    Trie les triangles selon leur centre et renumérote les sommets.
+
+    Args:
+        vertices (ndarray): Sommets (N, 3)
+        faces (ndarray): Faces (M, 3)
+        uvs (ndarray): Coordonnées de texture (N, 2) ou None
+
+    Returns:
+        tuple: (sommets, faces, uvs) réordonnés ; les sommets non
+            référencés sont retirés
+    """
+    order = np.argsort(morton_codes(vertices[faces].mean(axis=1)), kind='stable')
+    faces = faces[order]
+
+    # Ordre de première utilisation des sommets
+    used, first_use = np.unique(faces.ravel(), return_index=True)
+    new_order = used[np.argsort(first_use, kind='stable')]
+    remap = np.empty(len(vertices), dtype=np.int64)
+    remap[new_order] = np.arange(len(new_order))
+
+    faces = remap[faces]
+    vertices = vertices[new_order]
+    if uvs is not None:
+        uvs = uvs[new_order]
+    return vertices, faces, uvs
+
+
+def quantize_positions(vertices):
+    """
+    Quantifie les positions en int16, axe par axe.
+
+    Args:
+        vertices (ndarray): Sommets (N, 3)
+
+    Returns:
+        tuple: (positions int16 (N, 4) dont la 4e composante sert
+            d'alignement, translation (3,), échelle (3,))
+    """
+    low = vertices.min(axis=0).astype(np.float64)
+    high = vertices.max(axis=0).astype(np.float64)
+    translation = (low + high) / 2
+    scale = (high - low) / (2 * POSITION_RANGE)
+    scale[scale == 0] = 1.0
+
+    positions = np.zeros((len(vertices), 4), dtype='<i2')
+    positions[:, :3] = np.rint((vertices - translation) / scale)
+    return positions, translation, scale
+
+
+def quantize_uvs(uvs):
+    """Quantifie des coordonnées de texture entre 0 et 1 en uint16 normalisés."""
+    return np.rint(np.clip(uvs, 0.0, 1.0) * 65535).astype('<u2')
+
+
+def load_texture(image_path):
+    """
+    Image à intégrer au GLB, au format JPEG ou PNG.
+
+    Args:
+        image_path (str): Chemin de l'image
+
+    Returns:
+        tuple: (octets de l'image, type MIME)
+    """
+    with Image.open(image_path) as img:
+        mime_type = TEXTURE_MIME_TYPES.get(img.format)
+        if mime_type is not None:
+            with open(image_path, 'rb') as f:
+                return f.read(), mime_type
+        buffer = io.BytesIO()
+        img.save(buffer, format='PNG')
+        return buffer.getvalue(), 'image/png'
+
+
+def _padded(data):
+    """Octets complétés à un multiple de 4."""
+    data = bytes(data)
+    return data + b'\0' * (-len(data) % 4)
+
+
+def write_quantized_glb(output_path, vertices, faces, uvs=None, texture=None, reorder=True):
+    """
+    Écrit un GLB quantifié (KHR_mesh_quantization).
+
+    Args:
+        output_path (str): Chemin du fichier GLB
+        vertices (ndarray): Sommets (N, 3)
+        faces (ndarray): Faces (M, 3)
+        uvs (ndarray): Coordonnées de texture (N, 2) ou None
+        texture (tuple): (octets, type MIME) de l'image de texture, ou None
+        reorder (bool): Trier triangles et sommets pour la localité
+
+    Returns:
+        str: Chemin du fichier écrit
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces)
+    if reorder:
+        vertices, faces, uvs = reorder_for_locality(vertices, faces, uvs)
+
+    positions, translation, scale = quantize_positions(vertices)
+    small = len(vertices) <= np.iinfo(np.uint16).max
+    indices = faces.astype('<u2' if small else '<u4').ravel()
+
+    chunks = []
+    buffer_views = []
+    accessors = []
+
+    def add_view(data, target=None, byte_stride=None):
+        offset = sum(len(chunk) for chunk in chunks)
+        data = _padded(data)
+        view = {'buffer': 0, 'byteOffset': offset, 'byteLength': len(data)}
+        if target is not None:
+            view['target'] = target
+        if byte_stride is not None:
+            view['byteStride'] = byte_stride
+        chunks.append(data)
+        buffer_views.append(view)
+        return len(buffer_views) - 1
+
+    accessors.append({
+        'bufferView': add_view(positions, GLTF_ARRAY_BUFFER, byte_stride=8),
+        'componentType': GLTF_SHORT,
+        'count': len(positions),
+        'type': 'VEC3',
+        'min': positions[:, :3].min(axis=0).tolist(),
+        'max': positions[:, :3].max(axis=0).tolist()
+    })
+    attributes = {'POSITION': 0}
+    if uvs is not None:
+        accessors.append({
+            'bufferView': add_view(quantize_uvs(uvs), GLTF_ARRAY_BUFFER, byte_stride=4),
+            'componentType': GLTF_UNSIGNED_SHORT,
+            'normalized': True,
+            'count': len(uvs),
+            'type': 'VEC2'
+        })
+        attributes['TEXCOORD_0'] = len(accessors) - 1
+    accessors.append({
+        'bufferView': add_view(indices, GLTF_ELEMENT_ARRAY_BUFFER),
+        'componentType': GLTF_UNSIGNED_SHORT if small else GLTF_UNSIGNED_INT,
+        'count': len(indices),
+        'type': 'SCALAR'
+    })
+
+    material = {'pbrMetallicRoughness': {'metallicFactor': 0.0, 'roughnessFactor': 1.0}, 'doubleSided': True}
+    document = {
+        'asset': {'version': '2.0', 'generator': 'Art Curator'},
+        'extensionsUsed': [QUANTIZATION_EXTENSION],
+        'extensionsRequired': [QUANTIZATION_EXTENSION],
+        'scene': 0,
+        'scenes': [{'nodes': [0]}],
+        'nodes': [{'mesh': 0, 'translation': translation.tolist(), 'scale': scale.tolist()}],
+        'meshes': [{'primitives': [{
+            'attributes': attributes,
+            'indices': len(accessors) - 1,
+            'material': 0,
+            'mode': GLTF_TRIANGLES
+        }]}],
+        'materials': [material],
+        'accessors': accessors,
+        'bufferViews': buffer_views
+    }
+    if texture is not None and uvs is not None:
+        image_bytes, mime_type = texture
+        document['images'] = [{'bufferView': add_view(image_bytes), 'mimeType': mime_type}]
+        document['textures'] = [{'source': 0}]
+        material['pbrMetallicRoughness']['baseColorTexture'] = {'index': 0}
+    document['buffers'] = [{'byteLength': sum(len(chunk) for chunk in chunks)}]
+
+    json_chunk = json.dumps(document, separators=(',', ':')).encode('utf-8')
+    json_chunk += b' ' * (-len(json_chunk) % 4)
+    bin_length = document['buffers'][0]['byteLength']
+    total = 12 + 8 + len(json_chunk) + 8 + bin_length
+
+    with open(output_path, 'wb') as f:
+        f.write(struct.pack('<4sII', b'glTF', 2, total))
+        f.write(struct.pack('<I4s', len(json_chunk), b'JSON'))
+        f.write(json_chunk)
+        f.write(struct.pack('<I4s', bin_length, b'BIN\0'))
+        for chunk in chunks:
+            f.write(chunk)
+    return output_path
@@ -0,0 +1,264 @@
+"""
+Simplification adaptative des maillages de champs de hauteur (RTIN).
+
+Le maillage est un « Right-Triangulated Irregular Network » : la carte de
+profondeur, rééchantillonnée sur une grille de tuiles carrées de côté 2^k
+(R·2^k + 1 lignes, C·2^k + 1 colonnes, au plus près de ses dimensions),
+est découpée en triangles rectangles isocèles subdivisés récursivement par
+le milieu de leur hypoténuse. Une zone plate reste couverte par quelques
+grands triangles, une zone détaillée est subdivisée jusqu'au pixel. Les
+erreurs des arêtes communes à deux tuiles tiennent compte des deux côtés :
+les tuiles se raccordent sans fissure. Un maillage qui aurait plus de
+triangles que la grille complète du pixel est remplacé par celle-ci.
+
+Les erreurs d'approximation sont calculées une fois, niveau par niveau,
+par opérations NumPy sur des vues à pas fixe de la grille ; l'erreur d'un
+milieu inclut celle de tous ses descendants, ce qui garantit un maillage
+sans fissure. L'extraction pour un seuil donné parcourt l'arbre par
+niveaux (une passe vectorisée par niveau). Un budget de faces est atteint
+par dichotomie sur le seuil, chaque essai s'arrêtant dès que le budget est
+dépassé.
+"""
+import math
+
+import cv2
+import numpy as np
+
+from .mesh import VERTEX_DTYPE, FACE_DTYPE, heightfield_mesh
+
+# Nombre d'extractions de la dichotomie sur le seuil d'erreur
+BUDGET_SEARCH_STEPS = 24
+
+# Tailles de tuile essayées : la plus grande qui tient dans l'image, puis
+# jusqu'à 2^GRID_TILE_LEVELS fois plus petite
+GRID_TILE_LEVELS = 4
+
+
+def _grid_shape(height, width, target_faces=None):
+    """
+    Grille de tuiles 2^k la plus proche de l'image.
+
+    Parmi les tailles de tuile essayées, garde celle dont la grille (qui
+    couvre l'image) a le moins de points, sans que ses tuiles, à deux
+    triangles au minimum chacune, dépassent target_faces.
+
+    Args:
+        height (int): Hauteur de la carte de profondeur
+        width (int): Largeur de la carte de profondeur
+        target_faces (int): Nombre maximal de triangles visé
+
+    Returns:
+        tuple: (lignes, colonnes) de la grille, de la forme R·2^k + 1, C·2^k + 1
+    """
+    largest = 1 << (max(min(height, width) - 1, 1).bit_length() - 1)
+    best = None
+    for level in range(GRID_TILE_LEVELS + 1):
+        tile = largest >> level
+        if tile < 1:
+            break
+        rows = max(-(-(height - 1) // tile), 1)
+        cols = max(-(-(width - 1) // tile), 1)
+        if level and target_faces is not None and 2 * rows * cols > target_faces:
+            break
+        shape = (rows * tile + 1, cols * tile + 1)
+        if best is None or shape[0] * shape[1] < best[0] * best[1]:
+            best = shape
+    return best
+
+
+def _tile_size(shape):
+    """Côté des tuiles d'une grille : plus grande puissance de 2 divisant ses côtés − 1."""
+    common = math.gcd(shape[0] - 1, shape[1] - 1)
+    return common & -common
+
+
+def resample_terrain(depth_map, target_faces=None):
+    """
+    Rééchantillonne la carte de profondeur sur une grille de tuiles 2^k.
+
+    Args:
+        depth_map (ndarray): Carte de profondeur H×W
+        target_faces (int): Nombre maximal de triangles visé (voir _grid_shape)
+
+    Returns:
+        ndarray: Grille float32 de R·2^k + 1 lignes et C·2^k + 1 colonnes
+    """
+    height, width = depth_map.shape
+    rows, cols = _grid_shape(height, width, target_faces)
+    terrain = depth_map.astype(np.float32, copy=False)
+    if terrain.shape != (rows, cols):
+        terrain = cv2.resize(terrain, (cols, rows), interpolation=cv2.INTER_LINEAR)
+    return terrain
+
+
+def rtin_errors(terrain):
+    """
+    Erreur maximale de chaque milieu d'hypoténuse, descendants compris.
+
+    Args:
+        terrain (ndarray): Grille de tuiles 2^k (voir resample_terrain)
+
+    Returns:
+        ndarray: Erreurs float32, de même forme que terrain
+    """
+    tile = _tile_size(terrain.shape)
+    errors = np.zeros_like(terrain, dtype=np.float32)
+
+    step = 1  # Demi-longueur des hypoténuses alignées sur les axes
+    while step < tile:
+        stride = 2 * step
+        corners = terrain[::stride, ::stride]
+
+        # Hypoténuses horizontales et verticales de longueur 2·step
+        horizontal = errors[::stride, step::stride]
+        vertical = errors[step::stride, ::stride]
+        np.abs((corners[:, :-1] + corners[:, 1:]) / 2 - terrain[::stride, step::stride], out=horizontal)
+        np.abs((corners[:-1, :] + corners[1:, :]) / 2 - terrain[step::stride, ::stride], out=vertical)
+
+        if step > 1:
+            # Enfants : centres des carrés de côté step de part et d'autre
+            centers = errors[step // 2::step, step // 2::step]
+            below_above = np.maximum(centers[:, 0::2], centers[:, 1::2])
+            np.maximum(horizontal[:-1], below_above[0::2], out=horizontal[:-1])
+            np.maximum(horizontal[1:], below_above[1::2], out=horizontal[1:])
+            right_left = np.maximum(centers[0::2, :], centers[1::2, :])
+            np.maximum(vertical[:, :-1], right_left[:, 0::2], out=vertical[:, :-1])
+            np.maximum(vertical[:, 1:], right_left[:, 1::2], out=vertical[:, 1:])
+
+        # Hypoténuses diagonales : centres des carrés de côté 2·step ; la
+        # diagonale alterne en damier (tuiles comprises) et part toujours
+        # du centre du parent
+        center_values = terrain[step::stride, step::stride]
+        rows, cols = center_values.shape
+        main = (np.add.outer(np.arange(rows), np.arange(cols)) % 2) == 0
+        interpolated = np.where(
+            main,
+            (corners[:-1, :-1] + corners[1:, 1:]) / 2,
+            (corners[:-1, 1:] + corners[1:, :-1]) / 2
+        )
+        center = errors[step::stride, step::stride]
+        np.abs(interpolated - center_values, out=center)
+        np.maximum(center, horizontal[:-1], out=center)
+        np.maximum(center, horizontal[1:], out=center)
+        np.maximum(center, vertical[:, :-1], out=center)
+        np.maximum(center, vertical[:, 1:], out=center)
+
+        step = stride
+    return errors
+
+
+def rtin_triangles(errors, max_error, max_triangles=None):
+    """
+    Triangles RTIN dont l'erreur reste sous le seuil.
+
+    Args:
+        errors (ndarray): Résultat de rtin_errors
+        max_error (float): Erreur verticale maximale
+        max_triangles (int): Abandonner dès que ce nombre est dépassé
+
+    Returns:
+        ndarray: Triangles int32 (M, 6) : (ax, ay, bx, by, cx, cy), ou
+            None si max_triangles est dépassé
+    """
+    tile = _tile_size(errors.shape)
+    # Deux triangles par tuile, de part et d'autre de sa diagonale (en damier)
+    ys, xs = np.mgrid[0:errors.shape[0] - 1:tile, 0:errors.shape[1] - 1:tile]
+    x0, y0, x1, y1 = xs.ravel(), ys.ravel(), xs.ravel() + tile, ys.ravel() + tile
+    main = ((xs + ys).ravel() // tile) % 2 == 0
+    frontier = np.concatenate([
+        np.stack([x0, y0, x1, y1, x0, y1], axis=1)[main],
+        np.stack([x1, y1, x0, y0, x1, y0], axis=1)[main],
+        np.stack([x0, y1, x1, y0, x1, y1], axis=1)[~main],
+        np.stack([x1, y0, x0, y1, x0, y0], axis=1)[~main]
+    ]).astype(FACE_DTYPE)
+    emitted = []
+    nb_emitted = 0
+    while len(frontier):
+        # Chaque triangle restant en donnera au moins un
+        if max_triangles is not None and nb_emitted + len(frontier) > max_triangles:
+            return None
+        ax, ay, bx, by, cx, cy = frontier.T
+        mx = (ax + bx) >> 1
+        my = (ay + by) >> 1
+        split = (np.abs(ax - cx) + np.abs(ay - cy) > 1) & (errors[my, mx] > max_error)
+        emitted.append(frontier[~split])
+        nb_emitted += len(emitted[-1])
+
+        a, b, c = frontier[split, 0:2], frontier[split, 2:4], frontier[split, 4:6]
+        m = np.stack([mx[split], my[split]], axis=1)
+        # Enfants (c, a, m) et (b, c, m) : même sens de parcours que le parent
+        frontier = np.concatenate([np.hstack([c, a, m]), np.hstack([b, c, m])])
+    return np.concatenate(emitted)
+
+
+def error_for_budget(errors, target_faces):
+    """
+    Plus petit seuil d'erreur donnant au plus target_faces triangles.
+
+    Args:
+        errors (ndarray): Résultat de rtin_errors
+        target_faces (int): Nombre maximal de triangles
+
+    Returns:
+        float: Seuil d'erreur
+    """
+    low, high = 0.0, float(errors.max())
+    if rtin_triangles(errors, low, max_triangles=target_faces) is not None:
+        return low
+    for _ in range(BUDGET_SEARCH_STEPS):
+        middle = (low + high) / 2
+        if rtin_triangles(errors, middle, max_triangles=target_faces) is not None:
+            high = middle
+        else:
+            low = middle
+    return high
+
+
+def simplified_heightfield_mesh(depth_map, scale_factor=1.0, max_error=None, target_faces=None):
+    """
+    Maillage simplifié d'une carte de profondeur.
+
+    Les sommets restent dans le repère de l'image d'origine (x de 0 à W−1,
+    y de 0 à H−1) quel que soit le rééchantillonnage. Si la simplification
+    garde plus de triangles que la grille complète, celle-ci est renvoyée.
+
+    Args:
+        depth_map (ndarray): Carte de profondeur H×W (valeurs entre 0 et 1)
+        scale_factor (float): Facteur d'échelle de la hauteur
+        max_error (float): Erreur verticale tolérée, dans l'unité de la
+            carte de profondeur (avant scale_factor)
+        target_faces (int): Nombre maximal de triangles ; prioritaire
+            sur max_error
+
+    Returns:
+        tuple: (sommets float32 (N, 3), faces int32 (M, 3))
+    """
+    if max_error is None and target_faces is None:
+        raise ValueError("max_error ou target_faces doit être renseigné")
+
+    height, width = depth_map.shape
+    terrain = resample_terrain(depth_map, target_faces)
+    errors = rtin_errors(terrain)
+    if target_faces is not None:
+        max_error = error_for_budget(errors, target_faces)
+    full_grid_faces = 2 * max(height - 1, 0) * max(width - 1, 0)
+    triangles = rtin_triangles(errors, max_error, max_triangles=full_grid_faces)
+    if triangles is None:
+        # Rééchantillonnage plus fin que la carte et seuil trop bas
+        return heightfield_mesh(depth_map, scale_factor)
+
+    # Renumérotation compacte des seuls points de grille utilisés
+    rows, cols = terrain.shape
+    grid_indices = triangles[:, 1::2] * cols + triangles[:, 0::2]
+    used = np.zeros(rows * cols, dtype=bool)
+    used[grid_indices] = True
+    remap = np.cumsum(used, dtype=np.int64) - 1
+    faces = remap[grid_indices].astype(FACE_DTYPE)
+
+    points = np.flatnonzero(used)
+    ys, xs = np.divmod(points, cols)
+    vertices = np.empty((len(points), 3), dtype=VERTEX_DTYPE)
+    vertices[:, 0] = xs * ((width - 1) / (cols - 1))
+    vertices[:, 1] = ys * ((height - 1) / (rows - 1))
+    vertices[:, 2] = terrain.ravel()[points] * scale_factor
+    return vertices, faces
@@ -0,0 +1,107 @@
+"""
+Export en flux des maillages de champs de hauteur, par bandes de lignes.
+
+Pour les très grandes images, la carte de profondeur n'est jamais
+matérialisée en entier : elle est calculée par bandes de tile_rows lignes
+(avec une marge de lignes voisines pour que le flou gaussien soit
+identique à celui de l'image entière), et les sommets et faces de chaque
+bande sont écrits aussitôt dans le fichier de sortie (écrivains de
+writers.py). La mémoire de travail dépend de la largeur de l'image et de
+tile_rows, pas de sa hauteur ; seule l'image en niveaux de gris (1 octet
+par pixel) reste chargée.
+"""
+import numpy as np
+
+from .depth import blur, kernel_radius, normalize, resolve_backend
+from .mesh import grid_faces, grid_vertices
+from .writers import open_writer
+
+# Nombre de lignes de pixels traitées par bande
+DEFAULT_TILE_ROWS = 256
+
+
+def _blurred_tiles(image, blur_sigma, tile_rows, backend):
+    """
+    Bandes floutées de l'image, identiques aux lignes correspondantes du
+    flou de l'image entière.
+
+    Yields:
+        tuple: (première ligne, bande floutée)
+    """
+    height = image.shape[0]
+    halo = kernel_radius(blur_sigma)
+    for start in range(0, height, tile_rows):
+        stop = min(start + tile_rows, height)
+        top = max(start - halo, 0)
+        bottom = min(stop + halo, height)
+        band = blur(image[top:bottom], blur_sigma, backend)
+        yield start, band[start - top:stop - top]
+
+
+def iter_depth_tiles(image, blur_sigma=2.0, tile_rows=DEFAULT_TILE_ROWS, backend=None):
+    """
+    Carte de profondeur normalisée, bande par bande.
+
+    Une première passe détermine le minimum et le maximum du flou, une
+    seconde produit les bandes normalisées entre 0 et 1, comme
+    ImageProcessor.create_depth_map. Le flou par pyramide, qui n'est pas
+    local, est remplacé par le flou OpenCV exact.
+
+    Args:
+        image (ndarray): Image en niveaux de gris H×W
+        blur_sigma (float): Force du flou gaussien
+        tile_rows (int): Nombre de lignes par bande
+        backend (str): Implémentation du flou (voir depth.py)
+
+    Yields:
+        tuple: (première ligne, bande de profondeur float32)
+    """
+    backend = resolve_backend(backend, blur_sigma)
+    if backend == 'pyramid':
+        backend = 'opencv'
+
+    low, high = np.inf, -np.inf
+    for _, band in _blurred_tiles(image, blur_sigma, tile_rows, backend):
+        low = min(low, float(band.min()))
+        high = max(high, float(band.max()))
+
+    for start, band in _blurred_tiles(image, blur_sigma, tile_rows, backend):
+        yield start, normalize(band, low, high).astype(np.float32, copy=False)
+
+
+def stream_heightfield_mesh(image, output_path, scale_factor=1.0, blur_sigma=2.0, tile_rows=DEFAULT_TILE_ROWS,
+                            file_format=None, depth_backend=None, progress=None):
+    """
+    Écrit le maillage complet d'une image sans le garder en mémoire.
+
+    Le maillage écrit est celui que construirait generate_mesh (mêmes
+    sommets, mêmes faces, même ordre).
+
+    Args:
+        image (ndarray): Image en niveaux de gris H×W
+        output_path (str): Chemin du fichier de sortie
+        scale_factor (float): Facteur d'échelle pour la hauteur du maillage
+        blur_sigma (float): Force du flou gaussien
+        tile_rows (int): Nombre de lignes par bande
+        file_format (str): obj, ply, stl ou glb (déduit de l'extension par défaut)
+        depth_backend (str): Implémentation du flou (voir depth.py)
+        progress (callable): Appelée avec la fraction de lignes écrites après
+            chaque bande
+
+    Returns:
+        tuple: (nombre de sommets, nombre de faces)
+    """
+    height, width = image.shape
+    nb_vertices = height * width
+    nb_faces = 2 * max(height - 1, 0) * max(width - 1, 0)
+    with open_writer(output_path, nb_vertices, nb_faces, file_format) as writer:
+        for start, depth_tile in iter_depth_tiles(image, blur_sigma, tile_rows, depth_backend):
+            writer.write_vertices(grid_vertices(depth_tile, scale_factor, row_offset=start))
+
+            # Cellules entre la dernière ligne de la bande précédente et celle-ci
+            first_row = max(start - 1, 0)
+            rows = start + len(depth_tile) - first_row
+            writer.write_faces(grid_faces(rows, width, first_vertex=first_row * width))
+            if progress is not None:
+                progress((start + len(depth_tile)) / height)
+    return nb_vertices, nb_faces
@@ -4,19 +4,103 @@ Validateur pour les images et les modèles 3D générés.
 import os
 import cv2
 import numpy as np
-from PIL import Image
+from PIL import Image, UnidentifiedImageError
 import trimesh
 
 class ImageValidator:
     """Classe pour valider les images avant traitement."""
     
+    # Côté maximal d'une image traitée en mémoire
+    MAX_SIZE = 4096
+    # Côté maximal d'une image traitée par bandes (export en flux)
+    MAX_STREAMING_SIZE = 8192
+    
+    @staticmethod
+    def read_header(stream):
+        """
+        Lit l'en-tête d'une image depuis un flux, sans décoder les pixels.
+        
+        Seuls les premiers octets nécessaires à PIL sont lus ; le flux est
+        ensuite ramené à sa position de départ.
+        
+        Args:
+            stream: Flux binaire positionnable (fichier envoyé, BytesIO…)
+            
+        Returns:
+            dict: format, width, height et mode de l'image
+            
+        Raises:
+            ValueError: Si le flux n'est pas une image reconnue
+        """
+        position = stream.tell()
+        try:
+            # Image.open ne lit que l'en-tête, et ne ferme pas un flux qu'il n'a pas ouvert
+            img = Image.open(stream)
+            return {'format': img.format, 'width': img.width, 'height': img.height, 'mode': img.mode}
+        except UnidentifiedImageError as e:
+            raise ValueError("Format d'image non reconnu") from e
+        except Exception as e:
+            raise ValueError(f"Image illisible: {str(e)}") from e
+        finally:
+            stream.seek(position)
+            
     @staticmethod
-    def validate_image(image_path):
+    def validate_header(header, max_size=None):
+        """
+        Vérifie le format, les dimensions et le mode d'une image.
+        
+        Args:
+            header (dict): En-tête lu par read_header
+            max_size (int): Côté maximal accepté (MAX_SIZE par défaut)
+            
+        Returns:
+            tuple: (bool, str) - (est_valide, message)
+        """
+        # Vérifier le format
+        if header['format'] not in ['JPEG', 'PNG', 'BMP']:
+            return False, f"Format non supporté: {header['format']}"
+            
+        # Vérifier les dimensions
+        width, height = header['width'], header['height']
+        if width < 100 or height < 100:
+            return False, f"Image trop petite: {width}x{height}"
+        max_size = max_size or ImageValidator.MAX_SIZE
+        if width > max_size or height > max_size:
+            return False, f"Image trop grande: {width}x{height}"
+            
+        # Vérifier le mode de couleur
+        if header['mode'] not in ['RGB', 'L']:
+            return False, f"Mode couleur non supporté: {header['mode']}"
+            
+        return True, "Image valide"
+        
+    @staticmethod
+    def validate_stream(stream, max_size=None):
+        """
+        Valide une image envoyée avant de l'écrire sur le disque.
+        
+        Args:
+            stream: Flux binaire positionnable de l'image
+            max_size (int): Côté maximal accepté (MAX_SIZE par défaut)
+            
+        Returns:
+            tuple: (bool, str, dict) - (est_valide, message, en-tête ou None)
+        """
+        try:
+            header = ImageValidator.read_header(stream)
+        except ValueError as e:
+            return False, str(e), None
+        is_valid, message = ImageValidator.validate_header(header, max_size)
+        return is_valid, message, header
+        
+    @staticmethod
+    def validate_image(image_path, max_size=None):
         """
         Valide une image avant le traitement.
         
         Args:
             image_path (str): Chemin vers l'image à valider
+            max_size (int): Côté maximal accepté (MAX_SIZE par défaut)
             
         Returns:
             tuple: (bool, str) - (est_valide, message)
@@ -25,35 +109,88 @@ class ImageValidator:
             return False, "Le fichier n'existe pas"
             
         try:
-            img = Image.open(image_path)
-            
-            # Vérifier le format
-            if img.format not in ['JPEG', 'PNG', 'BMP']:
-                return False, f"Format non supporté: {img.format}"
-                
-            # Vérifier les dimensions
-            width, height = img.size
-            if width < 100 or height < 100:
-                return False, f"Image trop petite: {width}x{height}"
-            if width > 4096 or height > 4096:
-                return False, f"Image trop grande: {width}x{height}"
-                
-            # Vérifier le mode de couleur
-            if img.mode not in ['RGB', 'L']:
-                return False, f"Mode couleur non supporté: {img.mode}"
-                
-            return True, "Image valide"
-            
-        except Exception as e:
+            with open(image_path, 'rb') as f:
+                header = ImageValidator.read_header(f)
+        except ValueError as e:
             return False, f"Erreur lors de la validation: {str(e)}"
+        return ImageValidator.validate_header(header, max_size)
             
 class MeshValidator:
     """Classe pour valider les modèles 3D générés."""
     
+    # Triangles vérifiés par bloc (limite la mémoire des tableaux intermédiaires)
+    HEIGHTFIELD_CHUNK = 1 << 20
+    
+    @staticmethod
+    def validate_heightfield(vertices, faces):
+        """
+        Valide en mémoire un maillage de champ de hauteur (surface ouverte).
+        
+        Un champ de hauteur n'est jamais étanche : à la place des contrôles
+        topologiques de trimesh, les vérifications sont analytiques et
+        vectorisées. Les coordonnées doivent être finies, les indices des
+        faces désigner des sommets existants, et chaque triangle projeté
+        sur le plan (x, y) avoir une aire non nulle et positive : aucun
+        triangle dégénéré, et des normales toutes orientées vers +z.
+        
+        Args:
+            vertices (ndarray): Sommets (N, 3)
+            faces (ndarray): Faces (M, 3)
+            
+        Returns:
+            tuple: (bool, str) - (est_valide, message)
+        """
+        if len(vertices) == 0 or len(faces) == 0:
+            return False, "Le maillage est vide"
+        if not np.isfinite(vertices).all():
+            return False, "Le maillage contient des coordonnées non finies"
+        if not np.issubdtype(faces.dtype, np.integer) or faces.min() < 0 or faces.max() >= len(vertices):
+            return False, "Les faces référencent des sommets inexistants"
+            
+        degenerate = reversed_faces = 0
+        for start in range(0, len(faces), MeshValidator.HEIGHTFIELD_CHUNK):
+            block = faces[start:start + MeshValidator.HEIGHTFIELD_CHUNK]
+            p0, p1, p2 = (vertices[block[:, k], :2].astype(np.float64) for k in range(3))
+            # Aire signée (doublée) du triangle projeté
+            area = (p1[:, 0] - p0[:, 0]) * (p2[:, 1] - p0[:, 1]) - (p2[:, 0] - p0[:, 0]) * (p1[:, 1] - p0[:, 1])
+            degenerate += int(np.count_nonzero(area == 0))
+            reversed_faces += int(np.count_nonzero(area < 0))
+        if degenerate:
+            return False, f"{degenerate} triangles dégénérés"
+        if reversed_faces:
+            return False, f"Les normales ne sont pas cohérentes ({reversed_faces} triangles inversés)"
+            
+        return True, "Maillage valide"
+        
+    @staticmethod
+    def validate_closed_mesh(mesh):
+        """
+        Valide en mémoire un maillage fermé (solide).
+        
+        Args:
+            mesh (trimesh.Trimesh): Maillage à valider
+            
+        Returns:
+            tuple: (bool, str) - (est_valide, message)
+        """
+        # Vérifier si le maillage est vide
+        if mesh.is_empty:
+            return False, "Le maillage est vide"
+            
+        # Vérifier la topologie
+        if not mesh.is_watertight:
+            return False, "Le maillage n'est pas étanche"
+            
+        # Vérifier les normales
+        if not mesh.is_winding_consistent:
+            return False, "Les normales ne sont pas cohérentes"
+            
+        return True, "Maillage valide"
+    
     @staticmethod
     def validate_mesh(mesh_path):
         """
-        Valide un maillage 3D.
+        Valide un fichier de maillage fermé, rechargé depuis le disque.
         
         Args:
             mesh_path (str): Chemin vers le fichier de maillage
@@ -65,21 +202,9 @@ class MeshValidator:
             return False, "Le fichier n'existe pas"
             
         try:
-            mesh = trimesh.load(mesh_path)
-            
-            # Vérifier si le maillage est vide
-            if mesh.is_empty:
-                return False, "Le maillage est vide"
-                
-            # Vérifier la topologie
-            if not mesh.is_watertight:
-                return False, "Le maillage n'est pas étanche"
-                
-            # Vérifier les normales
-            if not mesh.is_winding_consistent:
-                return False, "Les normales ne sont pas cohérentes"
-                
-            return True, "Maillage valide"
+            # force='mesh' : un GLB se charge sinon comme une scène
+            mesh = trimesh.load(mesh_path, force='mesh')
+            return MeshValidator.validate_closed_mesh(mesh)
             
         except Exception as e:
             return False, f"Erreur lors de la validation: {str(e)}"
@@ -0,0 +1,315 @@
+"""
+Écriture directe des maillages aux formats OBJ, PLY, STL et GLB.
+
+Les formats binaires sont écrits à partir des tableaux NumPy de sommets
+et de faces (tobytes ou protocole buffer), sans travail Python par
+élément. Tous les écrivains partagent la même interface incrémentale :
+le nombre de sommets et de faces est donné à l'ouverture, puis
+write_vertices et write_faces peuvent être appelés plusieurs fois (export
+par bandes, voir streaming.py). Les en-têtes PLY, STL et GLB contiennent
+ces nombres : chaque section est écrite à sa position finale dans le
+fichier.
+"""
+import json
+import os
+import struct
+
+import numpy as np
+
+# Place réservée au chunk JSON du GLB (complété par des espaces)
+GLB_JSON_RESERVED = 2048
+
+# Types glTF
+GLTF_FLOAT = 5126
+GLTF_UNSIGNED_INT = 5125
+GLTF_ARRAY_BUFFER = 34962
+GLTF_ELEMENT_ARRAY_BUFFER = 34963
+GLTF_TRIANGLES = 4
+
+PLY_FACE_DTYPE = np.dtype([('count', 'u1'), ('indices', '<i4', 3)])
+STL_FACE_DTYPE = np.dtype([('normal', '<f4', 3), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+
+# Sommets ou faces passés à la fois aux écrivains par write_mesh : les
+# tampons de conversion (texte OBJ, enregistrements PLY et STL) restent
+# de taille fixe quelle que soit la taille du maillage
+WRITE_CHUNK_ROWS = 1 << 18
+
+
+class MeshWriter:
+    """
+    Écrivain de maillage incrémental.
+
+    Les sommets doivent être écrits avant les faces qui les référencent.
+
+    Args:
+        output_path (str): Chemin du fichier de sortie
+        nb_vertices (int): Nombre total de sommets
+        nb_faces (int): Nombre total de faces
+    """
+
+    binary = True
+    # Les sommets d'un maillage complet peuvent être écrits par blocs
+    chunked_vertices = True
+
+    def __init__(self, output_path, nb_vertices, nb_faces):
+        self.output_path = output_path
+        self.nb_vertices = nb_vertices
+        self.nb_faces = nb_faces
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.output_path, 'wb' if self.binary else 'w', buffering=1 << 20)
+        self.begin()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        try:
+            if exc_type is None:
+                self.end()
+        finally:
+            self._file.close()
+
+    def begin(self):
+        """Écrit l'en-tête."""
+
+    def end(self):
+        """Complète le fichier une fois toutes les données écrites."""
+
+    def write_vertices(self, vertices):
+        """Ajoute des sommets (N, 3)."""
+        raise NotImplementedError
+
+    def write_faces(self, faces):
+        """Ajoute des faces (M, 3) d'indices à partir de 0."""
+        raise NotImplementedError
+
+
+class ObjWriter(MeshWriter):
+    """Format texte OBJ (indices à partir de 1)."""
+
+    binary = False
+
+    def write_vertices(self, vertices):
+        self._file.write(('v {:.8g} {:.8g} {:.8g}\n' * len(vertices)).format(*vertices.ravel().tolist()))
+
+    def write_faces(self, faces):
+        self._file.write(('f {} {} {}\n' * len(faces)).format(*(faces.ravel() + 1).tolist()))
+
+
+class _SectionWriter(MeshWriter):
+    """Format binaire dont les sommets et les faces occupent deux sections consécutives."""
+
+    vertex_size = 12
+    face_size = None
+
+    def _header(self):
+        raise NotImplementedError
+
+    def begin(self):
+        header = self._header()
+        self._file.write(header)
+        self._vertex_offset = len(header)
+        self._faces_start = self._face_offset = self._vertex_offset + self.nb_vertices * self.vertex_size
+        self._faces_end = self._faces_start + self.nb_faces * self.face_size
+
+    def _write_at(self, offset, data):
+        self._file.seek(offset)
+        self._file.write(data)
+        return offset + data.nbytes
+
+    def write_vertices(self, vertices):
+        self._vertex_offset = self._write_at(self._vertex_offset, np.ascontiguousarray(vertices, dtype='<f4'))
+
+    def end(self):
+        if self._vertex_offset != self._faces_start or self._face_offset != self._faces_end:
+            raise ValueError("Le nombre de sommets ou de faces écrits ne correspond pas à l'en-tête")
+
+
+class PlyWriter(_SectionWriter):
+    """Format PLY binaire little-endian."""
+
+    face_size = PLY_FACE_DTYPE.itemsize
+
+    def _header(self):
+        return (
+            'ply\n'
+            'format binary_little_endian 1.0\n'
+            f'element vertex {self.nb_vertices}\n'
+            'property float x\n'
+            'property float y\n'
+            'property float z\n'
+            f'element face {self.nb_faces}\n'
+            'property list uchar int vertex_indices\n'
+            'end_header\n'
+        ).encode('ascii')
+
+    def write_faces(self, faces):
+        records = np.empty(len(faces), dtype=PLY_FACE_DTYPE)
+        records['count'] = 3
+        records['indices'] = faces
+        self._face_offset = self._write_at(self._face_offset, records)
+
+
+class GlbWriter(_SectionWriter):
+    """
+    Format glTF 2.0 binaire : positions float32 et indices uint32.
+
+    Le chunk JSON, qui précède les données, contient les bornes des
+    positions : il est réservé à l'ouverture et écrit à la fermeture.
+    """
+
+    face_size = 12
+
+    def _header(self):
+        return bytes(12 + 8 + GLB_JSON_RESERVED + 8)
+
+    def begin(self):
+        super().begin()
+        self._low = np.full(3, np.inf, dtype=np.float32)
+        self._high = np.full(3, -np.inf, dtype=np.float32)
+
+    def write_vertices(self, vertices):
+        if len(vertices):
+            np.minimum(self._low, vertices.min(axis=0), out=self._low)
+            np.maximum(self._high, vertices.max(axis=0), out=self._high)
+        super().write_vertices(vertices)
+
+    def write_faces(self, faces):
+        self._face_offset = self._write_at(self._face_offset, np.ascontiguousarray(faces, dtype='<u4'))
+
+    def _gltf(self, positions_size, indices_size):
+        return {
+            'asset': {'version': '2.0', 'generator': 'Art Curator'},
+            'scene': 0,
+            'scenes': [{'nodes': [0]}],
+            'nodes': [{'mesh': 0}],
+            'meshes': [{'primitives': [{'attributes': {'POSITION': 0}, 'indices': 1, 'mode': GLTF_TRIANGLES}]}],
+            'buffers': [{'byteLength': positions_size + indices_size}],
+            'bufferViews': [
+                {'buffer': 0, 'byteOffset': 0, 'byteLength': positions_size, 'target': GLTF_ARRAY_BUFFER},
+                {'buffer': 0, 'byteOffset': positions_size, 'byteLength': indices_size,
+                 'target': GLTF_ELEMENT_ARRAY_BUFFER}
+            ],
+            'accessors': [
+                {'bufferView': 0, 'componentType': GLTF_FLOAT, 'count': self.nb_vertices, 'type': 'VEC3',
+                 'min': self._low.tolist(), 'max': self._high.tolist()},
+                {'bufferView': 1, 'componentType': GLTF_UNSIGNED_INT, 'count': 3 * self.nb_faces, 'type': 'SCALAR'}
+            ]
+        }
+
+    def end(self):
+        super().end()
+        positions_size = self.nb_vertices * 12
+        indices_size = self.nb_faces * 12
+        document = json.dumps(self._gltf(positions_size, indices_size), separators=(',', ':')).encode('utf-8')
+        if len(document) > GLB_JSON_RESERVED:
+            raise ValueError("Description glTF trop longue pour l'espace réservé")
+
+        total = 12 + 8 + GLB_JSON_RESERVED + 8 + positions_size + indices_size
+        self._file.seek(0)
+        self._file.write(struct.pack('<4sII', b'glTF', 2, total))
+        self._file.write(struct.pack('<I4s', GLB_JSON_RESERVED, b'JSON'))
+        self._file.write(document.ljust(GLB_JSON_RESERVED, b' '))
+        self._file.write(struct.pack('<I4s', positions_size + indices_size, b'BIN\0'))
+
+
+class StlWriter(MeshWriter):
+    """
+    Format STL binaire : un enregistrement de 50 octets par triangle.
+
+    Les triangles STL portent leurs coordonnées : l'écrivain garde les
+    sommets des deux derniers appels à write_vertices, qui doivent
+    contenir tous ceux que référencent les faces suivantes (c'est le cas
+    d'un export par bandes de lignes).
+    """
+
+    # Les faces d'un maillage complet référencent n'importe quel sommet
+    chunked_vertices = False
+
+    def begin(self):
+        self._file.write(b'Art Curator'.ljust(80, b' '))
+        self._file.write(struct.pack('<I', self.nb_faces))
+        self._blocks = []
+        self._window = np.empty((0, 3), dtype=np.float32)
+        self._window_start = 0
+
+    def write_vertices(self, vertices):
+        self._blocks.append(np.asarray(vertices, dtype=np.float32))
+        if len(self._blocks) > 2:
+            self._window_start += len(self._blocks.pop(0))
+        self._window = np.concatenate(self._blocks) if len(self._blocks) > 1 else self._blocks[0]
+
+    def write_faces(self, faces):
+        records = np.zeros(len(faces), dtype=STL_FACE_DTYPE)
+        triangles = records['vertices']
+        np.take(self._window, faces - self._window_start, axis=0, out=triangles)
+        normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        np.divide(normals, lengths, out=records['normal'], where=lengths > 0)
+        self._file.write(records)
+
+
+WRITERS = {
+    'obj': ObjWriter,
+    'ply': PlyWriter,
+    'stl': StlWriter,
+    'glb': GlbWriter
+}
+
+# Formats de sortie disponibles
+MESH_FORMATS = tuple(WRITERS)
+
+
+def mesh_format(output_path, file_format=None):
+    """
+    Format de sortie, explicite ou déduit de l'extension du fichier.
+
+    Args:
+        output_path (str): Chemin du fichier de sortie
+        file_format (str): Format demandé (obj, ply, stl, glb)
+
+    Returns:
+        str: Format normalisé
+    """
+    file_format = (file_format or os.path.splitext(output_path)[1].lstrip('.') or 'obj').lower()
+    if file_format not in MESH_FORMATS:
+        raise ValueError(f"Format de maillage non supporté : {file_format}")
+    return file_format
+
+
+def open_writer(output_path, nb_vertices, nb_faces, file_format=None):
+    """
+    Ouvre un écrivain incrémental pour le format demandé.
+
+    Args:
+        output_path (str): Chemin du fichier de sortie
+        nb_vertices (int): Nombre total de sommets
+        nb_faces (int): Nombre total de faces
+        file_format (str): Format (déduit de l'extension par défaut)
+
+    Returns:
+        MeshWriter: Écrivain à utiliser comme gestionnaire de contexte
+    """
+    return WRITERS[mesh_format(output_path, file_format)](output_path, nb_vertices, nb_faces)
+
+
+def write_mesh(output_path, vertices, faces, file_format=None):
+    """
+    Écrit un maillage complet.
+
+    Args:
+        output_path (str): Chemin du fichier de sortie
+        vertices (ndarray): Sommets (N, 3)
+        faces (ndarray): Faces (M, 3)
+        file_format (str): Format (déduit de l'extension par défaut)
+
+    Returns:
+        str: Chemin du fichier écrit
+    """
+    with open_writer(output_path, len(vertices), len(faces), file_format) as writer:
+        vertex_rows = WRITE_CHUNK_ROWS if writer.chunked_vertices else max(len(vertices), 1)
+        for start in range(0, len(vertices), vertex_rows):
+            writer.write_vertices(vertices[start:start + vertex_rows])
+        for start in range(0, len(faces), WRITE_CHUNK_ROWS):
+            writer.write_faces(faces[start:start + WRITE_CHUNK_ROWS])
+    return output_path
@@ -4,7 +4,8 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 from flask import current_app
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, String, Boolean, Text, DateTime, text
+from sqlalchemy import Column, Integer, String, Boolean, Text, DateTime, text, DDL, event
+from sqlalchemy.orm import validates
 import logging
 import os
 
@@ -70,6 +71,10 @@ def reset_database_full(app):
 
 class Artist(db.Model):
     __tablename__ = 'artists'
+    __table_args__ = (
+        # Pagination par curseur du salon de vote (tri par nom puis id)
+        db.Index('ix_artists_nom_id', 'nom', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     numero_dossier = db.Column(db.String(50), unique=True, nullable=True)
@@ -150,7 +155,7 @@ class Artwork(db.Model):
     __tablename__ = 'artworks'
     
     id = db.Column(db.Integer, primary_key=True)
-    artist_id = db.Column(db.Integer, db.ForeignKey('artists.id'), nullable=False)
+    artist_id = db.Column(db.Integer, db.ForeignKey('artists.id'), nullable=False, index=True)
     numero = db.Column(db.String(50), unique=True)
     titre = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, default='')
@@ -180,18 +185,125 @@ class Artwork(db.Model):
 
     @property
     def total_votes(self):
-        """Calcule le nombre total de votes pour cette œuvre."""
-        return Vote.query.filter_by(artwork_id=self.id).count()
+        """Nombre total de votes pour cette œuvre (compteurs maintenus par les triggers)."""
+        return (self.up_votes_count or 0) + (self.down_votes_count or 0)
+
+# Anciens types de vote convertis vers le format 'pour'/'contre'
+VOTE_TYPE_ALIASES = {
+    'up': 'pour',
+    'down': 'contre'
+}
 
 class Vote(db.Model):
     __tablename__ = 'votes'
+    __table_args__ = (
+        # Un seul vote par utilisateur et par œuvre (cible des upserts)
+        db.UniqueConstraint('user_id', 'artwork_id', name='uq_votes_user_artwork'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    artwork_id = db.Column(db.Integer, db.ForeignKey('artworks.id'), nullable=False)
+    artwork_id = db.Column(db.Integer, db.ForeignKey('artworks.id'), nullable=False, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     vote_type = db.Column(db.String(10), nullable=False)
     vote_date = db.Column(db.DateTime, default=datetime.utcnow)
 
+    @validates('vote_type')
+    def normalize_vote_type(self, key, vote_type):
+        """Enregistre toujours les votes au format 'pour'/'contre'."""
+        return VOTE_TYPE_ALIASES.get(vote_type, vote_type)
+
+# Triggers SQLite maintenant Artwork.up_votes_count / down_votes_count dans
+# la même transaction que chaque insertion, modification ou suppression de vote.
+VOTE_COUNTER_TRIGGERS = [
+    DDL("""
+        CREATE TRIGGER IF NOT EXISTS votes_counters_insert AFTER INSERT ON votes
+        BEGIN
+            UPDATE artworks SET
+                up_votes_count = up_votes_count + (NEW.vote_type = 'pour'),
+                down_votes_count = down_votes_count + (NEW.vote_type = 'contre')
+            WHERE id = NEW.artwork_id;
+        END
+    """),
+    DDL("""
+        CREATE TRIGGER IF NOT EXISTS votes_counters_delete AFTER DELETE ON votes
+        BEGIN
+            UPDATE artworks SET
+                up_votes_count = up_votes_count - (OLD.vote_type = 'pour'),
+                down_votes_count = down_votes_count - (OLD.vote_type = 'contre')
+            WHERE id = OLD.artwork_id;
+        END
+    """),
+    DDL("""
+        CREATE TRIGGER IF NOT EXISTS votes_counters_update AFTER UPDATE OF vote_type, artwork_id ON votes
+        BEGIN
+            UPDATE artworks SET
+                up_votes_count = up_votes_count - (OLD.vote_type = 'pour'),
+                down_votes_count = down_votes_count - (OLD.vote_type = 'contre')
+            WHERE id = OLD.artwork_id;
+            UPDATE artworks SET
+                up_votes_count = up_votes_count + (NEW.vote_type = 'pour'),
+                down_votes_count = down_votes_count + (NEW.vote_type = 'contre')
+            WHERE id = NEW.artwork_id;
+        END
+    """),
+]
+
+for trigger in VOTE_COUNTER_TRIGGERS:
+    event.listen(Vote.__table__, 'after_create', trigger.execute_if(dialect='sqlite'))
+
+class VotingRound(db.Model):
+    """Tour de vote clôturé, dont les résultats sont figés dans les tables d'instantané."""
+    __tablename__ = 'voting_rounds'
+
+    id = db.Column(db.Integer, primary_key=True)
+    nom = db.Column(db.String(100), nullable=False)
+    closed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    closed_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    nb_artworks = db.Column(db.Integer, default=0, nullable=False)
+    nb_selected = db.Column(db.Integer, default=0, nullable=False)
+    nb_votes = db.Column(db.Integer, default=0, nullable=False)
+    nb_jurors = db.Column(db.Integer, default=0, nullable=False)
+
+# Les tables d'instantané n'ont pas de clé étrangère vers artworks/users :
+# les résultats d'un tour clôturé survivent à la suppression d'une œuvre.
+# Leur clé primaire commence par round_id, si bien que la lecture d'un tour
+# est un parcours d'index unique.
+
+class RoundArtworkResult(db.Model):
+    """Décompte et statut final d'une œuvre à la clôture d'un tour."""
+    __tablename__ = 'round_artwork_results'
+    __table_args__ = (
+        db.Index('ix_round_artwork_results_round_statut', 'round_id', 'statut'),
+    )
+
+    round_id = db.Column(db.Integer, db.ForeignKey('voting_rounds.id', ondelete='CASCADE'), primary_key=True)
+    artwork_id = db.Column(db.Integer, primary_key=True)
+    artist_id = db.Column(db.Integer, nullable=False)
+    categorie = db.Column(db.String(50), default='')
+    statut = db.Column(db.String(20), nullable=False)
+    up_votes = db.Column(db.Integer, default=0, nullable=False)
+    down_votes = db.Column(db.Integer, default=0, nullable=False)
+
+class RoundJurorParticipation(db.Model):
+    """Participation d'un juré à un tour clôturé."""
+    __tablename__ = 'round_juror_participation'
+
+    round_id = db.Column(db.Integer, db.ForeignKey('voting_rounds.id', ondelete='CASCADE'), primary_key=True)
+    user_id = db.Column(db.Integer, primary_key=True)
+    nb_votes = db.Column(db.Integer, default=0, nullable=False)
+    up_votes = db.Column(db.Integer, default=0, nullable=False)
+    down_votes = db.Column(db.Integer, default=0, nullable=False)
+    last_vote_date = db.Column(db.DateTime)
+
+class RoundVote(db.Model):
+    """Vote figé d'un tour clôturé (+1 pour, -1 contre)."""
+    __tablename__ = 'round_votes'
+
+    round_id = db.Column(db.Integer, db.ForeignKey('voting_rounds.id', ondelete='CASCADE'), primary_key=True)
+    user_id = db.Column(db.Integer, primary_key=True)
+    artwork_id = db.Column(db.Integer, primary_key=True)
+    vote = db.Column(db.SmallInteger, nullable=False)
+
 class Invitation(db.Model):
     __tablename__ = 'invitations'
     
@@ -1,10 +1,13 @@
 from flask import Blueprint, jsonify, request, current_app, render_template, flash, redirect, url_for
 from flask_login import login_required, current_user
-from app.models.models import Artist, Artwork, db, Vote, User, Invitation
+from app.models.models import Artist, Artwork, db, Vote, User, Invitation, VotingRound
 from functools import wraps
 import secrets
 from datetime import datetime, timedelta
 from app.utils.email_sender import send_invitation_email
+from app.services.selection import select_by_rule
+from app.services.voting_rounds import close_round, get_round_statistics
+from app.services.ranking import SELECTION_MIN_SCORE, compute_ranking, propose_selection, ranking_to_json
 from flask_mail import Mail
 from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError
@@ -61,10 +64,83 @@ def get_statistics():
     stats = {
         'total_artworks': Artwork.query.count(),
         'total_artists': Artist.query.count(),
-        'total_votes': Vote.query.count()
+        'total_votes': Vote.query.count(),
+        'total_users': User.query.count()
     }
+    # Chiffres du vote lus dans l'instantané du tour clôturé demandé (round_id)
+    round_id = request.args.get('round_id', type=int)
+    if round_id is not None:
+        voting_round = VotingRound.query.get_or_404(round_id)
+        stats.update(get_round_statistics(voting_round))
+    else:
+        stats['selected_artworks'] = Artwork.query.filter_by(statut='selectionne').count()
     return render_template('admin/statistics.html', stats=stats)
 
+@admin_bp.route('/rounds/close', methods=['POST'])
+@login_required
+@admin_required
+def close_voting_round():
+    """Clôture le tour de vote en cours et fige ses résultats."""
+    try:
+        voting_round = close_round(nom=request.form.get('nom') or None, closed_by=current_user.id)
+    except Exception as e:
+        current_app.logger.error(f"Erreur lors de la clôture du tour de vote : {e}")
+        flash('Une erreur est survenue lors de la clôture du tour de vote.', 'danger')
+        return redirect(url_for('admin.get_statistics'))
+
+    flash(f'Tour de vote « {voting_round.nom} » clôturé : {voting_round.nb_votes} votes figés.', 'success')
+    return redirect(url_for('admin.get_statistics', round_id=voting_round.id))
+
+@admin_bp.route('/ranking')
+@login_required
+@admin_required
+def get_ranking():
+    """
+    Classement des œuvres par consensus du jury, au format JSON.
+    
+    Paramètres : limit, min_score, max_selected, per_category, round_id
+    (votes figés d'un tour clôturé). La réponse contient une proposition de
+    sélection au format de validate_selections.
+    """
+    limit = request.args.get('limit', type=int)
+    min_score = request.args.get('min_score', SELECTION_MIN_SCORE, type=float)
+    max_selected = request.args.get('max_selected', type=int)
+    per_category = request.args.get('per_category', type=int)
+
+    round_id = request.args.get('round_id', type=int)
+
+    ranking = compute_ranking(round_id=round_id)
+    data = ranking_to_json(ranking, limit=limit)
+    data['proposed_selection'] = propose_selection(
+        ranking, min_score=min_score, max_selected=max_selected, per_category=per_category
+    )
+    return jsonify(data)
+
+@admin_bp.route('/selection/rule', methods=['POST'])
+@login_required
+@admin_required
+def apply_selection_rule():
+    """
+    Applique une règle de sélection (ex. approbation ≥ 0.6 dans une catégorie).
+    
+    Paramètres : min_approval (obligatoire), categorie, statut, min_votes,
+    pending_only. Renvoie les IDs des œuvres dont le statut a changé.
+    """
+    params = request.get_json(silent=True) or request.form
+    try:
+        min_approval = float(params['min_approval'])
+        changes = select_by_rule(
+            min_approval,
+            categorie=params.get('categorie') or None,
+            statut=params.get('statut', 'selectionne'),
+            min_votes=int(params.get('min_votes', 1)),
+            from_statuts=('en_attente',) if str(params.get('pending_only', '')).lower() in ('1', 'true', 'on') else None
+        )
+    except (KeyError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': f'Paramètres invalides : {e}'}), 400
+
+    return jsonify({'status': 'success', 'changed_artworks': sorted(changes)})
+
 @admin_bp.route('/generate-pdfs')
 @login_required
 @admin_required
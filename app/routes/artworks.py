@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, send_from_directory, current_app, request, jsonify, redirect, url_for, flash, session
+from flask import Blueprint, render_template, send_from_directory, current_app, request, jsonify, redirect, url_for, flash, session, Response
 from flask_login import current_user, login_required
 from werkzeug.utils import secure_filename
 from app.models.models import db, Artwork, Vote, Artist
@@ -14,17 +14,30 @@ import io
 from PIL import Image as PILImage
 from reportlab.pdfgen import canvas
 import logging
-from app.utils.cube_3d_generator import batch_create_3d_cubes, create_artwork_cube
+import queue
+from app.utils.cube_3d_generator import batch_create_3d_cubes, create_artwork_cube, CUBE_FORMATS
+from app.image_processing.validator import ImageValidator
 import qrcode
 import io
 import base64
 from sqlalchemy import case
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
+from app.services.vote_tally import get_salon_tally, get_salon_page, get_vote_counts, tally_to_json
+from app.services.vote_writer import record_ballot, parse_ballot_form
+from app.services.vote_journal import vote_journal
+from app.services.vote_events import vote_events
+from app.services.selection import apply_statuts
+from app.services.voting_rounds import get_round, selected_artwork_ids
 
 bp = Blueprint('artworks', __name__, url_prefix='/artworks')
 
+# Valeurs des champs selection_<id> envoyés à validate_selections
+SELECTION_ACTIONS = {'selectionner': 'selectionne', 'refuser': 'refuse'}
+
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
+# Formats réels (lus dans l'en-tête) correspondant aux extensions autorisées
+ALLOWED_FORMATS = {'PNG', 'JPEG'}
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -63,6 +76,14 @@ def submit():
     if not allowed_file(file.filename):
         return jsonify({'error': 'Format de fichier non autorisé. Utilisez JPG ou PNG.'}), 400
 
+    # Vérifier le contenu d'après l'en-tête, avant d'écrire le fichier
+    try:
+        header = ImageValidator.read_header(file.stream)
+    except ValueError:
+        return jsonify({'error': 'Le fichier envoyé n\'est pas une image valide'}), 400
+    if header['format'] not in ALLOWED_FORMATS:
+        return jsonify({'error': 'Format de fichier non autorisé. Utilisez JPG ou PNG.'}), 400
+
     # Sauvegarder l'image
     filename = secure_filename(file.filename)
     upload_dir = get_upload_path()
@@ -130,7 +151,7 @@ def vote_artwork(artwork_id):
     
     try:
         db.session.add(vote)
-        artwork.up_votes_count += 1
+        # Le compteur up_votes_count est incrémenté par le trigger des votes
         db.session.commit()
         
         return jsonify({
@@ -175,74 +196,16 @@ def salon_de_vote():
     
     # Gestion des requêtes GET
     if request.method == 'GET':
-        # Logs de débogage détaillés
         current_app.logger.info(f"Utilisateur connecté : {current_user.username}")
         
-        # Requête pour récupérer toutes les œuvres avec les statuts pertinents
-        artworks = Artwork.query.filter(Artwork.statut.in_(['en_attente', 'selectionne', 'refuse'])).all()
-        
-        # Regrouper les œuvres par artiste
-        artistes_data = []
-        artistes_dict = {}
-        
-        # Log de débogage global pour les votes
-        all_votes = Vote.query.all()
-        current_app.logger.info(f"Nombre total de votes dans la base de données : {len(all_votes)}")
-        
-        for artwork in artworks:
-            artist = Artist.query.get(artwork.artist_id)
-            if artist is None:
-                current_app.logger.warning(f"Artiste non trouvé pour l'œuvre {artwork.id}")
-                continue
-            
-            # Nom de l'artiste
-            nom_artiste = artist.nom_artiste or f"{artist.prenom} {artist.nom}"
-            
-            # Créer ou récupérer le groupe d'artiste
-            if nom_artiste not in artistes_dict:
-                artiste_groupe = {
-                    'nom_artiste': nom_artiste,
-                    'artworks': []
-                }
-                artistes_data.append(artiste_groupe)
-                artistes_dict[nom_artiste] = artiste_groupe
-            
-            # Récupérer les votes pour cette œuvre
-            votes_artwork = Vote.query.filter_by(artwork_id=artwork.id).all()
-            
-            # Log de débogage pour chaque œuvre
-            current_app.logger.info(f"Œuvre {artwork.id} - {artwork.titre}")
-            current_app.logger.info(f"Nombre de votes pour cette œuvre : {len(votes_artwork)}")
-            
-            for vote in votes_artwork:
-                current_app.logger.info(f"Vote : ID={vote.id}, Type={vote.vote_type}, Utilisateur={vote.user_id}")
-            
-            # Compter les votes
-            up_votes = sum(1 for vote in votes_artwork if vote.vote_type == 'pour')
-            down_votes = sum(1 for vote in votes_artwork if vote.vote_type == 'contre')
-            
-            # Créer un dictionnaire avec toutes les informations
-            artwork_info = {
-                'artwork': artwork,
-                'up_votes': up_votes,
-                'down_votes': down_votes,
-                'total_votes': len(votes_artwork)
-            }
-            
-            # Ajouter l'œuvre au groupe
-            artistes_dict[nom_artiste]['artworks'].append(artwork_info)
-        
-        # Récupérer les votes de l'utilisateur
-        user_votes = {str(vote.artwork_id): vote.vote_type for vote in 
-                      Vote.query.filter_by(user_id=current_user.id).all()}
-        
-        # Récupérer les sélections de l'utilisateur
-        user_selections = get_user_selections()
+        # Première page d'artistes ; les suivantes sont chargées au défilement
+        page = get_salon_page(current_user.id, limit=current_app.config.get('SALON_PAGE_SIZE', 20))
         
         return render_template('artworks/salon_de_vote.html', 
-                               artistes_data=artistes_data, 
-                               user_votes=user_votes,
-                               user_selections=user_selections)
+                               artistes_data=page['artistes_data'], 
+                               user_votes=page['user_votes'],
+                               user_selections=page['user_selections'],
+                               next_cursor=page['next_cursor'])
     
     # Gestion des requêtes POST (votes et sélections)
     if request.method == 'POST':
@@ -255,11 +218,8 @@ def salon_de_vote():
         
         try:
             if action == 'vote':
-                # Collecter et enregistrer les votes
-                for key, value in request.form.items():
-                    if key.startswith('vote_'):
-                        artwork_id = int(key.split('_')[1])
-                        update_artwork_vote(artwork_id, value, current_user)
+                # Enregistrer le bulletin complet en une transaction
+                record_ballot(current_user.id, parse_ballot_form(request.form))
 
                 return jsonify({'message': 'Votes enregistrés avec succès'}), 200
             
@@ -295,6 +255,57 @@ def salon_de_vote():
                 'message': 'Une erreur est survenue lors du traitement'
             }), 500
 
+@bp.route('/salon_de_vote/stream')
+@login_required
+def salon_de_vote_stream():
+    """Flux Server-Sent Events des décomptes de votes et des sélections."""
+    if not current_user.is_admin and not current_user.is_membre:
+        return jsonify({'error': 'Accès non autorisé'}), 403
+    
+    keepalive = current_app.config.get('VOTE_EVENTS_KEEPALIVE', 15)
+    subscriber = vote_events.subscribe()
+    
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    yield subscriber.get(timeout=keepalive)
+                except queue.Empty:
+                    # Commentaire SSE pour garder la connexion ouverte
+                    yield ': keepalive\n\n'
+        finally:
+            vote_events.unsubscribe(subscriber)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def _ballot_response(voted_artwork_ids=None):
+    """
+    Réponse JSON d'un bulletin enregistré.
+
+    Avec le journal d'écriture différée, le bulletin n'est pas encore dans
+    la table des votes : les compteurs lus maintenant seraient ceux d'avant
+    le vote. La réponse l'indique alors par 'pending' sans compteurs, que
+    le flux SSE du salon de vote diffusera une fois le bulletin appliqué.
+
+    Args:
+        voted_artwork_ids (list): IDs des œuvres à compter (None : toutes)
+
+    Returns:
+        Response: {'status', 'up_votes', 'down_votes'} ou {'status', 'pending'}
+    """
+    if vote_journal.enabled:
+        return jsonify({'status': 'success', 'pending': True})
+    up_votes_count, down_votes_count = get_vote_counts(voted_artwork_ids)
+    return jsonify({
+        'status': 'success',
+        'up_votes': up_votes_count,
+        'down_votes': down_votes_count
+    })
+
 @bp.route('/validate_all_votes', methods=['POST'])
 @login_required
 def validate_all_votes():
@@ -306,51 +317,19 @@ def validate_all_votes():
     # Log de débogage
     current_app.logger.info(f'Validating all votes for user {current_user.id}')
 
-    # Récupérer toutes les œuvres
-    artworks = Artwork.query.all()
-    up_votes_count = {}
-    down_votes_count = {}
-
-    for artwork in artworks:
-        # Récupérer le vote de l'utilisateur courant pour cette œuvre
-        user_vote = Vote.query.filter_by(
-            user_id=current_user.id, 
-            artwork_id=artwork.id
-        ).first()
-
-        # Supprimer le vote existant s'il existe
-        if user_vote:
-            current_app.logger.info(f'Removing existing vote for artwork {artwork.id}')
-            db.session.delete(user_vote)
-
-        # Récupérer les votes temporaires de la session
-        temp_vote = session.get(f'temp_vote_{artwork.id}')
-        if temp_vote:
-            current_app.logger.info(f'Processing temporary vote for artwork {artwork.id}')
-            new_vote = Vote(
-                user_id=current_user.id,
-                artwork_id=artwork.id,
-                vote_type=temp_vote['vote_type']
-            )
-            db.session.add(new_vote)
-            # Supprimer le vote temporaire de la session
-            session.pop(f'temp_vote_{artwork.id}', None)
+    # Le bulletin est constitué des votes temporaires de la session
+    ballot = {}
+    for key in [key for key in session.keys() if key.startswith('temp_vote_')]:
+        temp_vote = session.pop(key)
+        ballot[key[len('temp_vote_'):]] = temp_vote['vote_type']
 
-        # Compter les votes
-        up_votes_count[artwork.id] = Vote.query.filter_by(artwork_id=artwork.id, vote_type='up').count()
-        
-        down_votes_count[artwork.id] = Vote.query.filter_by(artwork_id=artwork.id, vote_type='down').count()
-
-    # Valider toutes les modifications
-    db.session.commit()
+    # Remplacer tous les votes de l'utilisateur par ce bulletin
+    record_ballot(current_user.id, ballot, replace=True)
 
     current_app.logger.info('All votes validated successfully')
 
-    return jsonify({
-        'status': 'success',
-        'up_votes': up_votes_count,
-        'down_votes': down_votes_count
-    })
+    # Compter les votes de toutes les œuvres en une requête
+    return _ballot_response()
 
 @bp.route('/validate_votes', methods=['POST'])
 @login_required
@@ -363,121 +342,25 @@ def validate_votes():
     # Log de débogage
     current_app.logger.info(f'Validating votes for user {current_user.id}')
 
-    # Récupérer les votes à valider
-    votes = request.form.to_dict()
-    up_votes_count = {}
-    down_votes_count = {}
-
-    for artwork_id_str, vote_type in votes.items():
-        try:
-            artwork_id = int(artwork_id_str)
-        except ValueError:
-            current_app.logger.warning(f'Invalid artwork ID: {artwork_id_str}')
-            continue
-
-        # Vérifier que l'œuvre existe
-        artwork = Artwork.query.get(artwork_id)
-        if not artwork:
-            current_app.logger.warning(f'Artwork not found: {artwork_id}')
-            continue
-
-        # Récupérer le vote existant de l'utilisateur
-        user_vote = Vote.query.filter_by(
-            user_id=current_user.id, 
-            artwork_id=artwork_id
-        ).first()
-
-        # Supprimer le vote existant s'il existe
-        if user_vote:
-            current_app.logger.info(f'Removing existing vote for artwork {artwork_id}')
-            db.session.delete(user_vote)
-
-        # Créer un nouveau vote
-        new_vote = Vote(
-            user_id=current_user.id,
-            artwork_id=artwork_id,
-            vote_type=vote_type
-        )
-        db.session.add(new_vote)
-
-        # Compter les votes
-        up_votes_count[artwork_id] = Vote.query.filter_by(artwork_id=artwork_id, vote_type='up').count()
-        
-        down_votes_count[artwork_id] = Vote.query.filter_by(artwork_id=artwork_id, vote_type='down').count()
-
-    # Valider toutes les modifications
-    db.session.commit()
+    # Les clés du formulaire sont directement les IDs des œuvres
+    voted_artwork_ids = record_ballot(current_user.id, parse_ballot_form(request.form, prefix=''))
 
     current_app.logger.info('Votes validated successfully')
 
-    return jsonify({
-        'status': 'success',
-        'up_votes': up_votes_count,
-        'down_votes': down_votes_count
-    })
+    # Compter les votes des œuvres concernées en une requête
+    return _ballot_response(voted_artwork_ids)
 
 @bp.route('/submit_vote', methods=['POST'])
 @login_required
 def submit_vote():
     """Soumettre des votes pour plusieurs œuvres depuis le salon de vote."""
-    # Récupérer tous les votes du formulaire
-    votes = {}
-    for key, value in request.form.items():
-        if key.startswith('vote_'):
-            artwork_id = key.split('_')[1]
-            votes[artwork_id] = value
-
-    # Dictionnaires pour stocker les résultats
-    up_votes_count = {}
-    down_votes_count = {}
-
-    # Traiter chaque vote
-    for artwork_id_str, vote_value in votes.items():
-        try:
-            artwork_id = int(artwork_id_str)
-        except ValueError:
-            current_app.logger.warning(f'Invalid artwork ID: {artwork_id_str}')
-            continue
-
-        # Vérifier que l'œuvre existe
-        artwork = Artwork.query.get(artwork_id)
-        if not artwork:
-            current_app.logger.warning(f'Artwork not found: {artwork_id}')
-            continue
-
-        # Supprimer le vote existant de l'utilisateur pour cette œuvre
-        existing_vote = Vote.query.filter_by(
-            user_id=current_user.id, 
-            artwork_id=artwork_id
-        ).first()
-
-        if existing_vote:
-            current_app.logger.info(f'Removing existing vote for artwork {artwork_id}')
-            db.session.delete(existing_vote)
-
-        # Créer un nouveau vote
-        new_vote = Vote(
-            user_id=current_user.id,
-            artwork_id=artwork_id,
-            vote_type=vote_value
-        )
-        db.session.add(new_vote)
-
-        # Compter les votes pour cette œuvre
-        up_votes_count[artwork_id] = Vote.query.filter_by(artwork_id=artwork_id, vote_type='up').count()
-        
-        down_votes_count[artwork_id] = Vote.query.filter_by(artwork_id=artwork_id, vote_type='down').count()
-
-    # Valider toutes les modifications
-    db.session.commit()
+    # Enregistrer le bulletin complet en une transaction
+    voted_artwork_ids = record_ballot(current_user.id, parse_ballot_form(request.form))
 
     current_app.logger.info('Votes validated successfully')
 
-    return jsonify({
-        'status': 'success',
-        'up_votes': up_votes_count,
-        'down_votes': down_votes_count
-    })
+    # Compter les votes des œuvres concernées en une requête
+    return _ballot_response(voted_artwork_ids)
 
 @bp.route('/salon_de_vote_page')
 @login_required
@@ -501,17 +384,10 @@ def salon_de_vote_page():
             current_app.logger.info(f"Action finale : {action}")
 
             if action == 'vote':
-                votes = {}
-                for key, value in request.form.items():
-                    if key.startswith('vote_'):
-                        artwork_id = key.split('_')[1]
-                        votes[artwork_id] = value
-                
+                votes = parse_ballot_form(request.form)
                 current_app.logger.info(f"Votes reçus : {votes}")
                 
-                for artwork_id, vote_value in votes.items():
-                    current_app.logger.info(f"Mise à jour du vote pour l'œuvre {artwork_id} ")
-                    update_artwork_vote(artwork_id, vote_value, current_user)
+                record_ballot(current_user.id, votes)
 
             elif action == 'selection' and current_user.is_admin:
                 selections = {}
@@ -551,10 +427,48 @@ def salon_de_vote_page():
                 flash('Une erreur est survenue', 'danger')
                 return redirect(url_for('artworks.salon_de_vote'))
 
+    page = get_salon_page(current_user.id, limit=current_app.config.get('SALON_PAGE_SIZE', 20))
     return render_template('artworks/salon_de_vote.html', 
-                           artistes_data=get_artistes_data(), 
-                           user_votes=get_user_votes(current_user),
-                           user_selections=get_user_selections())
+                           artistes_data=page['artistes_data'], 
+                           user_votes=page['user_votes'],
+                           user_selections=page['user_selections'],
+                           next_cursor=page['next_cursor'])
+
+@bp.route('/salon_de_vote/tally')
+@login_required
+def salon_de_vote_tally():
+    """Décompte des votes du salon au format JSON."""
+    if not current_user.is_admin and not current_user.is_membre:
+        return jsonify({'error': 'Accès non autorisé'}), 403
+    
+    return jsonify(tally_to_json(get_salon_tally(current_user.id)))
+
+@bp.route('/salon_de_vote/artists')
+@login_required
+def salon_de_vote_artists():
+    """
+    Page d'artistes du salon au format JSON, paginée par curseur.
+    
+    Paramètres : cursor (renvoyé par la page précédente), limit.
+    La réponse contient aussi le HTML des cartes pour le défilement infini.
+    """
+    if not current_user.is_admin and not current_user.is_membre:
+        return jsonify({'error': 'Accès non autorisé'}), 403
+    
+    page_size = current_app.config.get('SALON_PAGE_SIZE', 20)
+    limit = min(max(request.args.get('limit', page_size, type=int), 1), 100)
+    
+    try:
+        page = get_salon_page(current_user.id, cursor=request.args.get('cursor'), limit=limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    data = tally_to_json(page)
+    data['html'] = render_template('artworks/partials/_salon_artist_groups.html',
+                                   artistes_data=page['artistes_data'],
+                                   user_votes=page['user_votes'],
+                                   user_selections=page['user_selections'])
+    return jsonify(data)
 
 @bp.route('/validate_selections', methods=['POST'])
 @login_required
@@ -572,38 +486,29 @@ def validate_selections():
     # Log de débogage
     current_app.logger.info(f'Validating selections for user {current_user.id}')
 
-    # Récupérer toutes les œuvres
-    artworks = Artwork.query.all()
-    selected_artworks = []
-    refused_artworks = []
-
-    for artwork in artworks:
-        # Chercher les champs de sélection avec le bon préfixe
-        selection_status = request.form.get(f'selection_{artwork.id}')
-        
-        current_app.logger.info(f'Artwork {artwork.id} selection status: {selection_status}')
-        
-        if selection_status == 'selectionner':
-            artwork.statut = 'selectionne'
-            selected_artworks.append(artwork.id)
-        elif selection_status == 'refuser':
-            artwork.statut = 'refuse'
-            refused_artworks.append(artwork.id)
-        else:
-            artwork.statut = 'en_attente'
+    # Statuts demandés ; les œuvres absentes du formulaire repassent en attente
+    statuts = {}
+    for key, value in request.form.items():
+        if key.startswith('selection_') and value in SELECTION_ACTIONS:
+            try:
+                statuts[int(key[len('selection_'):])] = SELECTION_ACTIONS[value]
+            except ValueError:
+                current_app.logger.warning(f'Invalid selection field: {key}')
+    selected_artworks = sorted(artwork_id for artwork_id, statut in statuts.items() if statut == 'selectionne')
+    refused_artworks = sorted(artwork_id for artwork_id, statut in statuts.items() if statut == 'refuse')
 
     try:
-        db.session.commit()
-        current_app.logger.info('Selections validated successfully')
+        changes = apply_statuts(statuts, others='en_attente')
+        current_app.logger.info(f'Selections validated successfully: {len(changes)} artworks changed')
         
         return jsonify({
             'status': 'success',
             'action': 'selection',
             'selected_artworks': selected_artworks,
-            'refused_artworks': refused_artworks
+            'refused_artworks': refused_artworks,
+            'changed_artworks': sorted(changes)
         })
     except Exception as e:
-        db.session.rollback()
         current_app.logger.error(f'Error validating selections: {str(e)}')
         return jsonify({
             'status': 'error', 
@@ -612,23 +517,12 @@ def validate_selections():
 
 def get_artistes_data():
     """
-    Récupère les données des artistes avec leurs œuvres.
+    Récupère les données des artistes avec leurs œuvres et leurs votes.
     
     Returns:
         list: Liste des groupes d'artistes avec leurs œuvres
     """
-    artistes_data = []
-    artists = Artist.query.all()
-    
-    for artist in artists:
-        artworks = Artwork.query.filter_by(artist_id=artist.id).all()
-        artiste_groupe = {
-            'nom': artist.nom_artiste or f"{artist.prenom} {artist.nom}",
-            'artworks': artworks
-        }
-        artistes_data.append(artiste_groupe)
-    
-    return artistes_data
+    return get_salon_tally()['artistes_data']
 
 def get_user_votes(current_user):
     """
@@ -642,8 +536,8 @@ def get_user_votes(current_user):
     """
     user_votes = {}
     if current_user.is_authenticated:
-        existing_votes = Vote.query.filter_by(user_id=current_user.id).all()
-        user_votes = {str(vote.artwork_id): vote.vote_type for vote in existing_votes}
+        existing_votes = db.session.query(Vote.artwork_id, Vote.vote_type).filter_by(user_id=current_user.id)
+        user_votes = {str(artwork_id): vote_type for artwork_id, vote_type in existing_votes}
     
     return user_votes
 
@@ -654,13 +548,13 @@ def get_user_selections():
     Returns:
         dict: Dictionnaire des statuts des œuvres
     """
-    # Récupérer toutes les œuvres avec un statut spécifique
-    artworks = Artwork.query.filter(Artwork.statut.in_(['selectionne', 'refuse'])).all()
+    # Seuls l'ID et le statut sont nécessaires, pas les objets complets
+    artworks = db.session.query(Artwork.id, Artwork.statut).filter(Artwork.statut.in_(['selectionne', 'refuse']))
     
     # Créer un dictionnaire avec l'ID de l'œuvre et son statut
-    user_selections = {str(artwork.id): artwork.statut for artwork in artworks}
+    user_selections = {str(artwork_id): statut for artwork_id, statut in artworks}
     
-    current_app.logger.info(f"Sélections récupérées : {user_selections}")
+    current_app.logger.info(f"Sélections récupérées : {len(user_selections)}")
     
     return user_selections
 
@@ -676,39 +570,7 @@ def update_artwork_vote(artwork_id, vote_type, current_user):
             - 'pour', 'contre' (nouveau format)
         current_user: Utilisateur connecté
     """
-    # Convertir les anciens formats aux nouveaux
-    vote_mapping = {
-        'up': 'pour',
-        'down': 'contre'
-    }
-    
-    # Normaliser le type de vote
-    normalized_vote_type = vote_mapping.get(vote_type, vote_type)
-    
-    # Vérifier que le type de vote est valide
-    if normalized_vote_type not in ['pour', 'contre']:
-        current_app.logger.warning(f'Type de vote invalide : {vote_type}')
-        return
-    
-    existing_vote = Vote.query.filter_by(
-        artwork_id=artwork_id, 
-        user_id=current_user.id
-    ).first()
-    
-    if existing_vote:
-        current_app.logger.info(f'Mise à jour du vote pour l\'œuvre {artwork_id}')
-        existing_vote.vote_type = normalized_vote_type
-    else:
-        current_app.logger.info(f'Nouveau vote pour l\'œuvre {artwork_id}')
-        new_vote = Vote(
-            artwork_id=artwork_id, 
-            user_id=current_user.id, 
-            vote_type=normalized_vote_type
-        )
-        db.session.add(new_vote)
-    
-    # Commit les changements
-    db.session.commit()
+    record_ballot(current_user.id, {artwork_id: vote_type})
 
 def update_artwork_selections(selected_artworks, refused_artworks):
     """
@@ -717,18 +579,13 @@ def update_artwork_selections(selected_artworks, refused_artworks):
     Args:
         selected_artworks (list): Liste des IDs des œuvres sélectionnées
         refused_artworks (list): Liste des IDs des œuvres refusées
-    """
-    for artwork_id in selected_artworks:
-        artwork = Artwork.query.get(artwork_id)
-        if artwork:
-            artwork.statut = 'selectionne'
     
-    for artwork_id in refused_artworks:
-        artwork = Artwork.query.get(artwork_id)
-        if artwork:
-            artwork.statut = 'refuse'
-    
-    db.session.commit()
+    Returns:
+        dict: {artwork_id: statut} des œuvres dont le statut a changé
+    """
+    statuts = {artwork_id: 'selectionne' for artwork_id in selected_artworks}
+    statuts.update({artwork_id: 'refuse' for artwork_id in refused_artworks})
+    return apply_statuts(statuts)
 
 def resize_image_for_pdf(image_path, max_height_mm=20):
     """Redimensionne une image pour l'export PDF en préservant ses proportions."""
@@ -785,9 +642,23 @@ def add_logo_to_first_page(canvas, doc):
 @login_required
 def export_selected_artworks_pdf():
     """Exporter les œuvres sélectionnées en PDF."""
+    # Sélection figée du tour clôturé demandé (round_id), sinon sélection en cours
+    round_id = request.args.get('round_id', type=int)
+    voting_round = None
+    if round_id is not None:
+        voting_round = get_round(round_id)
+        if voting_round is None:
+            return jsonify({'error': 'Tour de vote introuvable'}), 404
     try:
+        if voting_round:
+            selected_ids = set(db.session.execute(selected_artwork_ids(voting_round.id)).scalars())
+            selected_filter = Artwork.id.in_(selected_artwork_ids(voting_round.id))
+        else:
+            selected_ids = None
+            selected_filter = Artwork.statut == 'selectionne'
+        
         # Récupérer les artistes avec leurs œuvres sélectionnées
-        artists = Artist.query.join(Artwork).filter(Artwork.statut == 'selectionne').order_by(Artist.nom).all()
+        artists = Artist.query.join(Artwork).filter(selected_filter).order_by(Artist.nom).all()
         
         # Préparer le buffer PDF
         buffer = io.BytesIO()
@@ -851,7 +722,10 @@ def export_selected_artworks_pdf():
             artist_elements.append(artist_paragraph)
             
             # Collecter les œuvres de l'artiste
-            artist_artworks = [artwork for artwork in artist.artworks if artwork.statut == 'selectionne']
+            artist_artworks = [
+                artwork for artwork in artist.artworks
+                if (artwork.id in selected_ids if selected_ids is not None else artwork.statut == 'selectionne')
+            ]
             
             # Calculer la hauteur totale nécessaire pour cet artiste
             total_artist_height = ARTIST_NAME_HEIGHT + (len(artist_artworks) * TABLE_HEIGHT)
@@ -1060,6 +934,11 @@ def generate_artwork_3d_cube(artwork_id):
             logger.warning(f"ID de l'artwork incorrect. Route: {artwork_id}, JSON: {json_artwork_id}")
             return jsonify({"error": f"ID de l'artwork incorrect. Attendu : {artwork_id}, Reçu : {json_artwork_id}"}), 400
 
+        # Format du cube : OBJ, ou GLB quantifié pour le visualiseur web
+        cube_format = (data.get('format') or 'obj').lower()
+        if cube_format not in CUBE_FORMATS:
+            return jsonify({"error": f"Format non supporté : {cube_format}"}), 400
+
         # Récupérer l'artwork
         artwork = Artwork.query.get_or_404(artwork_id)
         logger.debug("Oeuvre trouvee : %s", artwork.titre)
@@ -1125,19 +1004,20 @@ def generate_artwork_3d_cube(artwork_id):
             artwork_height_cm=artwork.dimension_hauteur or 10, 
             depth_cm=3,  # Profondeur fixée à 3 cm
             output_dir=output_dir,
-            custom_filename=f"{artist_name}_{artwork_title}"
+            custom_filename=f"{artist_name}_{artwork_title}",
+            file_format=cube_format
         )
         logger.debug("Cube 3D genere : %s", cube_result)
         
         # Mettre à jour l'artwork avec le chemin du cube 3D
-        artwork.cube_3d_path = cube_result['obj_path']
+        artwork.cube_3d_path = cube_result['mesh_path']
         db.session.commit()
         
         logger.info("Generation de cube 3D terminee avec succes")
         return jsonify({
             'success': True,
             'message': 'Cube 3D genere avec succes',
-            'cube_3d_path': cube_result['obj_path']
+            'cube_3d_path': cube_result['mesh_path']
         }), 200
     
     except Exception as e:
@@ -1235,6 +1115,15 @@ def print_all_cartels():
     
     return render_template('artworks/print_cartels.html', artists=artists_with_qr)
 
+@bp.route('/artwork/<int:artwork_id>/cube_3d')
+def artwork_cube_3d(artwork_id):
+    """Sert le cube 3D d'une œuvre (GLB quantifié pour le visualiseur web)."""
+    artwork = Artwork.query.get_or_404(artwork_id)
+    if not artwork.cube_3d_path or not os.path.exists(artwork.cube_3d_path):
+        return jsonify({'error': 'Aucun cube 3D pour cette œuvre'}), 404
+    mimetype = 'model/gltf-binary' if artwork.cube_3d_path.endswith('.glb') else 'text/plain'
+    return send_file(artwork.cube_3d_path, mimetype=mimetype, max_age=3600)
+
 @bp.route('/uploads/<path:filename>')
 def uploaded_file(filename):
     """Sert les fichiers uploadés."""
@@ -1,11 +1,16 @@
 """
 Routes pour le traitement des images et la génération de modèles 3D.
 """
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, send_file, url_for
 import os
+import uuid
 from werkzeug.utils import secure_filename
+from ..image_processing.validator import ImageValidator
 from ..image_processing.processor import ImageProcessor
-from ..image_processing.validator import ImageValidator, MeshValidator
+from ..image_processing.memory import estimate_peak_memory
+from ..image_processing.writers import MESH_FORMATS
+from ..services.processing_jobs import processing_jobs, JobQueueFull, JobTooLarge, JOB_DONE, JOB_FAILED
+from ..services.mesh_cache import mesh_cache
 
 bp = Blueprint('processing', __name__)
 
@@ -17,9 +22,30 @@ def allowed_file(filename):
 @bp.route('/process', methods=['POST'])
 def process_image():
     """
-    Traite une image pour créer un modèle 3D.
+    Enregistre le traitement d'une image en modèle 3D.
     
+    Le traitement s'exécute dans un pool de processus : la réponse (202)
+    contient l'identifiant du travail et les URL de statut et de résultat.
+    Si la même image a déjà été traitée avec les mêmes paramètres, le
+    maillage en cache est réutilisé et la réponse (200) désigne un travail
+    déjà terminé.
     L'image doit être envoyée dans un formulaire multipart avec le champ 'image'.
+    Champs facultatifs 'scale_factor' (hauteur du relief, 1 par défaut) et
+    'blur_sigma' (flou de la carte de profondeur, 2 par défaut).
+    Champs facultatifs pour un maillage simplifié : 'target_faces' (nombre
+    maximal de triangles) ou 'max_error' (erreur verticale tolérée, entre 0 et 1).
+    Champ facultatif 'format' : obj (par défaut), ply, stl ou glb ; avec
+    'quantize' (true/false), le GLB est quantifié pour le visualiseur web.
+    Avec 'solid' (true/false), le relief est fermé par des parois et un
+    socle d'épaisseur 'base_thickness' (facultatif) pour l'impression 3D.
+    L'image est transmise au traitement en mémoire ; elle n'est conservée
+    dans UPLOAD_FOLDER/input qu'avec 'keep_original' (true/false).
+    Avec 'progressive' (true/false), un aperçu grossier (GLB quantifié)
+    est calculé pendant la requête : la réponse contient son URL, à
+    afficher en attendant le résultat complet.
+    Le pic de mémoire du traitement est prévu d'après les dimensions de
+    l'image et les paramètres : un traitement qui dépasserait seul le
+    budget est refusé (413) ; sinon il attend que la mémoire se libère.
     """
     # Vérifier si un fichier a été envoyé
     if 'image' not in request.files:
@@ -29,45 +55,194 @@ def process_image():
     if file.filename == '':
         return jsonify({'error': 'Aucun fichier sélectionné'}), 400
         
+    mesh_format = request.form.get('format', 'obj').lower()
+    if mesh_format not in MESH_FORMATS:
+        return jsonify({'error': f"Format non supporté, formats acceptés : {', '.join(MESH_FORMATS)}"}), 400
+    quantize = request.form.get('quantize', 'false').lower() == 'true'
+    if quantize and mesh_format != 'glb':
+        return jsonify({'error': 'La quantification est réservée au format glb'}), 400
+        
     if file and allowed_file(file.filename):
-        # Sécuriser le nom du fichier
-        filename = secure_filename(file.filename)
+        scale_factor = request.form.get('scale_factor', 1.0, type=float)
+        blur_sigma = request.form.get('blur_sigma', 2.0, type=float)
+        if not 0 < scale_factor <= 100 or not 0 <= blur_sigma <= 100:
+            return jsonify({'error': 'Paramètres de relief invalides'}), 400
+        solid = request.form.get('solid', 'false').lower() == 'true'
+        base_thickness = request.form.get('base_thickness', type=float) if solid else None
+        if base_thickness is not None and not 0 < base_thickness <= 100:
+            return jsonify({'error': 'Épaisseur du socle invalide'}), 400
+        target_faces = request.form.get('target_faces', type=int)
+        max_error = request.form.get('max_error', type=float)
+        if (target_faces is not None and target_faces < 2) or (max_error is not None and max_error < 0):
+            return jsonify({'error': 'Paramètres de simplification invalides'}), 400
+        if quantize and target_faces is None and max_error is None:
+            target_faces = current_app.config['MESH_WEB_TARGET_FACES']
+        # Simplification, quantification et solide travaillent sur le maillage en mémoire
+        in_memory = target_faces is not None or max_error is not None or quantize or solid
+            
+        # Valider l'en-tête de l'image avant toute écriture (les grandes
+        # images ne sont acceptées qu'en flux) ; les pixels ne seront
+        # décodés qu'une fois, par le traitement
+        max_size = ImageValidator.MAX_SIZE if in_memory else ImageValidator.MAX_STREAMING_SIZE
+        is_valid, message, header = ImageValidator.validate_stream(file.stream, max_size=max_size)
+        if not is_valid:
+            return jsonify({'error': message}), 400
+            
+        # Le maillage complet d'une grande image est écrit par bandes plutôt
+        # que construit en mémoire
+        pixels = header['width'] * header['height']
+        streaming = not in_memory and pixels >= current_app.config['MESH_STREAMING_MIN_PIXELS']
+        options = {
+            'scale_factor': scale_factor,
+            'blur_sigma': blur_sigma,
+            'max_error': max_error,
+            'target_faces': target_faces,
+            'streaming': streaming,
+            'tile_rows': current_app.config['MESH_TILE_ROWS'],
+            'file_format': mesh_format,
+            'quantize': quantize,
+            'solid': solid,
+            'base_thickness': base_thickness,
+            'depth_backend': current_app.config['DEPTH_BACKEND']
+        }
         
-        # Créer les chemins pour les fichiers
-        input_path = os.path.join(current_app.config['UPLOAD_FOLDER'], 'input', filename)
-        output_filename = os.path.splitext(filename)[0] + '.obj'
-        output_path = os.path.join(current_app.config['UPLOAD_FOLDER'], 'output', output_filename)
+        job_id = uuid.uuid4().hex
+        filename = secure_filename(file.filename)
+        download_name = os.path.splitext(filename)[0] + '.' + mesh_format
         
-        # Créer les dossiers si nécessaire
-        os.makedirs(os.path.dirname(input_path), exist_ok=True)
+        # Maillage déjà produit pour la même image et les mêmes paramètres
+        cache_key = mesh_cache.key(file.stream, options)
+        output_path = mesh_cache.get(cache_key, mesh_format)
+        if output_path is not None:
+            job = processing_jobs.completed(output_path, job_id=job_id, download_name=download_name)
+            return jsonify({
+                'message': 'Modèle déjà généré',
+                'cached': True,
+                'job_id': job.id,
+                'status_url': url_for('processing.job_status', job_id=job.id),
+                'result_url': url_for('processing.job_result', job_id=job.id)
+            }), 200
+        output_path = mesh_cache.path(cache_key, mesh_format)
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
-        # Sauvegarder l'image
-        file.save(input_path)
+        # Les octets de l'image sont décodés par le processus de traitement,
+        # sans fichier intermédiaire
+        image_data = file.read()
         
-        # Valider l'image
-        is_valid, message = ImageValidator.validate_image(input_path)
-        if not is_valid:
-            os.remove(input_path)
-            return jsonify({'error': message}), 400
-            
+        memory_estimate = estimate_peak_memory(header['width'], header['height'], options)
         try:
-            # Traiter l'image
-            processor = ImageProcessor(input_path)
-            processor.process_image_to_3d(output_path)
-            
-            # Valider le maillage généré
-            is_valid, message = MeshValidator.validate_mesh(output_path)
-            if not is_valid:
-                os.remove(output_path)
-                return jsonify({'error': message}), 400
-                
+            # Refuser avant de calculer l'aperçu
+            processing_jobs.check_memory(memory_estimate)
+            preview_path = None
+            if request.form.get('progressive', 'false').lower() == 'true':
+                preview_path = make_preview(image_data, file.stream, options)
+            job = processing_jobs.submit(
+                image_data, output_path, options, job_id=job_id, download_name=download_name,
+                on_success=lambda done: mesh_cache.add(done.output_path), preview_path=preview_path,
+                memory_estimate=memory_estimate
+            )
+        except JobTooLarge as e:
+            current_app.logger.warning(f"Traitement refusé : {e}")
             return jsonify({
-                'message': 'Traitement réussi',
-                'output_file': output_filename
-            }), 200
+                'error': "Image trop grande pour ces paramètres : réduisez-la, "
+                         "ou demandez un maillage simplifié (target_faces)"
+            }), 413
+        except JobQueueFull as e:
+            current_app.logger.warning(f"Traitement refusé : {e}")
+            response = jsonify({'error': 'Trop de traitements en cours, réessayez plus tard'})
+            response.headers['Retry-After'] = '30'
+            return response, 503
+        if request.form.get('keep_original', 'false').lower() == 'true':
+            # Image d'origine conservée à la demande, préfixée par
+            # l'identifiant du travail pour que deux envois ne s'écrasent pas
+            input_path = os.path.join(current_app.config['UPLOAD_FOLDER'], 'input', f"{job_id}_{filename}")
+            os.makedirs(os.path.dirname(input_path), exist_ok=True)
+            with open(input_path, 'wb') as f:
+                f.write(image_data)
             
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
+        response = {
+            'message': 'Traitement enregistré',
+            'cached': False,
+            'job_id': job.id,
+            'status_url': url_for('processing.job_status', job_id=job.id),
+            'result_url': url_for('processing.job_result', job_id=job.id)
+        }
+        if job.preview_path is not None:
+            response['preview_url'] = url_for('processing.job_preview', job_id=job.id)
+        return jsonify(response), 202
             
     return jsonify({'error': 'Type de fichier non autorisé'}), 400
+
+def make_preview(image_data, stream, options):
+    """
+    Calcule (ou retrouve en cache) l'aperçu d'un traitement.
+    
+    Args:
+        image_data (bytes): Image encodée
+        stream: Flux de l'image envoyée (clé de cache)
+        options (dict): Paramètres du traitement complet
+        
+    Returns:
+        str: Chemin du GLB d'aperçu
+    """
+    preview_options = {
+        'preview': True,
+        'scale_factor': options['scale_factor'],
+        'blur_sigma': options['blur_sigma'],
+        'depth_backend': options['depth_backend']
+    }
+    preview_key = mesh_cache.key(stream, preview_options)
+    preview_path = mesh_cache.get(preview_key, 'glb')
+    if preview_path is None:
+        preview_path = mesh_cache.path(preview_key, 'glb')
+        ImageProcessor(image_data).create_preview(
+            preview_path, options['scale_factor'], options['blur_sigma'], depth_backend=options['depth_backend']
+        )
+        mesh_cache.add(preview_path)
+    return preview_path
+
+@bp.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """État d'un travail : statut, étape en cours et progression."""
+    job = processing_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Travail inconnu'}), 404
+    status = job.to_dict()
+    if job.preview_path is not None:
+        status['preview_url'] = url_for('processing.job_preview', job_id=job.id)
+    return jsonify(status), 200
+
+@bp.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    """Fichier produit par un travail terminé."""
+    job = processing_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Travail inconnu'}), 404
+    if job.status == JOB_FAILED:
+        return jsonify(job.to_dict()), 500
+    if job.status != JOB_DONE:
+        return jsonify(job.to_dict()), 409
+    if not os.path.exists(job.output_path):
+        # Maillage retiré du cache depuis la fin du travail
+        return jsonify({'error': 'Résultat expiré, relancez le traitement'}), 410
+    return send_file(job.output_path, as_attachment=True, download_name=job.download_name)
+
+@bp.route('/jobs/<job_id>/preview', methods=['GET'])
+def job_preview(job_id):
+    """Aperçu d'un travail progressif (GLB quantifié), disponible dès l'envoi."""
+    job = processing_jobs.get(job_id)
+    if job is None or job.preview_path is None:
+        return jsonify({'error': 'Aperçu inconnu'}), 404
+    if not os.path.exists(job.preview_path):
+        return jsonify({'error': 'Aperçu expiré'}), 410
+    return send_file(job.preview_path, mimetype='model/gltf-binary')
+
+@bp.route('/cache', methods=['GET'])
+def cache_stats():
+    """Compteurs du cache des maillages (succès, échecs, taille)."""
+    return jsonify(mesh_cache.stats()), 200
+
+@bp.route('/memory', methods=['GET'])
+def memory_stats():
+    """Budget mémoire des traitements, réservations et précision du modèle de mémoire."""
+    return jsonify(processing_jobs.memory_report()), 200
@@ -0,0 +1,188 @@
+"""
+Cache des maillages générés, adressé par contenu.
+
+La clé d'un maillage est l'empreinte SHA-256 de l'image envoyée et des
+paramètres de traitement qui influent sur le résultat : renvoyer la même
+image avec les mêmes paramètres réutilise le fichier déjà produit. Les
+fichiers sont nommés d'après leur clé dans le dossier de sortie, dont la
+taille totale est bornée : au-delà du quota, les maillages utilisés le
+moins récemment sont supprimés (LRU, date de modification des fichiers
+rafraîchie à chaque utilisation pour que l'ordre survive aux redémarrages).
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from app.image_processing.writers import MESH_FORMATS
+
+logger = logging.getLogger(__name__)
+
+# À incrémenter quand le pipeline change le contenu des fichiers produits
+CACHE_VERSION = 2
+
+# Paramètres sans effet sur le fichier produit (le flux écrit le même maillage)
+IGNORED_OPTIONS = ('streaming', 'tile_rows')
+
+_CACHE_FILE = re.compile(r'^[0-9a-f]{64}\.(%s)$' % '|'.join(MESH_FORMATS))
+
+
+def file_digest(source, chunk_size=1 << 20):
+    """
+    Empreinte SHA-256 d'un fichier, lu par blocs.
+
+    Args:
+        source: Chemin du fichier, ou flux binaire positionnable (ramené
+            ensuite à sa position de départ)
+
+    Returns:
+        str: Empreinte hexadécimale
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return file_digest(f, chunk_size)
+    position = source.tell()
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: source.read(chunk_size), b''):
+        digest.update(chunk)
+    source.seek(position)
+    return digest.hexdigest()
+
+
+class MeshCache:
+    """Index LRU des maillages du dossier de sortie."""
+
+    def __init__(self, directory=None, max_bytes=2 * 1024 ** 3):
+        """
+        Args:
+            directory (str): Dossier des maillages
+            max_bytes (int): Taille totale maximale des maillages (octets)
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = None  # nom de fichier -> taille, du moins au plus récent
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Lit la configuration de l'application."""
+        self.directory = os.path.join(app.config['UPLOAD_FOLDER'], 'output')
+        self.max_bytes = app.config.get('MESH_CACHE_MAX_BYTES', self.max_bytes)
+        self._entries = None
+
+    def key(self, image, options):
+        """
+        Clé de cache d'un traitement.
+
+        Args:
+            image: Chemin ou flux binaire de l'image envoyée
+            options (dict): Paramètres de ImageProcessor.process_image_to_3d
+
+        Returns:
+            str: Empreinte hexadécimale
+        """
+        params = {name: value for name, value in options.items() if name not in IGNORED_OPTIONS}
+        digest = hashlib.sha256(file_digest(image).encode('ascii'))
+        digest.update(json.dumps([CACHE_VERSION, params], sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def path(self, key, file_format):
+        """Chemin du maillage correspondant à une clé."""
+        return os.path.join(self.directory, f"{key}.{file_format}")
+
+    def _load(self):
+        """Reconstruit l'index depuis le dossier au premier accès."""
+        if self._entries is not None:
+            return
+        files = []
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and _CACHE_FILE.match(entry.name):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, entry.name, stat.st_size))
+        files.sort()
+        self._entries = OrderedDict((name, size) for _, name, size in files)
+        self._size = sum(self._entries.values())
+        logger.info(f"Cache des maillages : {len(self._entries)} fichiers, {self._size} octets")
+
+    def get(self, key, file_format):
+        """
+        Cherche un maillage déjà produit.
+
+        Args:
+            key (str): Clé de cache
+            file_format (str): Format du maillage
+
+        Returns:
+            str: Chemin du maillage, ou None s'il n'est pas en cache
+        """
+        name = f"{key}.{file_format}"
+        with self._lock:
+            self._load()
+            if name in self._entries:
+                path = os.path.join(self.directory, name)
+                try:
+                    os.utime(path)
+                except FileNotFoundError:
+                    # Supprimé hors du cache
+                    self._size -= self._entries.pop(name)
+                else:
+                    self._entries.move_to_end(name)
+                    self.hits += 1
+                    return path
+            self.misses += 1
+            return None
+
+    def add(self, path):
+        """
+        Enregistre un maillage produit, puis applique le quota.
+
+        Args:
+            path (str): Chemin du maillage (obtenu par path())
+        """
+        name = os.path.basename(path)
+        size = os.path.getsize(path)
+        with self._lock:
+            self._load()
+            self._size += size - self._entries.pop(name, 0)
+            self._entries[name] = size
+            self._evict(keep=name)
+
+    def _evict(self, keep):
+        """Supprime les maillages les moins récents au-delà du quota."""
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            name, size = next(iter(self._entries.items()))
+            if name == keep:
+                break
+            del self._entries[name]
+            self._size -= size
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            logger.info(f"Cache des maillages : {name} supprimé ({size} octets)")
+
+    def stats(self):
+        """Compteurs du cache, pour la supervision."""
+        with self._lock:
+            self._load()
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else None,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'size_bytes': self._size,
+                'max_bytes': self.max_bytes
+            }
+
+
+mesh_cache = MeshCache()
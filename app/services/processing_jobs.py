@@ -0,0 +1,449 @@
+"""
+Traitement asynchrone des images en modèles 3D.
+
+La route /processing/process enregistre un travail et répond aussitôt ;
+un pool de processus (ProcessPoolExecutor) exécute ImageProcessor hors du
+worker HTTP. Chaque processus du pool reçoit à son démarrage une file
+multiprocessing sur laquelle il publie l'étape en cours de ses travaux ;
+un thread du processus web la lit et met à jour l'état des travaux,
+consulté par les routes de statut et de résultat.
+
+Chaque travail réserve, avant de démarrer, le pic de mémoire prévu par
+app.image_processing.memory : un travail ne démarre que si la somme des
+réservations reste dans le budget (PROCESSING_MEMORY_BUDGET), sinon il
+attend dans une file ; un travail qui dépasserait seul le budget est
+refusé. Le processus du pool mesure le pic de chaque étape, et les
+rapports mesure/estimation sont agrégés par mode pour réajuster le modèle.
+
+L'état des travaux est propre au processus web : avec plusieurs workers,
+le statut d'un travail doit être demandé au worker qui l'a reçu.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.image_processing.depth_store import DepthMapStore
+from app.image_processing.memory import MemoryProbe, memory_mode
+from app.image_processing.processor import ImageProcessor
+
+logger = logging.getLogger(__name__)
+
+JOB_PENDING = 'en_attente'
+JOB_RUNNING = 'en_cours'
+JOB_DONE = 'termine'
+JOB_FAILED = 'echec'
+
+
+class JobQueueFull(Exception):
+    """Trop de travaux en attente."""
+
+
+class JobTooLarge(Exception):
+    """Mémoire prévue du travail supérieure au budget."""
+
+
+class ProcessingJob:
+    """État d'un travail de traitement."""
+
+    def __init__(self, job_id, output_path, download_name=None, preview_path=None, memory_estimate=0):
+        self.id = job_id
+        self.output_path = output_path
+        self.download_name = download_name or os.path.basename(output_path)
+        self.preview_path = preview_path
+        self.status = JOB_PENDING
+        self.stage = None
+        self.progress = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.memory_estimate = memory_estimate
+        self.mode = None
+        # Pic de mémoire mesuré par étape (octets)
+        self.memory = None
+
+    @property
+    def finished(self):
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+    def to_dict(self):
+        """Représentation JSON du travail."""
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'stage': self.stage,
+            'progress': self.progress,
+            'error': self.error,
+            'output_file': self.download_name,
+            'preview': self.preview_path is not None,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+            'memory_estimate': self.memory_estimate,
+            'memory_peak': max(self.memory.values(), default=0) if self.memory is not None else None,
+            'memory_stages': self.memory
+        }
+
+
+# File de progression, côté processus du pool
+_progress_queue = None
+
+
+def _init_worker(progress_queue):
+    """Initialise un processus du pool."""
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def _report(job_id, stage, fraction=None):
+    _progress_queue.put((job_id, stage, fraction))
+
+
+def run_job(job_id, image, output_path, options, validate, depth_store=None):
+    """
+    Exécute un travail dans un processus du pool.
+
+    Le maillage est validé en mémoire avant l'écriture, puis écrit dans
+    un fichier temporaire renommé une fois complet. Le pic de mémoire de
+    chaque étape est mesuré.
+
+    Args:
+        job_id (str): Identifiant du travail
+        image: Image à traiter, chemin ou octets encodés
+        output_path (str): Fichier de sortie
+        options (dict): Paramètres de ImageProcessor.process_image_to_3d
+        validate (bool): Valider le maillage avant de l'écrire
+        depth_store (DepthMapStore): Cartes de profondeur partagées entre
+            les processus du pool
+
+    Returns:
+        dict: Chemin du fichier produit ('output_path') et pic de mémoire
+            par étape, en octets ('memory')
+    """
+    root, extension = os.path.splitext(output_path)
+    partial_path = f"{root}.{os.getpid()}.partiel{extension}"
+    probe = MemoryProbe()
+
+    def progress(stage, fraction=None):
+        probe.stage(stage)
+        _report(job_id, stage, fraction)
+
+    try:
+        processor = ImageProcessor(image)
+        processor.process_image_to_3d(
+            partial_path,
+            progress=progress,
+            validate=validate,
+            depth_store=depth_store,
+            **options
+        )
+        os.replace(partial_path, output_path)
+    finally:
+        memory = probe.close()
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    return {'output_path': output_path, 'memory': memory}
+
+
+class ProcessingJobManager:
+    """Pool de processus et suivi des travaux de traitement."""
+
+    def __init__(self, max_workers=2, queue_size=8, job_ttl=3600, memory_budget=None):
+        """
+        Args:
+            max_workers (int): Nombre de processus de traitement
+            queue_size (int): Nombre maximal de travaux en attente
+            job_ttl (float): Durée de conservation des travaux terminés (s)
+            memory_budget (int): Mémoire réservable par les travaux en cours
+                (octets ; None pour ne pas limiter)
+        """
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.job_ttl = job_ttl
+        self.memory_budget = memory_budget
+        self._jobs = {}
+        # Travaux en attente d'un processus ou de mémoire : (travail, arguments, on_success)
+        self._pending = deque()
+        self._running = 0
+        self._reserved = 0
+        # Rapports mesure/estimation par mode : [nombre, somme, minimum, maximum]
+        self._memory_ratios = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._progress_queue = None
+        self._listener = None
+        self.depth_store = None
+
+    def init_app(self, app):
+        """Lit la configuration de l'application."""
+        self.max_workers = app.config.get('PROCESSING_MAX_WORKERS', self.max_workers)
+        self.queue_size = app.config.get('PROCESSING_QUEUE_SIZE', self.queue_size)
+        self.job_ttl = app.config.get('PROCESSING_JOB_TTL', self.job_ttl)
+        self.memory_budget = app.config.get('PROCESSING_MEMORY_BUDGET', self.memory_budget)
+        if app.config.get('DEPTH_STORE_FOLDER'):
+            self.depth_store = DepthMapStore(app.config['DEPTH_STORE_FOLDER'], app.config['DEPTH_STORE_MAX_BYTES'])
+
+    def _ensure_pool(self):
+        """Démarre le pool et le thread de progression au premier travail."""
+        if self._executor is not None:
+            return
+        # spawn : le processus web a déjà des threads (SSE, journal des votes)
+        context = multiprocessing.get_context('spawn')
+        if self._progress_queue is None:
+            self._progress_queue = context.Queue()
+            self._listener = threading.Thread(target=self._listen, name='processing-progress', daemon=True)
+            self._listener.start()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self._progress_queue,)
+        )
+
+    def submit(self, image, output_path, options=None, validate=True, job_id=None, download_name=None,
+               on_success=None, preview_path=None, memory_estimate=None):
+        """
+        Enregistre un travail.
+
+        Si un travail actif produit déjà output_path, c'est lui qui est
+        renvoyé : deux envois identiques ne sont traités qu'une fois. Le
+        travail démarre dès qu'un processus est libre et que sa mémoire
+        prévue tient dans le budget, dans l'ordre des envois.
+
+        Args:
+            image: Image à traiter : chemin, ou octets encodés (transmis au
+                processus du pool sans passer par le disque)
+            output_path (str): Fichier de sortie
+            options (dict): Paramètres de ImageProcessor.process_image_to_3d
+            validate (bool): Valider le maillage avant de l'écrire
+            job_id (str): Identifiant du travail (généré si None)
+            download_name (str): Nom du fichier proposé au téléchargement
+            on_success (callable): Appelée avec le travail une fois terminé
+            preview_path (str): Aperçu déjà produit, servi en attendant le résultat
+            memory_estimate (int): Pic de mémoire prévu (octets, voir
+                memory.estimate_peak_memory) ; rien n'est réservé si None
+
+        Returns:
+            ProcessingJob: Travail en attente ou en cours
+
+        Raises:
+            JobQueueFull: Si tous les processus sont occupés et la file pleine
+            JobTooLarge: Si la mémoire prévue dépasse le budget
+        """
+        with self._lock:
+            self._purge()
+            for job in self._jobs.values():
+                if not job.finished and job.output_path == output_path:
+                    job.preview_path = job.preview_path or preview_path
+                    return job
+            active = sum(1 for job in self._jobs.values() if not job.finished)
+            if active >= self.max_workers + self.queue_size:
+                raise JobQueueFull(f"{active} travaux en cours ou en attente")
+            memory_estimate = memory_estimate or 0
+            self.check_memory(memory_estimate)
+
+            options = options or {}
+            job = ProcessingJob(job_id or uuid.uuid4().hex, output_path, download_name, preview_path,
+                                memory_estimate)
+            job.mode = memory_mode(options)
+            self._jobs[job.id] = job
+            self._pending.append((job, (job.id, image, output_path, options, validate, self.depth_store), on_success))
+            started = self._dispatch()
+
+        self._watch(started)
+        logger.info(
+            f"Travail {job.id} enregistré ({active + 1} actifs, "
+            f"{memory_estimate / 2**20:.0f} Mo prévus, {self._reserved / 2**20:.0f} Mo réservés)"
+        )
+        return job
+
+    def check_memory(self, memory_estimate):
+        """
+        Vérifie qu'un travail tient dans le budget mémoire.
+
+        Args:
+            memory_estimate (int): Pic de mémoire prévu (octets)
+
+        Raises:
+            JobTooLarge: Si la mémoire prévue dépasse le budget
+        """
+        if self.memory_budget and memory_estimate > self.memory_budget:
+            raise JobTooLarge(
+                f"Mémoire prévue {memory_estimate / 2**20:.0f} Mo, budget {self.memory_budget / 2**20:.0f} Mo"
+            )
+
+    def _dispatch(self):
+        """
+        Démarre les travaux en attente, dans l'ordre, tant qu'un processus
+        est libre et que leur mémoire tient dans le budget. À appeler avec
+        le verrou.
+
+        Returns:
+            list: (travail, future, on_success, pool) des travaux démarrés
+        """
+        started = []
+        while self._pending and self._running < self.max_workers:
+            job, arguments, on_success = self._pending[0]
+            # Sans travail en cours, le premier démarre : il tient seul dans le budget
+            if self.memory_budget and self._running and self._reserved + job.memory_estimate > self.memory_budget:
+                break
+            self._pending.popleft()
+            self._ensure_pool()
+            try:
+                future = self._executor.submit(run_job, *arguments)
+            except BrokenProcessPool:
+                self._executor = None
+                self._ensure_pool()
+                future = self._executor.submit(run_job, *arguments)
+            self._running += 1
+            self._reserved += job.memory_estimate
+            started.append((job, future, on_success, self._executor))
+        return started
+
+    def _watch(self, started):
+        """Enregistre la fin des travaux démarrés (hors verrou : le rappel peut être immédiat)."""
+        for job, future, on_success, executor in started:
+            future.add_done_callback(
+                lambda done, job=job, on_success=on_success, executor=executor:
+                    self._finish(job, done, on_success, executor)
+            )
+
+    def completed(self, output_path, job_id=None, download_name=None):
+        """
+        Enregistre comme terminé un travail dont le résultat existe déjà.
+
+        Args:
+            output_path (str): Fichier déjà produit
+            job_id (str): Identifiant du travail (généré si None)
+            download_name (str): Nom du fichier proposé au téléchargement
+
+        Returns:
+            ProcessingJob: Travail terminé
+        """
+        job = ProcessingJob(job_id or uuid.uuid4().hex, output_path, download_name)
+        job.status = JOB_DONE
+        job.progress = 1.0
+        job.finished_at = job.created_at
+        with self._lock:
+            self._purge()
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id):
+        """Renvoie un travail, ou None s'il est inconnu ou expiré."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _purge(self):
+        """Oublie les travaux terminés depuis plus de job_ttl secondes."""
+        limit = time.time() - self.job_ttl
+        for job_id in [job.id for job in self._jobs.values() if job.finished and job.finished_at < limit]:
+            del self._jobs[job_id]
+
+    def _listen(self):
+        """Applique les messages de progression publiés par le pool."""
+        while True:
+            job_id, stage, fraction = self._progress_queue.get()
+            with self._lock:
+                job = self._jobs.get(job_id)
+                # Un message peut arriver après la fin du travail
+                if job is None or job.finished:
+                    continue
+                job.status = JOB_RUNNING
+                job.stage = stage
+                job.progress = fraction
+
+    def memory_report(self):
+        """
+        Budget, réservations et précision du modèle de mémoire.
+
+        Returns:
+            dict: Budget et mémoire réservée (octets), travaux en cours et
+                en attente, et par mode le rapport pic mesuré / pic prévu
+                des travaux terminés (moyen, minimal, maximal)
+        """
+        with self._lock:
+            return {
+                'budget': self.memory_budget,
+                'reserved': self._reserved,
+                'running': self._running,
+                'pending': len(self._pending),
+                'modes': {
+                    mode: {
+                        'jobs': count,
+                        'ratio_mean': round(total / count, 3),
+                        'ratio_min': round(low, 3),
+                        'ratio_max': round(high, 3)
+                    }
+                    for mode, (count, total, low, high) in self._memory_ratios.items()
+                }
+            }
+
+    def _record_memory(self, job, memory):
+        """Enregistre le pic mesuré d'un travail et son rapport à l'estimation."""
+        job.memory = memory
+        peak = max(memory.values(), default=0)
+        if not job.memory_estimate or not peak:
+            return
+        ratio = peak / job.memory_estimate
+        count, total, low, high = self._memory_ratios.get(job.mode, (0, 0.0, ratio, ratio))
+        self._memory_ratios[job.mode] = [count + 1, total + ratio, min(low, ratio), max(high, ratio)]
+        if ratio > 1:
+            logger.warning(
+                f"Travail {job.id} ({job.mode}) : pic mémoire {peak / 2**20:.0f} Mo, "
+                f"au-delà des {job.memory_estimate / 2**20:.0f} Mo prévus"
+            )
+
+    def _finish(self, job, future, on_success=None, executor=None):
+        """Enregistre le résultat d'un travail et démarre les suivants."""
+        error = future.exception()
+        if error is None and on_success is not None:
+            try:
+                on_success(job)
+            except Exception as e:
+                logger.exception(f"Travail {job.id} : échec du traitement final")
+                error = e
+        with self._lock:
+            job.finished_at = time.time()
+            self._running -= 1
+            self._reserved -= job.memory_estimate
+            if future.exception() is None:
+                self._record_memory(job, future.result()['memory'])
+            if error is None:
+                job.status = JOB_DONE
+                job.progress = 1.0
+            else:
+                job.status = JOB_FAILED
+                job.error = str(error) or error.__class__.__name__
+                if isinstance(error, BrokenProcessPool) and self._executor is executor:
+                    # Un processus a été tué (mémoire…) : le pool est recréé au prochain travail
+                    self._executor = None
+            started = self._dispatch()
+        self._watch(started)
+        if error is None:
+            peak = max(job.memory.values(), default=0)
+            logger.info(
+                f"Travail {job.id} terminé en {job.finished_at - job.created_at:.1f} s, "
+                f"pic mémoire {peak / 2**20:.0f} Mo ({job.memory_estimate / 2**20:.0f} Mo prévus)"
+            )
+        else:
+            logger.error(f"Travail {job.id} en échec : {job.error}")
+
+    def shutdown(self):
+        """Arrête le pool après les travaux en cours ; les travaux en attente échouent."""
+        with self._lock:
+            while self._pending:
+                job = self._pending.popleft()[0]
+                job.status = JOB_FAILED
+                job.error = "Service arrêté"
+                job.finished_at = time.time()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+processing_jobs = ProcessingJobManager()
@@ -0,0 +1,373 @@
+"""
+Classement des œuvres par consensus du jury.
+
+Les votes sont chargés dans une matrice NumPy jurés × œuvres (+1 pour,
+-1 contre, 0 sans vote) ; tous les indicateurs sont ensuite calculés de
+façon vectorisée, sans boucle Python sur les œuvres ni sur les jurés :
+
+- borne inférieure de Wilson de la proportion de votes « pour », qui
+  pénalise les œuvres ayant reçu peu de votes ;
+- approbation bayésienne, moyenne des votes ramenée vers le taux
+  d'approbation global du salon ;
+- accord de chaque juré avec le consensus des autres jurés ;
+- rang global et rang par catégorie d'artiste.
+
+Le classement permet de proposer une sélection au format attendu par la
+route validate_selections.
+"""
+import logging
+import numpy as np
+from sqlalchemy import String, cast, func, select
+from app.models.models import db, Artwork, Artist, Vote, RoundArtworkResult, RoundVote, VOTE_TYPE_ALIASES
+from app.services.vote_tally import SALON_STATUTS
+
+logger = logging.getLogger(__name__)
+
+# Quantile de la loi normale pour un intervalle de confiance à 95 %
+WILSON_Z = 1.96
+
+# Score de Wilson minimal d'une œuvre proposée à la sélection
+SELECTION_MIN_SCORE = 0.5
+
+
+def _build_matrix(artworks, vote_rows):
+    """
+    Construit la matrice jurés × œuvres.
+
+    Args:
+        artworks (list): Lignes (artwork_id, categorie) triées par ID
+        vote_rows (list): Lignes (user_id, vote, artwork_ids) où vote vaut
+            +1 ou -1 et artwork_ids est une liste d'IDs séparés par des virgules
+
+    Returns:
+        dict: matrix, juror_ids, artwork_ids, categories
+    """
+    artwork_ids = np.fromiter((row[0] for row in artworks), dtype=np.int64, count=len(artworks))
+    categories = np.array([row[1] or '' for row in artworks], dtype=object)
+
+    juror_ids = np.unique(np.fromiter((row[0] for row in vote_rows), dtype=np.int64, count=len(vote_rows)))
+    matrix = np.zeros((len(juror_ids), len(artwork_ids)), dtype=np.int8)
+    for user_id, vote, voted_ids in vote_rows:
+        voted_ids = np.array(voted_ids.split(','), dtype=np.int64)
+        juror = np.searchsorted(juror_ids, user_id)
+        matrix[juror, np.searchsorted(artwork_ids, voted_ids)] = vote
+
+    return {
+        'matrix': matrix,
+        'juror_ids': juror_ids,
+        'artwork_ids': artwork_ids,
+        'categories': categories
+    }
+
+
+def load_vote_matrix(statuts=SALON_STATUTS):
+    """
+    Charge les votes dans une matrice jurés × œuvres.
+
+    Les œuvres sans vote sont incluses (colonne de zéros) afin d'être
+    classées elles aussi.
+
+    Args:
+        statuts (tuple): Statuts des œuvres à classer
+
+    Returns:
+        dict: matrix (int8, jurés × œuvres), juror_ids, artwork_ids,
+            categories (catégorie de l'artiste de chaque œuvre)
+    """
+    artworks = db.session.execute(
+        select(Artwork.id, Artist.categorie)
+        .join(Artist, Artist.id == Artwork.artist_id)
+        .where(Artwork.statut.in_(statuts))
+        .order_by(Artwork.id)
+    ).all()
+
+    # Une ligne par (juré, type de vote) avec la liste des œuvres concernées :
+    # quelques centaines de lignes au lieu d'une ligne Python par vote
+    rows = db.session.execute(
+        select(
+            Vote.user_id,
+            Vote.vote_type,
+            func.aggregate_strings(cast(Vote.artwork_id, String), ',')
+        )
+        .join(Artwork, Artwork.id == Vote.artwork_id)
+        .where(Artwork.statut.in_(statuts))
+        .group_by(Vote.user_id, Vote.vote_type)
+    ).all()
+    vote_rows = [
+        (user_id, 1 if VOTE_TYPE_ALIASES.get(vote_type, vote_type) == 'pour' else -1, voted_ids)
+        for user_id, vote_type, voted_ids in rows
+    ]
+
+    return _build_matrix(artworks, vote_rows)
+
+
+def load_round_vote_matrix(round_id):
+    """
+    Charge la matrice de votes figée d'un tour clôturé.
+
+    Args:
+        round_id (int): ID du tour
+
+    Returns:
+        dict: Voir load_vote_matrix
+    """
+    artworks = db.session.execute(
+        select(RoundArtworkResult.artwork_id, RoundArtworkResult.categorie)
+        .where(RoundArtworkResult.round_id == round_id)
+        .order_by(RoundArtworkResult.artwork_id)
+    ).all()
+    vote_rows = db.session.execute(
+        select(
+            RoundVote.user_id,
+            RoundVote.vote,
+            func.aggregate_strings(cast(RoundVote.artwork_id, String), ',')
+        )
+        .where(RoundVote.round_id == round_id)
+        .group_by(RoundVote.user_id, RoundVote.vote)
+    ).all()
+
+    return _build_matrix(artworks, vote_rows)
+
+
+def wilson_lower_bound(up_votes, total_votes, z=WILSON_Z):
+    """
+    Borne inférieure de l'intervalle de Wilson de la proportion de « pour ».
+
+    Args:
+        up_votes (ndarray): Votes pour par œuvre
+        total_votes (ndarray): Votes exprimés par œuvre
+        z (float): Quantile de la loi normale
+
+    Returns:
+        ndarray: Score dans [0, 1], 0 pour les œuvres sans vote
+    """
+    n = total_votes.astype(np.float64)
+    voted = n > 0
+    n_safe = np.where(voted, n, 1.0)
+    p = up_votes / n_safe
+    z2 = z * z
+    score = (
+        p + z2 / (2 * n_safe)
+        - z * np.sqrt((p * (1 - p) + z2 / (4 * n_safe)) / n_safe)
+    ) / (1 + z2 / n_safe)
+    return np.where(voted, score, 0.0)
+
+
+def bayesian_approval(up_votes, total_votes, prior_weight=None):
+    """
+    Taux d'approbation ramené vers la moyenne globale du salon.
+
+    Args:
+        up_votes (ndarray): Votes pour par œuvre
+        total_votes (ndarray): Votes exprimés par œuvre
+        prior_weight (float): Poids de l'a priori en nombre de votes
+            (par défaut le nombre moyen de votes par œuvre)
+
+    Returns:
+        ndarray: Taux d'approbation dans [0, 1]
+    """
+    total = total_votes.sum()
+    prior = up_votes.sum() / total if total else 0.5
+    if prior_weight is None:
+        prior_weight = total_votes.mean() if len(total_votes) else 0.0
+    prior_weight = max(prior_weight, 1.0)
+    return (prior_weight * prior + up_votes) / (prior_weight + total_votes)
+
+
+def juror_agreement(matrix, up_votes, down_votes):
+    """
+    Accord de chaque juré avec le consensus des autres jurés.
+
+    Le consensus d'une œuvre est le signe de (pour - contre) calculé sans
+    le vote du juré lui-même ; les œuvres sans consensus (égalité) ne
+    comptent pas.
+
+    Args:
+        matrix (ndarray): Matrice jurés × œuvres
+        up_votes (ndarray): Votes pour par œuvre
+        down_votes (ndarray): Votes contre par œuvre
+
+    Returns:
+        tuple: (accord dans [0, 1] ou NaN, nombre d'œuvres comparées) par juré
+    """
+    votes = matrix.astype(np.int32)
+    consensus = np.sign((up_votes - down_votes)[np.newaxis, :] - votes)
+    compared = (votes != 0) & (consensus != 0)
+    agreed = (votes == consensus) & compared
+    nb_compared = compared.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        agreement = agreed.sum(axis=1) / nb_compared
+    return agreement, nb_compared
+
+
+def _rank_within(order, groups):
+    """Rang (à partir de 1) de chaque élément dans son groupe, selon order."""
+    sorted_groups = groups[order]
+    starts = np.searchsorted(sorted_groups, sorted_groups, side='left')
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(len(order)) - starts + 1
+    return ranks
+
+
+def rank_votes(matrix, artwork_ids, categories, juror_ids=None, z=WILSON_Z, prior_weight=None):
+    """
+    Calcule le classement à partir d'une matrice de votes.
+
+    Les œuvres sont classées par score de Wilson décroissant, puis par
+    approbation bayésienne, puis par ID.
+
+    Args:
+        matrix (ndarray): Matrice jurés × œuvres (+1, -1, 0)
+        artwork_ids (ndarray): IDs des œuvres (colonnes)
+        categories (ndarray): Catégorie de chaque œuvre
+        juror_ids (ndarray): IDs des jurés (lignes)
+        z (float): Quantile de la loi normale pour le score de Wilson
+        prior_weight (float): Poids de l'a priori bayésien
+
+    Returns:
+        dict: Tableaux alignés sur artwork_ids (up_votes, down_votes,
+            wilson, bayesian, rank, order, categories, category_rank) et sur
+            juror_ids (agreement, compared)
+    """
+    up_votes = (matrix == 1).sum(axis=0)
+    down_votes = (matrix == -1).sum(axis=0)
+    total_votes = up_votes + down_votes
+
+    wilson = wilson_lower_bound(up_votes, total_votes, z)
+    bayesian = bayesian_approval(up_votes, total_votes, prior_weight)
+
+    order = np.lexsort((artwork_ids, -bayesian, -wilson))
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(1, len(order) + 1)
+
+    category_labels, category_codes = np.unique(categories.astype(str), return_inverse=True)
+    category_order = np.lexsort((artwork_ids, -bayesian, -wilson, category_codes))
+    category_rank = _rank_within(category_order, category_codes)
+
+    agreement, compared = juror_agreement(matrix, up_votes, down_votes)
+
+    return {
+        'artwork_ids': artwork_ids,
+        'up_votes': up_votes,
+        'down_votes': down_votes,
+        'wilson': wilson,
+        'bayesian': bayesian,
+        'rank': rank,
+        'order': order,
+        'categories': category_labels[category_codes],
+        'category_rank': category_rank,
+        'juror_ids': juror_ids if juror_ids is not None else np.arange(matrix.shape[0]),
+        'agreement': agreement,
+        'compared': compared
+    }
+
+
+def compute_ranking(statuts=SALON_STATUTS, z=WILSON_Z, prior_weight=None, round_id=None):
+    """
+    Charge les votes et calcule le classement des œuvres.
+
+    Args:
+        statuts (tuple): Statuts des œuvres à classer
+        z (float): Quantile de la loi normale pour le score de Wilson
+        prior_weight (float): Poids de l'a priori bayésien
+        round_id (int): Classer les votes figés de ce tour clôturé plutôt
+            que les votes en cours
+
+    Returns:
+        dict: Voir rank_votes
+    """
+    data = load_round_vote_matrix(round_id) if round_id is not None else load_vote_matrix(statuts)
+    ranking = rank_votes(
+        data['matrix'], data['artwork_ids'], data['categories'],
+        juror_ids=data['juror_ids'], z=z, prior_weight=prior_weight
+    )
+    logger.info(f"Classement calculé : {len(data['artwork_ids'])} œuvres, {len(data['juror_ids'])} jurés")
+    return ranking
+
+
+def propose_selection(ranking, min_score=SELECTION_MIN_SCORE, max_selected=None, per_category=None):
+    """
+    Propose une sélection à partir du classement.
+
+    Une œuvre est proposée si son score de Wilson atteint min_score et,
+    le cas échéant, si elle figure dans les max_selected premières et
+    parmi les per_category premières de sa catégorie. Les autres œuvres
+    ayant reçu des votes sont proposées au refus ; les œuvres sans vote
+    restent en attente.
+
+    Args:
+        ranking (dict): Résultat de rank_votes / compute_ranking
+        min_score (float): Score de Wilson minimal
+        max_selected (int): Nombre maximal d'œuvres sélectionnées
+        per_category (int): Nombre maximal d'œuvres sélectionnées par catégorie
+
+    Returns:
+        dict: Champs {'selection_<artwork_id>': 'selectionner' | 'refuser'}
+            tels qu'envoyés à validate_selections
+    """
+    selected = ranking['wilson'] >= min_score
+    if per_category is not None:
+        selected &= ranking['category_rank'] <= per_category
+    if max_selected is not None:
+        # Rang parmi les œuvres retenues par les critères précédents
+        kept_order = ranking['order'][selected[ranking['order']]]
+        selected = np.zeros_like(selected)
+        selected[kept_order[:max_selected]] = True
+
+    voted = (ranking['up_votes'] + ranking['down_votes']) > 0
+    return {
+        f'selection_{artwork_id}': 'selectionner' if is_selected else 'refuser'
+        for artwork_id, is_selected, has_votes in zip(
+            ranking['artwork_ids'].tolist(), selected.tolist(), voted.tolist()
+        )
+        if is_selected or has_votes
+    }
+
+
+def ranking_to_json(ranking, limit=None):
+    """
+    Sérialise le classement pour une réponse JSON.
+
+    Args:
+        ranking (dict): Résultat de rank_votes / compute_ranking
+        limit (int): Nombre maximal d'œuvres renvoyées (les mieux classées)
+
+    Returns:
+        dict: Œuvres dans l'ordre du classement et accord des jurés
+    """
+    order = ranking['order'][:limit] if limit else ranking['order']
+    artworks = [
+        {
+            'id': artwork_id,
+            'rank': rank,
+            'categorie': categorie,
+            'category_rank': category_rank,
+            'up_votes': up,
+            'down_votes': down,
+            'wilson': round(wilson, 4),
+            'bayesian': round(bayesian, 4)
+        }
+        for artwork_id, rank, categorie, category_rank, up, down, wilson, bayesian in zip(
+            ranking['artwork_ids'][order].tolist(),
+            ranking['rank'][order].tolist(),
+            ranking['categories'][order].tolist(),
+            ranking['category_rank'][order].tolist(),
+            ranking['up_votes'][order].tolist(),
+            ranking['down_votes'][order].tolist(),
+            ranking['wilson'][order].tolist(),
+            ranking['bayesian'][order].tolist()
+        )
+    ]
+    jurors = [
+        {
+            'user_id': user_id,
+            'agreement': None if np.isnan(agreement) else round(agreement, 4),
+            'compared': compared
+        }
+        for user_id, agreement, compared in zip(
+            ranking['juror_ids'].tolist(),
+            ranking['agreement'].tolist(),
+            ranking['compared'].tolist()
+        )
+    ]
+    return {'artworks': artworks, 'jurors': jurors}
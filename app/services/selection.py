@@ -0,0 +1,158 @@
+"""
+Service de sélection des œuvres.
+
+Les changements de statut sont appliqués de façon ensembliste par des
+UPDATE artworks SET statut = ... WHERE id IN (...) découpés en lots, sans
+charger les œuvres dans la session. Seuls les IDs des œuvres dont le
+statut change réellement sont renvoyés (clause RETURNING) et diffusés
+aux clients du salon de vote.
+"""
+import logging
+from sqlalchemy import select, update
+from app.models.models import db, Artwork, Artist
+from app.services.vote_tally import IN_CLAUSE_CHUNK_SIZE
+from app.services.vote_events import vote_events
+from app.services.vote_journal import vote_journal
+
+logger = logging.getLogger(__name__)
+
+# Statuts possibles d'une œuvre
+ARTWORK_STATUTS = ('en_attente', 'selectionne', 'refuse')
+
+artworks_table = Artwork.__table__
+
+
+def _update_statut(statut, artwork_ids=None, where=()):
+    """
+    Passe des œuvres au statut donné.
+
+    Args:
+        statut (str): Nouveau statut
+        artwork_ids (list): IDs des œuvres, None pour toutes celles qui
+            vérifient where
+        where (tuple): Conditions supplémentaires
+
+    Returns:
+        list: IDs des œuvres dont le statut a changé
+    """
+    stmt = (
+        update(artworks_table)
+        .where(artworks_table.c.statut.is_distinct_from(statut), *where)
+        .values(statut=statut)
+        .returning(artworks_table.c.id)
+    )
+    if artwork_ids is None:
+        return list(db.session.execute(stmt).scalars())
+
+    changed = []
+    for start in range(0, len(artwork_ids), IN_CLAUSE_CHUNK_SIZE):
+        chunk = artwork_ids[start:start + IN_CLAUSE_CHUNK_SIZE]
+        changed.extend(db.session.execute(stmt.where(artworks_table.c.id.in_(chunk))).scalars())
+    return changed
+
+
+def _commit_and_publish(changes):
+    """Valide la transaction et diffuse les changements de statut."""
+    try:
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    if changes:
+        vote_events.publish_selections(changes)
+    logger.info(f"{len(changes)} statuts d'œuvres modifiés")
+    return changes
+
+
+def apply_statuts(statuts, others=None):
+    """
+    Applique des statuts à des œuvres en quelques requêtes.
+
+    Args:
+        statuts (dict): {artwork_id: statut}
+        others (str): Statut à donner à toutes les autres œuvres
+            (None pour ne pas les modifier)
+
+    Returns:
+        dict: {artwork_id: statut} des seules œuvres modifiées
+    """
+    by_statut = {}
+    for artwork_id, statut in statuts.items():
+        if statut not in ARTWORK_STATUTS:
+            raise ValueError(f"Statut invalide : {statut}")
+        by_statut.setdefault(statut, []).append(int(artwork_id))
+    if others is not None and others not in ARTWORK_STATUTS:
+        raise ValueError(f"Statut invalide : {others}")
+
+    # Les votes acquittés mais encore dans le journal comptent pour la sélection
+    vote_journal.drain()
+
+    changes = {}
+    try:
+        for statut, artwork_ids in by_statut.items():
+            for artwork_id in _update_statut(statut, sorted(set(artwork_ids))):
+                changes[artwork_id] = statut
+
+        if others is not None:
+            # Seules les œuvres ayant un autre statut sont chargées (ID uniquement)
+            explicit = {int(artwork_id) for artwork_id in statuts}
+            reset_ids = sorted(
+                artwork_id for artwork_id in db.session.execute(
+                    select(artworks_table.c.id).where(artworks_table.c.statut.is_distinct_from(others))
+                ).scalars()
+                if artwork_id not in explicit
+            )
+            for artwork_id in _update_statut(others, reset_ids):
+                changes[artwork_id] = others
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return _commit_and_publish(changes)
+
+
+def select_by_rule(min_approval, categorie=None, statut='selectionne', min_votes=1, from_statuts=None):
+    """
+    Sélection par règle, exécutée entièrement en SQL.
+
+    Exemple : toutes les œuvres de la catégorie « peinture » dont au moins
+    60 % des votes sont « pour » passent au statut « selectionne ».
+
+    Args:
+        min_approval (float): Proportion minimale de votes « pour » (0 à 1)
+        categorie (str): Catégorie de l'artiste (None pour toutes)
+        statut (str): Statut à appliquer
+        min_votes (int): Nombre minimal de votes exprimés
+        from_statuts (tuple): Ne modifier que les œuvres ayant ces statuts
+
+    Returns:
+        dict: {artwork_id: statut} des seules œuvres modifiées
+    """
+    if statut not in ARTWORK_STATUTS:
+        raise ValueError(f"Statut invalide : {statut}")
+
+    up_votes = artworks_table.c.up_votes_count
+    total_votes = artworks_table.c.up_votes_count + artworks_table.c.down_votes_count
+    where = [
+        total_votes >= max(min_votes, 1),
+        # up / total >= min_approval, sans division
+        up_votes >= total_votes * min_approval
+    ]
+    if categorie is not None:
+        where.append(artworks_table.c.artist_id.in_(
+            select(Artist.id).where(Artist.categorie == categorie)
+        ))
+    if from_statuts is not None:
+        where.append(artworks_table.c.statut.in_(from_statuts))
+
+    # Les compteurs doivent inclure les votes encore dans le journal
+    vote_journal.drain()
+
+    try:
+        changed = _update_statut(statut, where=where)
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return _commit_and_publish({artwork_id: statut for artwork_id in changed})
@@ -0,0 +1,68 @@
+"""
+Maintenance des compteurs de votes dénormalisés sur les œuvres.
+
+Les compteurs Artwork.up_votes_count / down_votes_count sont tenus à jour
+par des triggers SQLite (voir VOTE_COUNTER_TRIGGERS). Ce module installe
+ces triggers sur une base existante et reconstruit les compteurs de façon
+ensembliste en cas de dérive.
+"""
+import logging
+from sqlalchemy import func, select, update
+from app.models.models import db, Artwork, Vote, VOTE_TYPE_ALIASES, VOTE_COUNTER_TRIGGERS
+
+logger = logging.getLogger(__name__)
+
+
+def install_vote_counter_triggers():
+    """
+    Installe les triggers et index des compteurs s'ils n'existent pas.
+
+    db.create_all() ne les crée que pour une table votes nouvelle ; cette
+    fonction permet de mettre à niveau une base déjà en service.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        logger.warning("Triggers de compteurs disponibles uniquement pour SQLite")
+        return
+
+    with db.engine.begin() as connection:
+        for index in Vote.__table__.indexes:
+            index.create(connection, checkfirst=True)
+        for trigger in VOTE_COUNTER_TRIGGERS:
+            connection.execute(trigger)
+
+    logger.info("Triggers des compteurs de votes installés")
+
+
+def rebuild_vote_counters():
+    """
+    Recalcule les compteurs de votes de toutes les œuvres.
+
+    Les anciens types de vote ('up'/'down') sont d'abord normalisés, puis
+    les compteurs sont réécrits en une seule requête UPDATE avec
+    sous-requêtes corrélées, dans une même transaction.
+
+    Returns:
+        int: Nombre d'œuvres mises à jour
+    """
+    for old_type, new_type in VOTE_TYPE_ALIASES.items():
+        db.session.execute(
+            update(Vote).where(Vote.vote_type == old_type).values(vote_type=new_type)
+        )
+
+    def count_votes(vote_type):
+        return (
+            select(func.count(Vote.id))
+            .where(Vote.artwork_id == Artwork.id, Vote.vote_type == vote_type)
+            .scalar_subquery()
+        )
+
+    result = db.session.execute(
+        update(Artwork).values(
+            up_votes_count=count_votes('pour'),
+            down_votes_count=count_votes('contre')
+        )
+    )
+    db.session.commit()
+
+    logger.info(f"Compteurs de votes recalculés pour {result.rowcount} œuvres")
+    return result.rowcount
@@ -0,0 +1,158 @@
+"""
+Diffusion en direct des décomptes de votes et des sélections (Server-Sent Events).
+
+Les écritures publient leurs changements dans un diffuseur en mémoire. Un
+thread unique fusionne les changements reçus pendant un court intervalle,
+sérialise un seul message et le distribue à tous les clients connectés :
+50 membres connectés ne génèrent aucune requête supplémentaire en base.
+
+La diffusion est propre au processus : avec plusieurs workers, chaque
+worker ne notifie que ses propres clients.
+"""
+import json
+import queue
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class VoteEventBroker:
+    """Diffuseur en mémoire des changements de votes et de sélections."""
+
+    def __init__(self, flush_interval=0.5, queue_size=100):
+        """
+        Args:
+            flush_interval (float): Intervalle de regroupement des changements (s)
+            queue_size (int): Nombre maximal de messages en attente par client
+        """
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._tallies = {}
+        self._selections = {}
+        self._lock = threading.Lock()
+        self._pending = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        """Lit la configuration de l'application."""
+        self.flush_interval = app.config.get('VOTE_EVENTS_FLUSH_INTERVAL', self.flush_interval)
+        self.queue_size = app.config.get('VOTE_EVENTS_QUEUE_SIZE', self.queue_size)
+
+    def subscribe(self):
+        """
+        Inscrit un client.
+
+        Returns:
+            queue.Queue: File bornée des messages SSE destinés au client
+        """
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        self._ensure_thread()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """Désinscrit un client."""
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    @property
+    def has_subscribers(self):
+        """Indique si au moins un client est connecté."""
+        return bool(self._subscribers)
+
+    def publish_tallies(self, up_votes, down_votes):
+        """
+        Publie les nouveaux décomptes de votes.
+
+        Args:
+            up_votes (dict): {artwork_id: nombre de votes pour}
+            down_votes (dict): {artwork_id: nombre de votes contre}
+        """
+        with self._lock:
+            for artwork_id, up in up_votes.items():
+                self._tallies[artwork_id] = {
+                    'up_votes': up,
+                    'down_votes': down_votes.get(artwork_id, 0),
+                    'total_votes': up + down_votes.get(artwork_id, 0)
+                }
+        self._pending.set()
+
+    def publish_selections(self, statuts):
+        """
+        Publie des changements de statut des œuvres.
+
+        Args:
+            statuts (dict): {artwork_id: statut}
+        """
+        with self._lock:
+            self._selections.update(statuts)
+        self._pending.set()
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='vote-events', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """Boucle de diffusion : un message fusionné par intervalle."""
+        while True:
+            self._pending.wait()
+            self._pending.clear()
+            self.flush()
+            # Laisser s'accumuler les changements suivants
+            time.sleep(self.flush_interval)
+
+    def flush(self):
+        """Envoie les changements en attente à tous les clients."""
+        with self._lock:
+            if not self._tallies and not self._selections:
+                return
+            payload = {
+                'tallies': {str(artwork_id): tally for artwork_id, tally in self._tallies.items()},
+                'selections': {str(artwork_id): statut for artwork_id, statut in self._selections.items()}
+            }
+            self._tallies = {}
+            self._selections = {}
+            subscribers = list(self._subscribers)
+
+        message = format_sse(json.dumps(payload), event='update')
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # Client trop lent : vider sa file et lui demander de se resynchroniser
+                logger.warning("File SSE pleine, resynchronisation du client")
+                _drain(subscriber)
+                subscriber.put_nowait(format_sse('{}', event='resync'))
+
+
+def _drain(subscriber):
+    """Vide la file d'un client."""
+    try:
+        while True:
+            subscriber.get_nowait()
+    except queue.Empty:
+        pass
+
+
+def format_sse(data, event=None):
+    """
+    Formate un message Server-Sent Events.
+
+    Args:
+        data (str): Données du message
+        event (str): Type d'événement
+
+    Returns:
+        str: Message prêt à être envoyé
+    """
+    message = f"event: {event}\n" if event else ''
+    return message + f"data: {data}\n\n"
+
+
+vote_events = VoteEventBroker()
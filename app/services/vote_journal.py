@@ -0,0 +1,249 @@
+"""
+Journal d'écriture différée des votes.
+
+En mode write-behind, un bulletin est acquitté dès qu'il est ajouté (puis
+synchronisé sur disque) à un fichier journal local. Un thread d'arrière-plan
+applique ensuite les bulletins à la table votes par grands lots, chacun dans
+une seule transaction, ce qui évite que 40 membres validant en même temps
+ne se sérialisent sur l'unique écrivain de SQLite.
+
+Reprise après incident : la position des bulletins déjà appliqués est
+enregistrée dans un fichier de checkpoint, mis à jour uniquement après le
+commit du lot. Au redémarrage, les bulletins situés après le checkpoint
+sont rejoués dans l'ordre ; l'upsert étant idempotent, rejouer un lot déjà
+appliqué redonne le même état. Une dernière ligne incomplète (écriture
+interrompue) est ignorée et tronquée.
+
+Plusieurs processus (workers WSGI) peuvent partager le même journal : les
+ajouts, la lecture de la fin du journal et sa troncature se font sous un
+verrou fcntl.flock exclusif sur le fichier journal, et l'application des
+bulletins sous un second verrou (fichier .lock), si bien qu'un seul
+processus à la fois avance le checkpoint et qu'aucun bulletin acquitté par
+un autre processus ne peut être tronqué avant d'avoir été appliqué.
+"""
+import os
+import json
+import fcntl
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class VoteJournal:
+    """Journal durable des bulletins avec application différée par lots."""
+
+    def __init__(self, path=None, flush_interval=0.2, batch_size=1000):
+        """
+        Args:
+            path (str): Chemin du fichier journal
+            flush_interval (float): Délai maximal avant application d'un bulletin (s)
+            batch_size (int): Nombre maximal de bulletins par transaction
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.enabled = False
+        self.app = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = threading.Event()
+        self._thread = None
+        self._file = None
+        self._flush_lock_file = None
+
+    @property
+    def checkpoint_path(self):
+        return self.path + '.checkpoint'
+
+    @property
+    def lock_path(self):
+        return self.path + '.lock'
+
+    @contextmanager
+    def _journal_locked(self):
+        """Accès exclusif au fichier journal, entre threads et entre processus."""
+        with self._lock:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _flush_locked(self):
+        """Un seul thread, tous processus confondus, applique les bulletins."""
+        with self._flush_lock:
+            fcntl.flock(self._flush_lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._flush_lock_file, fcntl.LOCK_UN)
+
+    def init_app(self, app):
+        """
+        Active le journal si VOTE_JOURNAL_ENABLED, rejoue les bulletins
+        non appliqués et démarre le thread d'application.
+        """
+        self.enabled = app.config.get('VOTE_JOURNAL_ENABLED', False)
+        if not self.enabled:
+            return
+
+        self.app = app
+        self.path = app.config.get('VOTE_JOURNAL_PATH', self.path)
+        self.flush_interval = app.config.get('VOTE_JOURNAL_FLUSH_INTERVAL', self.flush_interval)
+        self.batch_size = app.config.get('VOTE_JOURNAL_BATCH_SIZE', self.batch_size)
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = open(self.path, 'ab')
+        self._flush_lock_file = open(self.lock_path, 'ab')
+        with self._journal_locked():
+            self._truncate_torn_tail()
+
+        # Rejouer les bulletins acquittés mais pas encore appliqués
+        replayed = self.flush()
+        if replayed:
+            logger.info(f"Journal des votes : {replayed} bulletins rejoués")
+
+        self._thread = threading.Thread(target=self._run, name='vote-journal', daemon=True)
+        self._thread.start()
+
+    def submit(self, user_id, ballot, replace=False):
+        """
+        Ajoute un bulletin au journal et le synchronise sur disque.
+
+        Le bulletin est durable au retour de cette méthode ; il sera
+        appliqué à la table votes par le thread d'arrière-plan.
+
+        Args:
+            user_id (int): ID de l'utilisateur
+            ballot (dict): {artwork_id: vote_type}
+            replace (bool): Remplacer tous les votes de l'utilisateur
+        """
+        line = json.dumps({'user_id': user_id, 'ballot': ballot, 'replace': replace})
+        with self._journal_locked():
+            self._file.write(line.encode('utf-8') + b'\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._pending.set()
+
+    def _run(self):
+        """Boucle d'application des bulletins."""
+        while True:
+            self._pending.wait()
+            self._pending.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # Les bulletins restent dans le journal et seront réessayés
+                logger.error(f"Erreur lors de l'application du journal des votes : {e}")
+                self._pending.set()
+            # Laisser s'accumuler les bulletins suivants
+            time.sleep(self.flush_interval)
+
+    def flush(self):
+        """
+        Applique tous les bulletins du journal situés après le checkpoint.
+
+        Returns:
+            int: Nombre de bulletins appliqués
+        """
+        from app.services.vote_writer import apply_ballots
+
+        with self._flush_locked():
+            offset = self._read_checkpoint()
+            with self._journal_locked():
+                end = os.path.getsize(self.path)
+            if offset > end:
+                logger.warning("Checkpoint du journal des votes au-delà de la fin du fichier, relecture complète")
+                offset = 0
+
+            applied = 0
+            for entries, next_offset in self._read_batches(offset, end):
+                with self.app.app_context():
+                    apply_ballots(
+                        (entry['user_id'], entry['ballot'], entry['replace'])
+                        for entry in entries
+                    )
+                # Le checkpoint n'avance qu'après le commit du lot
+                self._write_checkpoint(next_offset)
+                applied += len(entries)
+
+            self._rotate()
+            return applied
+
+    def drain(self):
+        """
+        Applique sans attendre les bulletins acquittés mais encore dans le
+        journal, avant une opération qui doit tous les voir (clôture d'un
+        tour, sélection). Sans effet si le journal n'est pas activé.
+
+        Returns:
+            int: Nombre de bulletins appliqués
+        """
+        if not self.enabled:
+            return 0
+        return self.flush()
+
+    def _read_batches(self, offset, end):
+        """Lit les bulletins complets entre offset et end, par lots."""
+        entries = []
+        with open(self.path, 'rb') as journal:
+            journal.seek(offset)
+            while offset < end:
+                line = journal.readline()
+                if not line.endswith(b'\n'):
+                    break
+                offset += len(line)
+                entries.append(json.loads(line))
+                if len(entries) >= self.batch_size:
+                    yield entries, offset
+                    entries = []
+        if entries:
+            yield entries, offset
+
+    def _rotate(self):
+        """Vide le journal lorsque tous ses bulletins ont été appliqués."""
+        with self._journal_locked():
+            size = os.path.getsize(self.path)
+            if size > 0 and self._read_checkpoint() == size:
+                # Checkpoint remis à zéro avant la troncature : une interruption
+                # entre les deux ne fait que rejouer des bulletins déjà appliqués
+                self._write_checkpoint(0)
+                self._file.truncate(0)
+                os.fsync(self._file.fileno())
+
+    def _truncate_torn_tail(self):
+        """
+        Supprime une dernière ligne incomplète laissée par un arrêt brutal.
+        À appeler sous le verrou du journal (les ajouts y sont complets).
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as journal:
+            data = journal.read()
+            end = data.rfind(b'\n') + 1
+            if end != len(data):
+                logger.warning(f"Journal des votes : {len(data) - end} octets incomplets ignorés")
+                journal.truncate(end)
+
+    def _read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as checkpoint:
+                return int(checkpoint.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _write_checkpoint(self, offset):
+        """Écrit le checkpoint de façon atomique (fichier temporaire + rename)."""
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w') as checkpoint:
+            checkpoint.write(str(offset))
+            checkpoint.flush()
+            os.fsync(checkpoint.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+
+vote_journal = VoteJournal()
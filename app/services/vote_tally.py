@@ -0,0 +1,262 @@
+"""
+Service de décompte des votes pour le salon de vote.
+
+Toutes les données de la page (artistes, œuvres, votes pour/contre et
+bulletin de l'utilisateur courant) sont obtenues en une seule requête au
+lieu d'une requête par œuvre. Les décomptes sont lus dans les compteurs
+Artwork.up_votes_count / down_votes_count maintenus par les triggers.
+"""
+import json
+import base64
+from sqlalchemy import select, tuple_
+from app.models.models import db, Artwork, Artist, Vote
+
+# Statuts des œuvres affichées dans le salon de vote
+SALON_STATUTS = ('en_attente', 'selectionne', 'refuse')
+
+# Taille maximale des clauses IN (limite de variables de SQLite)
+IN_CLAUSE_CHUNK_SIZE = 500
+
+
+def _nom_artiste(artist):
+    """Nom affiché pour un artiste."""
+    return artist.nom_artiste or f"{artist.prenom} {artist.nom}"
+
+
+def _salon_rows(user_id, statuts, artist_ids=None):
+    """
+    Requête unique du salon : œuvres, artistes et vote de l'utilisateur.
+
+    Args:
+        user_id (int): ID de l'utilisateur dont on veut le bulletin
+        statuts (tuple): Statuts des œuvres à inclure
+        artist_ids (list): Restreindre aux œuvres de ces artistes
+
+    Returns:
+        list: Tuples (artwork, artist, vote_type)
+    """
+    user_vote = (
+        select(Vote.vote_type)
+        .where(Vote.artwork_id == Artwork.id, Vote.user_id == user_id)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+    query = (
+        db.session.query(Artwork, Artist, user_vote.label('user_vote'))
+        .join(Artist, Artist.id == Artwork.artist_id)
+        .filter(Artwork.statut.in_(statuts))
+    )
+    if artist_ids is not None:
+        query = query.filter(Artwork.artist_id.in_(artist_ids))
+    return query.order_by(Artwork.id).all()
+
+
+def _group_rows(rows, group_key=lambda artist: _nom_artiste(artist)):
+    """
+    Regroupe les lignes du salon par artiste.
+
+    Args:
+        rows (list): Tuples (artwork, artist, vote_type)
+        group_key (callable): Clé de regroupement d'un artiste
+
+    Returns:
+        dict: {'artistes_data', 'user_votes', 'user_selections'}
+    """
+    artistes_data = []
+    artistes_dict = {}
+    user_votes = {}
+    user_selections = {}
+
+    for artwork, artist, vote_type in rows:
+        key = group_key(artist)
+
+        # Créer ou récupérer le groupe d'artiste
+        if key not in artistes_dict:
+            artiste_groupe = {
+                'nom_artiste': _nom_artiste(artist),
+                'artworks': []
+            }
+            artistes_data.append(artiste_groupe)
+            artistes_dict[key] = artiste_groupe
+
+        up = artwork.up_votes_count or 0
+        down = artwork.down_votes_count or 0
+        artistes_dict[key]['artworks'].append({
+            'artwork': artwork,
+            'up_votes': up,
+            'down_votes': down,
+            'total_votes': up + down
+        })
+
+        if vote_type:
+            user_votes[str(artwork.id)] = vote_type
+        if artwork.statut in ('selectionne', 'refuse'):
+            user_selections[str(artwork.id)] = artwork.statut
+
+    return {
+        'artistes_data': artistes_data,
+        'user_votes': user_votes,
+        'user_selections': user_selections
+    }
+
+
+def get_salon_tally(user_id=None, statuts=SALON_STATUTS):
+    """
+    Récupère les œuvres du salon groupées par artiste avec leurs votes.
+
+    Une seule requête (JOIN sur les artistes, sous-requête indexée pour le
+    vote de l'utilisateur) renvoie chaque œuvre, son artiste, les compteurs
+    pour/contre et le vote de l'utilisateur.
+
+    Args:
+        user_id (int): ID de l'utilisateur dont on veut le bulletin
+        statuts (tuple): Statuts des œuvres à inclure
+
+    Returns:
+        dict: {
+            'artistes_data': liste des groupes d'artistes avec leurs œuvres,
+            'user_votes': {str(artwork_id): vote_type},
+            'user_selections': {str(artwork_id): statut}
+        }
+    """
+    return _group_rows(_salon_rows(user_id, statuts))
+
+
+def encode_cursor(artist):
+    """Curseur de pagination : position (nom, id) du dernier artiste de la page."""
+    position = json.dumps([artist.nom, artist.id])
+    return base64.urlsafe_b64encode(position.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Décode un curseur de pagination.
+
+    Raises:
+        ValueError: Si le curseur est invalide
+    """
+    try:
+        nom, artist_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return str(nom), int(artist_id)
+    except Exception:
+        raise ValueError(f"Curseur invalide : {cursor}")
+
+
+def get_salon_page(user_id=None, cursor=None, limit=20, statuts=SALON_STATUTS):
+    """
+    Récupère une page d'artistes du salon avec leurs œuvres et leurs votes.
+
+    Les artistes sont triés par (nom, id) et paginés par curseur (keyset)
+    plutôt que par OFFSET : le coût d'une page reste constant quelle que
+    soit sa position dans le catalogue. Deux requêtes par page : les
+    artistes de la page, puis leurs œuvres.
+
+    Args:
+        user_id (int): ID de l'utilisateur dont on veut le bulletin
+        cursor (str): Curseur renvoyé par la page précédente, None pour la première
+        limit (int): Nombre d'artistes par page
+        statuts (tuple): Statuts des œuvres à inclure
+
+    Returns:
+        dict: Résultat de get_salon_tally pour la page, plus 'next_cursor'
+            (None sur la dernière page)
+
+    Raises:
+        ValueError: Si le curseur est invalide
+    """
+    has_artworks = (
+        select(Artwork.id)
+        .where(Artwork.artist_id == Artist.id, Artwork.statut.in_(statuts))
+        .exists()
+    )
+    query = Artist.query.filter(has_artworks)
+    if cursor:
+        query = query.filter(tuple_(Artist.nom, Artist.id) > decode_cursor(cursor))
+    artists = query.order_by(Artist.nom, Artist.id).limit(limit + 1).all()
+
+    next_cursor = encode_cursor(artists[limit - 1]) if len(artists) > limit else None
+    artists = artists[:limit]
+
+    rows = _salon_rows(user_id, statuts, artist_ids=[artist.id for artist in artists]) if artists else []
+    position = {artist.id: index for index, artist in enumerate(artists)}
+    rows.sort(key=lambda row: position[row[1].id])
+
+    page = _group_rows(rows, group_key=lambda artist: artist.id)
+    page['next_cursor'] = next_cursor
+    return page
+
+
+def get_vote_counts(artwork_ids=None):
+    """
+    Lit les compteurs de votes pour/contre d'un ensemble d'œuvres.
+
+    Une requête par tranche de IN_CLAUSE_CHUNK_SIZE œuvres.
+
+    Args:
+        artwork_ids (iterable): IDs des œuvres, None pour toutes les œuvres
+
+    Returns:
+        tuple: (up_votes, down_votes) - dictionnaires {artwork_id: nombre}
+    """
+    if artwork_ids is None:
+        rows = db.session.query(Artwork.id, Artwork.up_votes_count, Artwork.down_votes_count).all()
+        return (
+            {artwork_id: up or 0 for artwork_id, up, down in rows},
+            {artwork_id: down or 0 for artwork_id, up, down in rows}
+        )
+
+    artwork_ids = list(artwork_ids)
+    up_votes_count = {artwork_id: 0 for artwork_id in artwork_ids}
+    down_votes_count = {artwork_id: 0 for artwork_id in artwork_ids}
+    if not artwork_ids:
+        return up_votes_count, down_votes_count
+
+    for start in range(0, len(artwork_ids), IN_CLAUSE_CHUNK_SIZE):
+        chunk = artwork_ids[start:start + IN_CLAUSE_CHUNK_SIZE]
+        rows = (
+            db.session.query(Artwork.id, Artwork.up_votes_count, Artwork.down_votes_count)
+            .filter(Artwork.id.in_(chunk))
+            .all()
+        )
+        for artwork_id, up, down in rows:
+            up_votes_count[artwork_id] = up or 0
+            down_votes_count[artwork_id] = down or 0
+
+    return up_votes_count, down_votes_count
+
+
+def tally_to_json(tally):
+    """
+    Convertit le résultat de get_salon_tally ou get_salon_page en structure sérialisable.
+
+    Args:
+        tally (dict): Résultat de get_salon_tally ou get_salon_page
+
+    Returns:
+        dict: Données prêtes pour jsonify
+    """
+    return {
+        'artistes': [
+            {
+                'nom_artiste': groupe['nom_artiste'],
+                'artworks': [
+                    {
+                        'id': info['artwork'].id,
+                        'titre': info['artwork'].titre,
+                        'technique': info['artwork'].technique,
+                        'photo_path': info['artwork'].photo_path,
+                        'statut': info['artwork'].statut,
+                        'up_votes': info['up_votes'],
+                        'down_votes': info['down_votes'],
+                        'total_votes': info['total_votes']
+                    }
+                    for info in groupe['artworks']
+                ]
+            }
+            for groupe in tally['artistes_data']
+        ],
+        'user_votes': tally['user_votes'],
+        'user_selections': tally['user_selections'],
+        'next_cursor': tally.get('next_cursor')
+    }
@@ -0,0 +1,233 @@
+"""
+Service d'écriture des votes.
+
+Un bulletin complet ({artwork_id: vote_type}) est appliqué en une seule
+transaction par des INSERT ... ON CONFLICT DO UPDATE groupés, appuyés sur
+la contrainte unique (user_id, artwork_id) de la table votes.
+"""
+import logging
+from datetime import datetime
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.models import db, Artwork, Vote, VOTE_TYPE_ALIASES
+from app.services.vote_tally import IN_CLAUSE_CHUNK_SIZE, get_vote_counts
+from app.services.vote_events import vote_events
+from app.services.vote_journal import vote_journal
+
+logger = logging.getLogger(__name__)
+
+# Types de vote acceptés après normalisation
+VALID_VOTE_TYPES = ('pour', 'contre')
+
+# Nombre de lignes par INSERT multi-valeurs (4 paramètres par ligne)
+UPSERT_CHUNK_SIZE = 200
+
+
+def parse_ballot_form(form, prefix='vote_'):
+    """
+    Extrait un bulletin des champs d'un formulaire.
+
+    Args:
+        form: Formulaire (request.form ou dict)
+        prefix (str): Préfixe des champs de vote ('vote_<artwork_id>'),
+            chaîne vide si les clés sont directement les IDs des œuvres
+
+    Returns:
+        dict: {artwork_id (str): vote_type}
+    """
+    return {
+        key[len(prefix):]: value
+        for key, value in form.items()
+        if key.startswith(prefix)
+    }
+
+
+def normalize_ballot(ballot):
+    """
+    Normalise un bulletin et écarte les entrées invalides.
+
+    Args:
+        ballot (dict): {artwork_id: vote_type}, IDs en int ou str
+
+    Returns:
+        dict: {artwork_id (int): 'pour' | 'contre'}
+    """
+    normalized = {}
+    for artwork_id, vote_type in ballot.items():
+        try:
+            artwork_id = int(artwork_id)
+        except (TypeError, ValueError):
+            logger.warning(f'Invalid artwork ID: {artwork_id}')
+            continue
+
+        vote_type = VOTE_TYPE_ALIASES.get(vote_type, vote_type)
+        if vote_type not in VALID_VOTE_TYPES:
+            logger.warning(f'Type de vote invalide : {vote_type}')
+            continue
+
+        normalized[artwork_id] = vote_type
+    return normalized
+
+
+def _existing_artwork_ids(artwork_ids):
+    """Filtre les IDs d'œuvres qui existent en base."""
+    artwork_ids = list(artwork_ids)
+    existing = set()
+    for start in range(0, len(artwork_ids), IN_CLAUSE_CHUNK_SIZE):
+        chunk = artwork_ids[start:start + IN_CLAUSE_CHUNK_SIZE]
+        existing.update(
+            artwork_id for (artwork_id,) in
+            db.session.query(Artwork.id).filter(Artwork.id.in_(chunk))
+        )
+    return existing
+
+
+def _insert(table):
+    """INSERT propre au dialecte, nécessaire pour ON CONFLICT."""
+    if db.engine.dialect.name == 'postgresql':
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+def _upsert_votes(rows):
+    """Insère ou met à jour des votes par INSERT multi-valeurs."""
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = _insert(Vote.__table__).values(rows[start:start + UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'artwork_id'],
+            set_={
+                'vote_type': stmt.excluded.vote_type,
+                'vote_date': stmt.excluded.vote_date
+            },
+            # Ne réécrire que les votes qui changent
+            where=Vote.__table__.c.vote_type != stmt.excluded.vote_type
+        )
+        db.session.execute(stmt)
+
+
+def _delete_other_votes(user_id, kept_artwork_ids):
+    """Supprime les votes d'un utilisateur absents de kept_artwork_ids."""
+    previous = {
+        artwork_id for (artwork_id,) in
+        db.session.query(Vote.artwork_id).filter(Vote.user_id == user_id)
+    }
+    removed = sorted(previous - kept_artwork_ids)
+    for start in range(0, len(removed), IN_CLAUSE_CHUNK_SIZE):
+        db.session.execute(
+            delete(Vote.__table__).where(
+                Vote.__table__.c.user_id == user_id,
+                Vote.__table__.c.artwork_id.in_(removed[start:start + IN_CLAUSE_CHUNK_SIZE])
+            )
+        )
+    return removed
+
+
+def apply_ballots(ballots):
+    """
+    Enregistre plusieurs bulletins dans une seule transaction.
+
+    Les bulletins sont appliqués dans l'ordre : pour un même couple
+    (utilisateur, œuvre) le dernier vote l'emporte, et un bulletin
+    « replace » annule les votes antérieurs de son utilisateur. Les lignes
+    résultantes sont écrites par INSERT ... ON CONFLICT (user_id, artwork_id)
+    DO UPDATE groupés ; les compteurs des œuvres sont ajustés par les
+    triggers de la table votes.
+
+    Args:
+        ballots (iterable): Tuples (user_id, ballot, replace)
+
+    Returns:
+        dict: {user_id: liste des IDs des œuvres dont le vote a été enregistré}
+    """
+    ballots = [(user_id, normalize_ballot(ballot), replace) for user_id, ballot, replace in ballots]
+
+    requested = set()
+    for _, ballot, _ in ballots:
+        requested.update(ballot)
+    existing = _existing_artwork_ids(requested)
+    for artwork_id in requested - existing:
+        logger.warning(f'Artwork not found: {artwork_id}')
+
+    vote_date = datetime.utcnow()
+    rows = {}
+    kept = {}  # Votes conservés des utilisateurs ayant soumis un bulletin « replace »
+    for user_id, ballot, replace in ballots:
+        if replace:
+            for key in [key for key in rows if key[0] == user_id]:
+                del rows[key]
+            kept[user_id] = set()
+        for artwork_id, vote_type in ballot.items():
+            if artwork_id not in existing:
+                continue
+            rows[(user_id, artwork_id)] = {
+                'user_id': user_id,
+                'artwork_id': artwork_id,
+                'vote_type': vote_type,
+                'vote_date': vote_date
+            }
+            if user_id in kept:
+                kept[user_id].add(artwork_id)
+
+    removed = []
+    try:
+        _upsert_votes(list(rows.values()))
+        for user_id, kept_artwork_ids in kept.items():
+            removed.extend(_delete_other_votes(user_id, kept_artwork_ids))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    applied = {}
+    for user_id, artwork_id in rows:
+        applied.setdefault(user_id, []).append(artwork_id)
+    for user_id in applied:
+        applied[user_id].sort()
+    logger.info(f'{len(ballots)} bulletins enregistrés : {len(rows)} votes, {len(removed)} supprimés')
+
+    # Notifier les clients connectés des nouveaux décomptes
+    touched = {artwork_id for _, artwork_id in rows} | set(removed)
+    if vote_events.has_subscribers and touched:
+        vote_events.publish_tallies(*get_vote_counts(touched))
+
+    return applied
+
+
+def apply_ballot(user_id, ballot, replace=False):
+    """
+    Enregistre le bulletin d'un utilisateur en une transaction.
+
+    Args:
+        user_id (int): ID de l'utilisateur
+        ballot (dict): {artwork_id: vote_type}
+        replace (bool): Supprimer les votes de l'utilisateur absents du bulletin
+
+    Returns:
+        list: IDs des œuvres dont le vote a été enregistré
+    """
+    return apply_ballots([(user_id, ballot, replace)]).get(user_id, [])
+
+
+def record_ballot(user_id, ballot, replace=False):
+    """
+    Enregistre un bulletin depuis une route.
+
+    Si le journal d'écriture différée est activé, le bulletin est acquitté
+    dès qu'il est durable dans le journal et appliqué plus tard par lots ;
+    sinon il est appliqué immédiatement.
+
+    Args:
+        user_id (int): ID de l'utilisateur
+        ballot (dict): {artwork_id: vote_type}
+        replace (bool): Supprimer les votes de l'utilisateur absents du bulletin
+
+    Returns:
+        list: IDs des œuvres du bulletin. Avec le journal, ces votes ne sont
+        pas encore écrits dans la table des votes au retour : les compteurs
+        lus aussitôt sont ceux d'avant le bulletin.
+    """
+    if vote_journal.enabled:
+        normalized = normalize_ballot(ballot)
+        vote_journal.submit(user_id, normalized, replace)
+        return sorted(normalized)
+    return apply_ballot(user_id, ballot, replace)
@@ -0,0 +1,218 @@
+"""
+Clôture des tours de vote et lecture de leurs instantanés.
+
+Clôturer un tour fige, dans une seule transaction, les décomptes et
+statuts des œuvres, la participation des jurés et les votes eux-mêmes
+dans des tables d'instantané compactes, par des INSERT ... SELECT
+exécutés entièrement en base. Les rapports (export PDF, statistiques,
+classement) lisent ensuite ces tables plutôt que les tables votes et
+artworks, toujours en cours d'écriture pendant le vote.
+"""
+import logging
+from datetime import datetime
+from sqlalchemy import case, func, insert, literal, select
+from app.models.models import (
+    db, Artwork, Artist, Vote, VotingRound,
+    RoundArtworkResult, RoundJurorParticipation, RoundVote
+)
+from app.services.vote_tally import SALON_STATUTS
+from app.services.vote_journal import vote_journal
+
+logger = logging.getLogger(__name__)
+
+
+def close_round(nom=None, closed_by=None, statuts=SALON_STATUTS):
+    """
+    Clôture un tour de vote et en fige les résultats.
+
+    Les trois INSERT ... SELECT s'exécutent dans la même transaction que
+    la création du tour : l'instantané est cohérent même si des jurés
+    votent au même moment. Les bulletins encore dans le journal
+    d'écriture différée sont appliqués avant.
+
+    Args:
+        nom (str): Nom du tour (par défaut « Tour du <date> »)
+        closed_by (int): ID de l'administrateur qui clôture le tour
+        statuts (tuple): Statuts des œuvres incluses dans le tour
+
+    Returns:
+        VotingRound: Tour clôturé
+    """
+    # Bulletins acquittés avant la clôture mais pas encore écrits
+    vote_journal.drain()
+
+    closed_at = datetime.utcnow()
+    voting_round = VotingRound(
+        nom=nom or f"Tour du {closed_at.strftime('%d/%m/%Y %H:%M')}",
+        closed_at=closed_at,
+        closed_by=closed_by
+    )
+    try:
+        db.session.add(voting_round)
+        db.session.flush()
+        round_id = literal(voting_round.id)
+
+        results = db.session.execute(
+            insert(RoundArtworkResult).from_select(
+                ['round_id', 'artwork_id', 'artist_id', 'categorie', 'statut', 'up_votes', 'down_votes'],
+                select(
+                    round_id,
+                    Artwork.id,
+                    Artwork.artist_id,
+                    func.coalesce(Artist.categorie, ''),
+                    func.coalesce(Artwork.statut, 'en_attente'),
+                    Artwork.up_votes_count,
+                    Artwork.down_votes_count
+                )
+                .join(Artist, Artist.id == Artwork.artist_id)
+                .where(Artwork.statut.in_(statuts))
+            )
+        )
+
+        votes = db.session.execute(
+            insert(RoundVote).from_select(
+                ['round_id', 'user_id', 'artwork_id', 'vote'],
+                select(round_id, Vote.user_id, Vote.artwork_id, case((Vote.vote_type == 'pour', 1), else_=-1))
+                .join(Artwork, Artwork.id == Vote.artwork_id)
+                .where(Artwork.statut.in_(statuts))
+            )
+        )
+
+        jurors = db.session.execute(
+            insert(RoundJurorParticipation).from_select(
+                ['round_id', 'user_id', 'nb_votes', 'up_votes', 'down_votes', 'last_vote_date'],
+                select(
+                    round_id,
+                    Vote.user_id,
+                    func.count(),
+                    func.sum(case((Vote.vote_type == 'pour', 1), else_=0)),
+                    func.sum(case((Vote.vote_type == 'contre', 1), else_=0)),
+                    func.max(Vote.vote_date)
+                )
+                .join(Artwork, Artwork.id == Vote.artwork_id)
+                .where(Artwork.statut.in_(statuts))
+                .group_by(Vote.user_id)
+            )
+        )
+
+        voting_round.nb_artworks = results.rowcount
+        voting_round.nb_votes = votes.rowcount
+        voting_round.nb_jurors = jurors.rowcount
+        voting_round.nb_selected = db.session.execute(
+            select(func.count())
+            .select_from(RoundArtworkResult)
+            .where(RoundArtworkResult.round_id == voting_round.id, RoundArtworkResult.statut == 'selectionne')
+        ).scalar()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    logger.info(
+        f"Tour de vote {voting_round.id} clôturé : {voting_round.nb_artworks} œuvres, "
+        f"{voting_round.nb_votes} votes, {voting_round.nb_jurors} jurés"
+    )
+    return voting_round
+
+
+def get_round(round_id):
+    """
+    Renvoie un tour clôturé.
+
+    Les rapports lisent les données en cours par défaut : un instantané
+    n'est lu que pour un tour demandé explicitement.
+
+    Args:
+        round_id (int): ID du tour
+
+    Returns:
+        VotingRound: Tour, ou None s'il n'existe pas
+    """
+    return db.session.get(VotingRound, round_id)
+
+
+def get_round_results(round_id, statut=None):
+    """
+    Résultats des œuvres d'un tour, en un parcours de la clé primaire.
+
+    Args:
+        round_id (int): ID du tour
+        statut (str): Ne renvoyer que les œuvres ayant ce statut final
+
+    Returns:
+        list: Lignes (artwork_id, artist_id, categorie, statut, up_votes, down_votes)
+    """
+    query = (
+        select(
+            RoundArtworkResult.artwork_id,
+            RoundArtworkResult.artist_id,
+            RoundArtworkResult.categorie,
+            RoundArtworkResult.statut,
+            RoundArtworkResult.up_votes,
+            RoundArtworkResult.down_votes
+        )
+        .where(RoundArtworkResult.round_id == round_id)
+        .order_by(RoundArtworkResult.artwork_id)
+    )
+    if statut is not None:
+        query = query.where(RoundArtworkResult.statut == statut)
+    return db.session.execute(query).all()
+
+
+def selected_artwork_ids(round_id):
+    """
+    Sous-requête des IDs des œuvres sélectionnées à la clôture d'un tour.
+
+    Args:
+        round_id (int): ID du tour
+
+    Returns:
+        Select: Sous-requête utilisable dans un IN (...)
+    """
+    return select(RoundArtworkResult.artwork_id).where(
+        RoundArtworkResult.round_id == round_id,
+        RoundArtworkResult.statut == 'selectionne'
+    )
+
+
+def get_round_statistics(voting_round):
+    """
+    Statistiques d'un tour clôturé, lues uniquement dans les instantanés.
+
+    Args:
+        voting_round (VotingRound): Tour clôturé
+
+    Returns:
+        dict: Statistiques globales, par statut et participation des jurés
+    """
+    by_statut = dict(db.session.execute(
+        select(RoundArtworkResult.statut, func.count())
+        .where(RoundArtworkResult.round_id == voting_round.id)
+        .group_by(RoundArtworkResult.statut)
+    ).all())
+    participation = db.session.execute(
+        select(
+            RoundJurorParticipation.user_id,
+            RoundJurorParticipation.nb_votes,
+            RoundJurorParticipation.up_votes,
+            RoundJurorParticipation.down_votes
+        )
+        .where(RoundJurorParticipation.round_id == voting_round.id)
+        .order_by(RoundJurorParticipation.user_id)
+    ).all()
+
+    return {
+        'round_id': voting_round.id,
+        'round_nom': voting_round.nom,
+        'closed_at': voting_round.closed_at,
+        'total_artworks': voting_round.nb_artworks,
+        'selected_artworks': voting_round.nb_selected,
+        'refused_artworks': by_statut.get('refuse', 0),
+        'pending_artworks': by_statut.get('en_attente', 0),
+        'total_votes': voting_round.nb_votes,
+        'total_jurors': voting_round.nb_jurors,
+        'participation': [
+            {'user_id': user_id, 'nb_votes': nb_votes, 'up_votes': up_votes, 'down_votes': down_votes}
+            for user_id, nb_votes, up_votes, down_votes in participation
+        ]
+    }
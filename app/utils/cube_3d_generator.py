@@ -3,8 +3,43 @@ import numpy as np
 import trimesh
 from PIL import Image
 import logging
+from app.image_processing.quantized_glb import load_texture, write_quantized_glb
 
-def create_textured_cube(image_path, depth_cm=3, output_dir=None):
+# Formats de sortie des cubes : OBJ texturé ou GLB quantifié pour le web
+CUBE_FORMATS = ('obj', 'glb')
+
+
+def _export_cube(mesh, vertices, faces, uv_coords, image_path, output_base, file_format):
+    """
+    Sauvegarde le cube au format demandé.
+    
+    En GLB, les huit sommets reprennent les coordonnées de texture des
+    coins de la face avant : les tranches prolongent les bords de
+    l'image, comme une toile tendue sur châssis.
+    
+    Args:
+        mesh (trimesh.Trimesh): Cube texturé (export OBJ)
+        vertices (ndarray): Sommets du cube
+        faces (ndarray): Faces du cube
+        uv_coords (ndarray): Coordonnées de texture des coins de la face avant
+        image_path (str): Image plaquée sur la face avant
+        output_base (str): Chemin de sortie sans extension
+        file_format (str): obj ou glb
+    
+    Returns:
+        str: Chemin du fichier créé
+    """
+    if file_format not in CUBE_FORMATS:
+        raise ValueError(f"Format de cube non supporté : {file_format}")
+    output_path = f"{output_base}.{file_format}"
+    if file_format == 'glb':
+        uvs = np.concatenate([uv_coords, uv_coords])
+        write_quantized_glb(output_path, vertices, faces, uvs=uvs, texture=load_texture(image_path), reorder=False)
+    else:
+        mesh.export(output_path)
+    return output_path
+
+def create_textured_cube(image_path, depth_cm=3, output_dir=None, file_format='obj'):
     """
     Crée un cube 3D texturé à partir d'une image.
     
@@ -13,6 +48,7 @@ def create_textured_cube(image_path, depth_cm=3, output_dir=None):
         depth_cm (float, optional): Profondeur du cube en centimètres. Défaut à 3 cm.
         output_dir (str, optional): Répertoire de sortie pour le fichier OBJ. 
                                     Si None, utilise le même répertoire que l'image.
+        file_format (str, optional): obj (défaut) ou glb quantifié pour le web.
     
     Returns:
         dict: Informations sur le cube 3D créé
@@ -104,13 +140,14 @@ def create_textured_cube(image_path, depth_cm=3, output_dir=None):
         
         # Générer le nom de fichier de sortie
         base_name = os.path.splitext(os.path.basename(image_path))[0]
-        output_obj = os.path.join(output_dir, f"{base_name}_cube.obj")
+        output_base = os.path.join(output_dir, f"{base_name}_cube")
         
         # Sauvegarder le mesh
-        mesh.export(output_obj)
+        output_path = _export_cube(mesh, vertices, faces, uv_coords, image_path, output_base, file_format)
         
         return {
-            'obj_path': output_obj,
+            'obj_path': output_path if file_format == 'obj' else None,
+            'mesh_path': output_path,
             'width_cm': width_cm,
             'height_cm': height_cm,
             'depth_cm': depth_cm
@@ -120,7 +157,7 @@ def create_textured_cube(image_path, depth_cm=3, output_dir=None):
         logging.error(f"Erreur lors de la création du cube 3D: {e}")
         raise
 
-def create_artwork_cube(image_path, artwork_width_cm=None, artwork_height_cm=None, depth_cm=3, output_dir=None, custom_filename=None):
+def create_artwork_cube(image_path, artwork_width_cm=None, artwork_height_cm=None, depth_cm=3, output_dir=None, custom_filename=None, file_format='obj'):
     """
     Crée un cube 3D pour une œuvre avec ses dimensions réelles.
     
@@ -131,6 +168,7 @@ def create_artwork_cube(image_path, artwork_width_cm=None, artwork_height_cm=Non
         depth_cm (float, optional): Profondeur du cube. Défaut à 3 cm.
         output_dir (str, optional): Répertoire de sortie. Si None, utilise le même répertoire que l'image.
         custom_filename (str, optional): Nom de fichier personnalisé pour le cube 3D
+        file_format (str, optional): obj (défaut) ou glb quantifié pour le web.
     
     Returns:
         dict: Informations sur le cube 3D créé
@@ -227,16 +265,17 @@ def create_artwork_cube(image_path, artwork_width_cm=None, artwork_height_cm=Non
         
         # Générer le nom de fichier de sortie
         if custom_filename:
-            output_obj = os.path.join(output_dir, f"{custom_filename}_cube.obj")
+            output_base = os.path.join(output_dir, f"{custom_filename}_cube")
         else:
             base_name = os.path.splitext(os.path.basename(image_path))[0]
-            output_obj = os.path.join(output_dir, f"{base_name}_cube.obj")
+            output_base = os.path.join(output_dir, f"{base_name}_cube")
         
         # Sauvegarder le mesh
-        mesh.export(output_obj)
+        output_path = _export_cube(mesh, vertices, faces, uv_coords, image_path, output_base, file_format)
         
         return {
-            'obj_path': output_obj,
+            'obj_path': output_path if file_format == 'obj' else None,
+            'mesh_path': output_path,
             'width_cm': width_cm,
             'height_cm': height_cm,
             'depth_cm': depth_cm,
@@ -247,7 +286,7 @@ def create_artwork_cube(image_path, artwork_width_cm=None, artwork_height_cm=Non
         logging.error(f"Erreur lors de la création du cube 3D: {e}")
         raise
 
-def batch_create_3d_cubes(image_paths, depth_cm=3, output_dir=None):
+def batch_create_3d_cubes(image_paths, depth_cm=3, output_dir=None, file_format='obj'):
     """
     Crée des cubes 3D pour un lot d'images.
     
@@ -255,6 +294,7 @@ def batch_create_3d_cubes(image_paths, depth_cm=3, output_dir=None):
         image_paths (list): Liste des chemins complets vers les images
         depth_cm (float, optional): Profondeur des cubes. Défaut à 3 cm.
         output_dir (str, optional): Répertoire de sortie. Si None, utilise le même répertoire que les images.
+        file_format (str, optional): obj (défaut) ou glb quantifié pour le web.
     
     Returns:
         list: Liste des informations sur les cubes 3D créés
@@ -262,7 +302,7 @@ def batch_create_3d_cubes(image_paths, depth_cm=3, output_dir=None):
     results = []
     for image_path in image_paths:
         try:
-            cube_info = create_textured_cube(image_path, depth_cm, output_dir)
+            cube_info = create_textured_cube(image_path, depth_cm, output_dir, file_format)
             results.append(cube_info)
         except Exception as e:
             logging.warning(f"Impossible de créer un cube 3D pour {image_path}: {e}")
@@ -58,6 +58,46 @@ class Config:
         }
     }
 
+    # Salon de vote : nombre d'artistes chargés par page (défilement infini)
+    SALON_PAGE_SIZE = 20
+
+    # Diffusion en direct du salon de vote (Server-Sent Events)
+    VOTE_EVENTS_FLUSH_INTERVAL = 0.5  # Regroupement des changements (secondes)
+    VOTE_EVENTS_QUEUE_SIZE = 100  # Messages en attente maximum par client
+    VOTE_EVENTS_KEEPALIVE = 15  # Intervalle des messages de maintien (secondes)
+
+    # Journal d'écriture différée des votes (write-behind) ; partageable par
+    # plusieurs workers (verrous fcntl.flock, systèmes POSIX uniquement)
+    VOTE_JOURNAL_ENABLED = os.environ.get('VOTE_JOURNAL_ENABLED', 'false').lower() == 'true'
+    VOTE_JOURNAL_PATH = os.path.join(basedir, 'instance', 'vote_journal.log')
+    VOTE_JOURNAL_FLUSH_INTERVAL = 0.2  # Délai maximal avant application (secondes)
+    VOTE_JOURNAL_BATCH_SIZE = 1000  # Bulletins maximum par transaction
+
+    # Génération des maillages 3D : au-delà de ce nombre de pixels, le
+    # maillage complet est écrit par bandes de lignes (export en flux)
+    MESH_STREAMING_MIN_PIXELS = 2048 * 2048
+    MESH_TILE_ROWS = 256  # Lignes de pixels par bande
+    # Flou de la carte de profondeur : auto, opencv, pyramid ou scipy
+    DEPTH_BACKEND = os.environ.get('DEPTH_BACKEND', 'auto')
+
+    # Traitement asynchrone des images (pool de processus)
+    PROCESSING_MAX_WORKERS = int(os.environ.get('PROCESSING_MAX_WORKERS', 2))  # Traitements simultanés
+    PROCESSING_QUEUE_SIZE = 8  # Travaux en attente au-delà desquels les envois sont refusés (503)
+    PROCESSING_JOB_TTL = 3600  # Conservation de l'état des travaux terminés (secondes)
+    # Mémoire que les traitements en cours peuvent réserver (pic prévu par
+    # travail) : au-delà, les travaux attendent ; un travail qui dépasse
+    # seul le budget est refusé (413). 0 pour ne pas limiter
+    PROCESSING_MEMORY_BUDGET = int(os.environ.get('PROCESSING_MEMORY_BUDGET', 4 * 1024 ** 3))
+    # Cache des maillages générés (dossier de sortie), éviction LRU au-delà du quota
+    MESH_CACHE_MAX_BYTES = int(os.environ.get('MESH_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+    # Cartes de profondeur réutilisées pour un nouveau maillage de la même image
+    # (changement de scale_factor ou de budget de triangles) ; vide pour désactiver
+    DEPTH_STORE_FOLDER = os.path.join(basedir, 'instance', 'depth_maps')
+    DEPTH_STORE_MAX_BYTES = int(os.environ.get('DEPTH_STORE_MAX_BYTES', 2 * 1024 ** 3))
+    # GLB quantifié pour le visualiseur web : budget de triangles par défaut,
+    # choisi pour rester sous 65 536 sommets (indices sur 16 bits)
+    MESH_WEB_TARGET_FACES = 100000
+
     # Configuration CSRF
     WTF_CSRF_ENABLED = True
     WTF_CSRF_SECRET_KEY = 'dev-csrf-secret-key-change-in-production'  # Change this in production!
@@ -1,11 +1,13 @@
-import { useEffect, useRef } from 'react';
+import { Suspense, useEffect, useRef } from 'react';
 import { Box } from '@mui/material';
 import { Canvas } from '@react-three/fiber';
-import { OrbitControls } from '@react-three/drei';
+import { Bounds, OrbitControls, useGLTF } from '@react-three/drei';
 import * as THREE from 'three';
 
 interface ArtworkViewer3DProps {
   imageUrl: string;
+  // Modèle GLB (quantifié KHR_mesh_quantization, décodé nativement par GLTFLoader)
+  modelUrl?: string;
   width?: number;
   height?: number;
 }
@@ -21,23 +23,38 @@ function Scene({ imageUrl }: { imageUrl: string }) {
   }, [imageUrl]);
 
   return (
-    <>
-      <ambientLight intensity={0.5} />
-      <pointLight position={[10, 10, 10]} />
-      <mesh>
-        <planeGeometry args={[3, 2]} />
-        <meshStandardMaterial map={textureRef.current || null} side={THREE.DoubleSide} />
-      </mesh>
-      <OrbitControls enableDamping dampingFactor={0.05} />
-    </>
+    <mesh>
+      <planeGeometry args={[3, 2]} />
+      <meshStandardMaterial map={textureRef.current || null} side={THREE.DoubleSide} />
+    </mesh>
   );
 }
 
-const ArtworkViewer3D = ({ imageUrl, width = 800, height = 600 }: ArtworkViewer3DProps) => {
+function Model({ modelUrl }: { modelUrl: string }) {
+  const { scene } = useGLTF(modelUrl);
+
+  return (
+    <Bounds fit clip observe margin={1.2}>
+      <primitive object={scene} />
+    </Bounds>
+  );
+}
+
+const ArtworkViewer3D = ({ imageUrl, modelUrl, width = 800, height = 600 }: ArtworkViewer3DProps) => {
   return (
     <Box sx={{ width, height }}>
       <Canvas camera={{ position: [0, 0, 5], fov: 75 }}>
-        <Scene imageUrl={imageUrl} />
+        <ambientLight intensity={0.5} />
+        <pointLight position={[10, 10, 10]} />
+        {modelUrl ? (
+          // L'image plane s'affiche pendant le téléchargement du modèle
+          <Suspense fallback={<Scene imageUrl={imageUrl} />}>
+            <Model modelUrl={modelUrl} />
+          </Suspense>
+        ) : (
+          <Scene imageUrl={imageUrl} />
+        )}
+        <OrbitControls makeDefault enableDamping dampingFactor={0.05} />
       </Canvas>
     </Box>
   );
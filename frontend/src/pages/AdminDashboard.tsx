@@ -294,6 +294,9 @@ const AdminDashboard = () => {
           {currentArtwork && (
             <ArtworkViewer3D
               imageUrl={`/api/artwork/${currentArtwork.id}/image`}
+              modelUrl={currentArtwork.cube_3d_path?.endsWith('.glb')
+                ? `/api/artwork/${currentArtwork.id}/cube_3d`
+                : undefined}
               width={800}
               height={600}
             />
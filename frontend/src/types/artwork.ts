@@ -33,6 +33,9 @@ export interface Artwork {
   dimension_longueur?: number;
   poids?: number;
   dimension_socle?: string;
+
+  // Cube 3D généré (OBJ ou GLB quantifié)
+  cube_3d_path?: string;
 }
 
 export interface User {
@@ -0,0 +1,22 @@
+from flask import current_app
+from app.models.models import db, Artist, Artwork
+
+# Index utilisés par la pagination par curseur du salon de vote
+SALON_INDEXES = [
+    index for index in list(Artist.__table__.indexes) + list(Artwork.__table__.indexes)
+    if index.name in ('ix_artists_nom_id', 'ix_artworks_artist_id')
+]
+
+def upgrade():
+    """Crée les index de pagination du salon de vote s'ils n'existent pas."""
+    with current_app.app_context():
+        for index in SALON_INDEXES:
+            index.create(db.engine, checkfirst=True)
+            print(f"Index '{index.name}' disponible")
+
+def downgrade():
+    """Supprime les index de pagination du salon de vote."""
+    with current_app.app_context():
+        for index in SALON_INDEXES:
+            index.drop(db.engine, checkfirst=True)
+            print(f"Index '{index.name}' supprimé")
@@ -0,0 +1,42 @@
+from flask import current_app
+from app.models.models import db
+from sqlalchemy import text
+
+def upgrade():
+    """Supprime les votes en double et ajoute l'index unique (user_id, artwork_id)."""
+    with current_app.app_context():
+        inspector = db.inspect(db.engine)
+        index_names = [index['name'] for index in inspector.get_indexes('votes')]
+        index_names += [constraint['name'] for constraint in inspector.get_unique_constraints('votes')]
+        
+        if 'uq_votes_user_artwork' not in index_names:
+            with db.engine.begin() as connection:
+                # Conserver uniquement le vote le plus récent de chaque utilisateur par œuvre
+                result = connection.execute(text('''
+                    DELETE FROM votes
+                    WHERE id NOT IN (
+                        SELECT MAX(id) FROM votes GROUP BY user_id, artwork_id
+                    )
+                '''))
+                print(f"{result.rowcount} votes en double supprimés")
+                
+                connection.execute(text('''
+                    CREATE UNIQUE INDEX uq_votes_user_artwork
+                    ON votes (user_id, artwork_id)
+                '''))
+            print("Index unique 'uq_votes_user_artwork' ajouté à la table 'votes'")
+        else:
+            print("L'index 'uq_votes_user_artwork' existe déjà")
+
+def downgrade():
+    """Supprime l'index unique (user_id, artwork_id) de la table votes."""
+    with current_app.app_context():
+        inspector = db.inspect(db.engine)
+        index_names = [index['name'] for index in inspector.get_indexes('votes')]
+        
+        if 'uq_votes_user_artwork' in index_names:
+            with db.engine.begin() as connection:
+                connection.execute(text('DROP INDEX uq_votes_user_artwork'))
+            print("Index 'uq_votes_user_artwork' supprimé de la table 'votes'")
+        else:
+            print("L'index 'uq_votes_user_artwork' n'existe pas")
@@ -0,0 +1,24 @@
+from flask import current_app
+from app.models.models import db, VotingRound, RoundArtworkResult, RoundJurorParticipation, RoundVote
+
+# Tables d'instantané des tours de vote, dans l'ordre de création
+ROUND_TABLES = [
+    VotingRound.__table__,
+    RoundArtworkResult.__table__,
+    RoundJurorParticipation.__table__,
+    RoundVote.__table__
+]
+
+def upgrade():
+    """Crée les tables d'instantané des tours de vote si elles n'existent pas."""
+    with current_app.app_context():
+        for table in ROUND_TABLES:
+            table.create(db.engine, checkfirst=True)
+            print(f"Table '{table.name}' disponible")
+
+def downgrade():
+    """Supprime les tables d'instantané des tours de vote."""
+    with current_app.app_context():
+        for table in reversed(ROUND_TABLES):
+            table.drop(db.engine, checkfirst=True)
+            print(f"Table '{table.name}' supprimée")
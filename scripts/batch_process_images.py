@@ -0,0 +1,373 @@
+"""
+Conversion par lots d'un dossier de photos d'œuvres en modèles 3D.
+
+Les images du dossier et de ses sous-dossiers sont validées d'après leur
+en-tête (ImageValidator), puis traitées par ImageProcessor dans un pool
+de processus, avec les mêmes règles que la route /processing/process :
+grandes images en mode streaming, budget de triangles par défaut d'un
+GLB quantifié, maillage validé avant l'écriture. Les modèles reprennent
+l'arborescence des images dans le dossier de sortie.
+
+Comme pour les travaux de l'application, le pic de mémoire de chaque
+image est prévu avant son démarrage : les traitements simultanés restent
+dans le budget (--memory-budget) et une image qui le dépasserait seule
+est écartée.
+
+Chaque résultat est ajouté au manifeste (manifest.jsonl du dossier de
+sortie, une ligne JSON par image) dès qu'il est connu. À la relance, une
+image dont le fichier et les paramètres n'ont pas changé depuis son
+dernier résultat (et dont le modèle existe toujours) est sautée : un lot
+interrompu reprend là où il s'était arrêté, seuls les échecs et les
+images écartées sont retentés. En fin de lot, le manifeste est réécrit avec le dernier
+résultat de chaque image.
+
+Usage :
+    python scripts/batch_process_images.py PHOTOS MODELES [--format ply] [--target-faces 100000]
+        [--workers 8] [--memory-budget 4096] [--depth-store DOSSIER] [--force]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import cv2
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from app.image_processing.depth_store import DepthMapStore
+from app.image_processing.memory import MemoryProbe, estimate_peak_memory
+from app.image_processing.processor import ImageProcessor
+from app.image_processing.validator import ImageValidator
+from app.image_processing.writers import MESH_FORMATS
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+MANIFEST_NAME = 'manifest.jsonl'
+
+STATUS_OK = 'ok'
+STATUS_FAILED = 'echec'
+STATUS_INVALID = 'invalide'
+STATUS_TOO_LARGE = 'trop_grande'
+# Résultats qui ne changent pas tant que l'image et les paramètres ne changent
+# pas (une image trop grande est réexaminée : le budget a pu changer)
+FINAL_STATUSES = (STATUS_OK, STATUS_INVALID)
+
+
+def find_images(input_dir):
+    """Chemins des images du dossier, relatifs à celui-ci, dans un ordre stable."""
+    images = []
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                images.append(os.path.relpath(os.path.join(root, name), input_dir))
+    return images
+
+
+def output_names(images, mesh_format):
+    """
+    Chemins relatifs des modèles : même nom que l'image, avec l'extension
+    du format ; l'extension de l'image est gardée dans le nom si deux
+    images du même dossier ne diffèrent que par elle.
+    """
+    stems = Counter(os.path.splitext(image)[0] for image in images)
+    names = {}
+    for image in images:
+        stem, extension = os.path.splitext(image)
+        if stems[stem] > 1:
+            stem = f"{stem}_{extension[1:].lower()}"
+        names[image] = f"{stem}.{mesh_format}"
+    return names
+
+
+class Manifest:
+    """Résultats du lot, une ligne JSON par image, ajoutés au fil de l'eau."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Dernière ligne tronquée par une interruption
+                        continue
+                    self.entries[entry['source']] = entry
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def is_current(self, source, fingerprint, output_path):
+        """Indique si le dernier résultat de l'image vaut encore pour ces paramètres."""
+        entry = self.entries.get(source)
+        if entry is None or entry['status'] not in FINAL_STATUSES:
+            return False
+        if {key: entry.get(key) for key in fingerprint} != fingerprint:
+            return False
+        return entry['status'] != STATUS_OK or os.path.exists(output_path)
+
+    def add(self, entry):
+        """Enregistre un résultat, aussitôt écrit sur le disque."""
+        self.entries[entry['source']] = entry
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self):
+        """Réécrit le manifeste avec le dernier résultat de chaque image."""
+        self._file.close()
+        partial_path = f"{self.path}.partiel"
+        with open(partial_path, 'w', encoding='utf-8') as f:
+            for source in sorted(self.entries):
+                f.write(json.dumps(self.entries[source], ensure_ascii=False) + '\n')
+        os.replace(partial_path, self.path)
+
+
+class Progress:
+    """Avancement et débit du lot, affichés à chaque image terminée."""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.pixels = 0
+        self.statuses = Counter()
+        self.start = time.perf_counter()
+
+    def update(self, entry):
+        self.done += 1
+        self.statuses[entry['status']] += 1
+        if entry['status'] == STATUS_OK:
+            self.pixels += entry['width'] * entry['height']
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        rate = self.done / elapsed
+        remaining = (self.total - self.done) / rate
+        detail = f"{entry['seconds']:.1f} s" if entry['status'] == STATUS_OK else entry.get('error', '')
+        print(f"[{self.done}/{self.total}] {entry['status']:>11} {entry['source']} ({detail}) - "
+              f"{rate:.2f} images/s, {self.pixels / elapsed / 1e6:.1f} Mpx/s, reste ~{remaining:.0f} s",
+              flush=True)
+
+    def summary(self, skipped):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        counts = ', '.join(f"{count} {status}" for status, count in sorted(self.statuses.items()))
+        print(f"{self.done} images traitées en {elapsed:.1f} s ({counts or 'aucune'}), {skipped} à jour, "
+              f"{self.pixels / elapsed / 1e6:.1f} Mpx/s")
+
+
+def _init_worker():
+    # Un processus par cœur : les fonctions d'OpenCV restent sur un seul thread
+    cv2.setNumThreads(1)
+
+
+def convert(source_path, output_path, options, depth_store=None):
+    """
+    Traite une image dans un processus du pool.
+
+    Le modèle est écrit dans un fichier temporaire renommé une fois
+    complet : une interruption ne laisse pas de modèle tronqué.
+
+    Args:
+        source_path (str): Image à traiter
+        output_path (str): Fichier de sortie
+        options (dict): Paramètres de ImageProcessor.process_image_to_3d
+        depth_store (DepthMapStore): Cartes de profondeur enregistrées
+
+    Returns:
+        dict: Sommets, faces (None en mode streaming), durée et pic de mémoire
+    """
+    start = time.perf_counter()
+    root, extension = os.path.splitext(output_path)
+    partial_path = f"{root}.{os.getpid()}.partiel{extension}"
+    probe = MemoryProbe()
+    try:
+        processor = ImageProcessor(source_path)
+        processor.process_image_to_3d(
+            partial_path,
+            progress=lambda stage, fraction=None: probe.stage(stage),
+            validate=True,
+            depth_store=depth_store,
+            **options
+        )
+        os.replace(partial_path, output_path)
+    finally:
+        memory = probe.close()
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    return {
+        'vertices': len(processor.vertices) if processor.vertices is not None else None,
+        'faces': len(processor.faces) if processor.faces is not None else None,
+        'seconds': round(time.perf_counter() - start, 3),
+        'memory_peak': max(memory.values(), default=0)
+    }
+
+
+def mesh_options(args):
+    """Paramètres communs à toutes les images, comme ceux de la route."""
+    target_faces = args.target_faces
+    if args.quantize and target_faces is None and args.max_error is None:
+        target_faces = Config.MESH_WEB_TARGET_FACES
+    return {
+        'scale_factor': args.scale_factor,
+        'blur_sigma': args.blur_sigma,
+        'max_error': args.max_error,
+        'target_faces': target_faces,
+        'file_format': args.format,
+        'quantize': args.quantize,
+        'solid': args.solid,
+        'base_thickness': args.base_thickness,
+        'depth_backend': args.depth_backend
+    }
+
+
+def plan(source_path, params, memory_budget):
+    """
+    Valide l'en-tête d'une image et prépare son traitement.
+
+    Returns:
+        tuple: (en-tête ou None, options du traitement, pic de mémoire
+            prévu, résultat à enregistrer sans traitement ou None)
+    """
+    in_memory = (params['target_faces'] is not None or params['max_error'] is not None
+                 or params['quantize'] or params['solid'])
+    max_size = ImageValidator.MAX_SIZE if in_memory else ImageValidator.MAX_STREAMING_SIZE
+    with open(source_path, 'rb') as f:
+        is_valid, message, header = ImageValidator.validate_stream(f, max_size=max_size)
+    if not is_valid:
+        return header, None, 0, {'status': STATUS_INVALID, 'error': message}
+
+    pixels = header['width'] * header['height']
+    options = dict(params, streaming=not in_memory and pixels >= Config.MESH_STREAMING_MIN_PIXELS,
+                   tile_rows=Config.MESH_TILE_ROWS)
+    estimate = estimate_peak_memory(header['width'], header['height'], options)
+    if memory_budget and estimate > memory_budget:
+        error = f"Mémoire prévue {estimate / 2**20:.0f} Mo, budget {memory_budget / 2**20:.0f} Mo"
+        return header, options, estimate, {'status': STATUS_TOO_LARGE, 'error': error}
+    return header, options, estimate, None
+
+
+def start_pool(workers):
+    # spawn : comme le pool de l'application, sans hériter des threads d'OpenCV
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=_init_worker)
+
+
+def run(args):
+    params = mesh_options(args)
+    memory_budget = args.memory_budget * 2**20
+    depth_store = DepthMapStore(args.depth_store) if args.depth_store else None
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest = Manifest(os.path.join(args.output_dir, MANIFEST_NAME))
+
+    images = find_images(args.input_dir)
+    outputs = output_names(images, args.format)
+    tasks = []
+    skipped = 0
+    for source in images:
+        source_path = os.path.join(args.input_dir, source)
+        output_path = os.path.join(args.output_dir, outputs[source])
+        stat = os.stat(source_path)
+        fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'params': params}
+        if not args.force and manifest.is_current(source, fingerprint, output_path):
+            skipped += 1
+        else:
+            tasks.append((source, source_path, output_path, fingerprint))
+    print(f"{len(images)} images, {skipped} à jour, {len(tasks)} à traiter avec {args.workers} processus", flush=True)
+
+    progress = Progress(len(tasks))
+
+    def record(source, fingerprint, header, result):
+        entry = {'source': source, 'output': outputs[source], **fingerprint, **result, 'finished_at': time.time()}
+        if header is not None:
+            entry.update(width=header['width'], height=header['height'])
+        manifest.add(entry)
+        progress.update(entry)
+
+    # Les en-têtes sont lus au fil de l'eau : le lot démarre sans attendre
+    # le parcours de toutes les images
+    pending = deque(tasks)
+    running = {}
+    reserved = 0
+    executor = start_pool(args.workers)
+    try:
+        while pending or running:
+            while pending and len(running) < args.workers:
+                source, source_path, output_path, fingerprint = pending[0]
+                header, options, estimate, result = plan(source_path, params, memory_budget)
+                if result is not None:
+                    pending.popleft()
+                    record(source, fingerprint, header, result)
+                    continue
+                # Sans traitement en cours, l'image démarre : elle tient seule dans le budget
+                if memory_budget and running and reserved + estimate > memory_budget:
+                    break
+                pending.popleft()
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                future = executor.submit(convert, source_path, output_path, options, depth_store)
+                running[future] = (source, fingerprint, header, estimate)
+                reserved += estimate
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                source, fingerprint, header, estimate = running.pop(future)
+                reserved -= estimate
+                try:
+                    result = {'status': STATUS_OK, **future.result()}
+                except BrokenProcessPool:
+                    # Processus tué (mémoire…) : les traitements en cours échouent avec lui
+                    broken = True
+                    result = {'status': STATUS_FAILED, 'error': "Processus de traitement interrompu"}
+                except Exception as e:
+                    result = {'status': STATUS_FAILED, 'error': str(e) or e.__class__.__name__}
+                record(source, fingerprint, header, result)
+            if broken:
+                executor.shutdown(wait=False)
+                executor = start_pool(args.workers)
+    except KeyboardInterrupt:
+        # Les processus du pool reçoivent aussi l'interruption et suppriment leurs fichiers partiels
+        executor.shutdown(wait=False, cancel_futures=True)
+        manifest.close()
+        print(f"\nInterrompu après {progress.done} images : relancez la même commande pour reprendre")
+        return 130
+    executor.shutdown()
+    manifest.close()
+    progress.summary(skipped)
+    return 1 if progress.statuses[STATUS_FAILED] else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convertit un dossier de photos d'œuvres en modèles 3D.")
+    parser.add_argument('input_dir', help="Dossier des images (sous-dossiers compris)")
+    parser.add_argument('output_dir', help="Dossier des modèles et du manifeste")
+    parser.add_argument('--format', choices=MESH_FORMATS, default='obj')
+    parser.add_argument('--scale-factor', type=float, default=1.0, help="Hauteur du relief")
+    parser.add_argument('--blur-sigma', type=float, default=2.0, help="Flou de la carte de profondeur")
+    parser.add_argument('--target-faces', type=int, help="Nombre maximal de triangles (maillage simplifié)")
+    parser.add_argument('--max-error', type=float, help="Erreur verticale tolérée (maillage simplifié)")
+    parser.add_argument('--quantize', action='store_true', help="GLB quantifié pour le visualiseur web")
+    parser.add_argument('--solid', action='store_true', help="Solide fermé pour l'impression 3D")
+    parser.add_argument('--base-thickness', type=float, help="Épaisseur du socle du solide")
+    parser.add_argument('--depth-backend', default=Config.DEPTH_BACKEND)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Processus de traitement")
+    parser.add_argument('--memory-budget', type=int, default=Config.PROCESSING_MEMORY_BUDGET // 2**20,
+                        help="Mémoire des traitements simultanés, en Mo (0 pour ne pas limiter)")
+    parser.add_argument('--depth-store', help="Dossier des cartes de profondeur réutilisées d'un lot à l'autre")
+    parser.add_argument('--force', action='store_true', help="Retraiter les images déjà à jour")
+    args = parser.parse_args()
+
+    if args.quantize and args.format != 'glb':
+        parser.error("--quantize est réservé au format glb")
+    if args.workers < 1:
+        parser.error("--workers doit être au moins 1")
+    if not os.path.isdir(args.input_dir):
+        parser.error(f"Dossier introuvable : {args.input_dir}")
+    sys.exit(run(args))
+
+
+if __name__ == '__main__':
+    main()
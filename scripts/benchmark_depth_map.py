@@ -0,0 +1,77 @@
+"""
+Compare les implémentations du calcul de la carte de profondeur (flou
+gaussien et normalisation) : scipy en float64 (méthode d'origine),
+OpenCV en float32 et pyramide réduction/flou/agrandissement.
+
+Pour chaque taille et chaque sigma, affiche la durée, le pic mémoire
+(tracemalloc) et l'écart maximal et moyen à la méthode scipy.
+
+Usage :
+    python scripts/benchmark_depth_map.py [--sizes 1024 2048 4096] [--sigmas 2 8 32]
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.image_processing.depth import compute_depth_map
+
+BACKENDS = ('scipy', 'opencv', 'pyramid')
+
+
+def photo_like(size, rng):
+    """Image de test : fond lisse, aplats à bords nets et bruit."""
+    image = cv2.resize(rng.random((32, 32), dtype=np.float32), (size, size), interpolation=cv2.INTER_CUBIC) * 150
+    for _ in range(40):
+        center = (int(rng.integers(0, size)), int(rng.integers(0, size)))
+        cv2.circle(image, center, int(rng.integers(size // 200 + 1, size // 10)), float(rng.integers(0, 255)), -1)
+    image += rng.normal(0, 10, image.shape).astype(np.float32)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def measure(image, sigma, backend):
+    """Renvoie (durée en s, pic mémoire en octets, carte de profondeur)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    depth_map = compute_depth_map(image, sigma, backend)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, depth_map
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1024, 2048, 4096])
+    parser.add_argument('--sigmas', type=float, nargs='+', default=[2, 8, 32])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'Taille':>10} {'Sigma':>6} {'Backend':>8} {'Durée':>9} {'Pic mémoire':>12} {'Écart max':>10} "
+          f"{'Écart moyen':>12}")
+    for size in args.sizes:
+        image = photo_like(size, rng)
+        for sigma in args.sigmas:
+            reference = None
+            for backend in BACKENDS:
+                elapsed, peak, depth_map = measure(image, sigma, backend)
+                if reference is None:
+                    reference, baseline = depth_map, elapsed
+                    gap = ''
+                else:
+                    error = np.abs(depth_map - reference)
+                    gap = f"{error.max():>10.2e} {error.mean():>12.2e}   (x{baseline / elapsed:.0f} plus rapide)"
+                print(f"{size:>5}x{size:<4} {sigma:>6g} {backend:>8} {elapsed:>8.3f}s "
+                      f"{peak / 2**20:>9.0f} Mo {gap}")
+                assert depth_map.min() == 0 and depth_map.max() == 1, "Carte non normalisée"
+                assert depth_map.dtype == (np.float64 if backend == 'scipy' else np.float32)
+
+
+if __name__ == '__main__':
+    main()
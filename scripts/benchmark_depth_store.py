@@ -0,0 +1,90 @@
+"""
+Mesure le gain du stockage des cartes de profondeur (DepthMapStore) pour
+un nouveau maillage de la même image avec un autre scale_factor.
+
+Pour chaque taille d'image, compare :
+  - le calcul de la carte (décodage du JPEG puis flou) et sa réouverture
+    en mémoire projetée, pages lues comprises ;
+  - le traitement complet d'un maillage simplifié sans stockage, au
+    premier passage (carte calculée et enregistrée) et au second
+    (carte rouverte).
+Le pic mémoire Python (tracemalloc) de la réouverture montre que la carte
+n'est pas copiée.
+
+Usage :
+    python scripts/benchmark_depth_store.py [--sizes 2048 4096] [--sigma 8] [--target-faces 100000]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.image_processing.depth import compute_depth_map
+from app.image_processing.depth_store import DepthMapStore
+from app.image_processing.ingest import decode_grayscale
+from app.image_processing.processor import ImageProcessor
+
+
+def photo_jpeg(size, rng):
+    """Photo de test encodée en JPEG : fond lisse, aplats et bruit."""
+    image = cv2.resize(rng.random((32, 32), dtype=np.float32), (size, size), interpolation=cv2.INTER_CUBIC) * 150
+    for _ in range(40):
+        center = (int(rng.integers(0, size)), int(rng.integers(0, size)))
+        cv2.circle(image, center, int(rng.integers(size // 200 + 1, size // 10)), float(rng.integers(0, 255)), -1)
+    image += rng.normal(0, 10, image.shape).astype(np.float32)
+    return cv2.imencode('.jpg', np.clip(image, 0, 255).astype(np.uint8))[1].tobytes()
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2048, 4096])
+    parser.add_argument('--sigma', type=float, default=8)
+    parser.add_argument('--target-faces', type=int, default=100000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = DepthMapStore(os.path.join(tmp, 'depth'))
+        output_path = os.path.join(tmp, 'mesh.ply')
+        print(f"{'Taille':>10} {'Calcul':>8} {'Réouverture':>12} {'Pic':>7} "
+              f"{'Sans stockage':>14} {'1er passage':>12} {'2e passage':>11}")
+        for size in args.sizes:
+            data = photo_jpeg(size, rng)
+
+            compute_time, depth_map = timed(lambda: compute_depth_map(decode_grayscale(data), args.sigma))
+            key = store.key('benchmark', 1, args.sigma)
+            store.save(key, depth_map)
+            tracemalloc.start()
+            load_time, stored = timed(lambda: float(store.load(key).sum(dtype=np.float64)))
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            assert np.isclose(stored, depth_map.sum(dtype=np.float64))
+
+            options = {'blur_sigma': args.sigma, 'target_faces': args.target_faces}
+            plain_time, _ = timed(lambda: ImageProcessor(data).process_image_to_3d(output_path, **options))
+            first_time, _ = timed(lambda: ImageProcessor(data).process_image_to_3d(
+                output_path, depth_store=store, **options))
+            second = ImageProcessor(data)
+            second_time, _ = timed(lambda: second.process_image_to_3d(
+                output_path, depth_store=store, scale_factor=2.0, **options))
+            assert second.image is None, "L'image a été décodée malgré la carte enregistrée"
+
+            print(f"{size:>5}x{size:<4} {compute_time:>7.3f}s {load_time:>11.3f}s {peak / 2**20:>4.1f} Mo "
+                  f"{plain_time:>13.3f}s {first_time:>11.3f}s {second_time:>10.3f}s")
+
+
+if __name__ == '__main__':
+    main()
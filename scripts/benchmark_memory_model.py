@@ -0,0 +1,100 @@
+"""
+Mesure le pic de mémoire de chaque étape du traitement et le compare au
+modèle d'estimation (app/image_processing/memory.py).
+
+Chaque traitement s'exécute dans un processus neuf ; un processus tué
+(mémoire épuisée) est signalé. Pour chaque cas, le script affiche le pic
+mesuré par étape, l'estimation du modèle et le rapport mesure/estimation,
+puis le rapport le plus faible et le plus élevé par mode (comme la route
+/processing/memory pour les travaux réels) : un rapport supérieur à 1
+(pic sous-estimé) ou très inférieur indique les coefficients de
+MEMORY_MODEL à réajuster quand le pipeline change.
+
+Usage :
+    python scripts/benchmark_memory_model.py [--sizes 1024 2048]
+"""
+import os
+import sys
+import argparse
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.image_processing.memory import MemoryProbe, estimate_peak_memory, memory_mode
+from app.image_processing.processor import ImageProcessor
+
+CASES = {
+    'grid-ply': {'file_format': 'ply', 'validate': True},
+    'grid-obj': {'file_format': 'obj', 'validate': True},
+    'grid-stl': {'file_format': 'stl', 'validate': True},
+    'simplified': {'file_format': 'ply', 'target_faces': 100000, 'validate': True},
+    'simplified-1M': {'file_format': 'ply', 'target_faces': 1000000, 'validate': True},
+    'quantized': {'file_format': 'glb', 'target_faces': 100000, 'quantize': True, 'validate': True},
+    'solid': {'file_format': 'stl', 'solid': True, 'validate': True},
+    'solid-simpl': {'file_format': 'stl', 'solid': True, 'target_faces': 100000, 'validate': True},
+    'streaming': {'file_format': 'ply', 'streaming': True}
+}
+
+
+def photo_jpeg(size, rng):
+    """Photo de test encodée en JPEG (format 4:3)."""
+    image = cv2.resize(rng.random((24, 32), dtype=np.float32), (size * 4 // 3, size),
+                       interpolation=cv2.INTER_CUBIC) * 200
+    image += rng.normal(0, 10, image.shape).astype(np.float32)
+    return cv2.imencode('.jpg', np.clip(image, 0, 255).astype(np.uint8))[1].tobytes()
+
+
+def _run(data, output_path, options):
+    probe = MemoryProbe()
+    ImageProcessor(data).process_image_to_3d(output_path, progress=lambda stage, fraction=None: probe.stage(stage),
+                                             **options)
+    return probe.close()
+
+
+def measure(data, output_path, options):
+    """Pics par étape, mesurés dans un processus neuf (None s'il a été tué)."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        try:
+            return executor.submit(_run, data, output_path, options).result()
+        except BrokenProcessPool:
+            return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1024, 2048])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    ratios = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'Cas':>13} {'Taille':>10} {'Pic mesuré':>11} {'Estimé':>9} {'Rapport':>8}  Étapes (Mo)")
+        for size in args.sizes:
+            data = photo_jpeg(size, rng)
+            width, height = size * 4 // 3, size
+            for case, options in CASES.items():
+                output_path = os.path.join(tmp, 'mesh.' + options['file_format'])
+                estimate = estimate_peak_memory(width, height, options, validate=options.get('validate', False))
+                stages = measure(data, output_path, options)
+                if stages is None:
+                    print(f"{case:>13} {width:>5}x{height:<4} {'tué':>11} {estimate / 2**20:>6.0f} Mo")
+                    continue
+                peak = max(stages.values())
+                ratios.setdefault(memory_mode(options), []).append(peak / estimate)
+                detail = ' '.join(f"{stage}={value / 2**20:.0f}" for stage, value in stages.items())
+                print(f"{case:>13} {width:>5}x{height:<4} {peak / 2**20:>8.0f} Mo {estimate / 2**20:>6.0f} Mo "
+                      f"{peak / estimate:>8.2f}  {detail}")
+
+    print("\nRapport mesure/estimation par mode :")
+    for mode, values in ratios.items():
+        print(f"{mode:>17} : {min(values):.2f} à {max(values):.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Compare la construction du maillage d'un champ de hauteur par
+ImageProcessor.generate_mesh : ancienne double boucle Python suivie d'un
+trimesh.Trimesh, contre arithmétique d'indices NumPy sur des tableaux
+float32/int32.
+
+Mesure le temps et le pic mémoire (tracemalloc) de generate_mesh pour
+chaque taille, à partir d'une carte de profondeur déjà calculée. La
+double boucle n'est exécutée que jusqu'à --legacy-max pixels de côté :
+au-delà elle prend plusieurs minutes et des dizaines de Go.
+
+Usage :
+    python scripts/benchmark_mesh_builder.py [--sizes 512 2048 4096] [--legacy-max 512]
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+import trimesh
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.image_processing.processor import ImageProcessor
+
+
+def legacy_mesh(depth_map, scale_factor=1.0):
+    """Construction d'origine de ImageProcessor.generate_mesh (trimesh compris)."""
+    height, width = depth_map.shape
+    x, y = np.meshgrid(np.arange(width), np.arange(height))
+    vertices = np.stack([x.flatten(), y.flatten(), depth_map.flatten() * scale_factor], axis=1)
+    faces = []
+    for i in range(height - 1):
+        for j in range(width - 1):
+            v0 = i * width + j
+            v1 = v0 + 1
+            v2 = (i + 1) * width + j
+            v3 = v2 + 1
+            faces.extend([[v0, v1, v2], [v1, v3, v2]])
+    mesh = trimesh.Trimesh(vertices=vertices, faces=np.array(faces))
+    return mesh.vertices, mesh.faces
+
+
+def generate_mesh(depth_map):
+    """Maillage construit par ImageProcessor.generate_mesh."""
+    height, width = depth_map.shape
+    processor = ImageProcessor(depth_map)
+    processor.depth_map = depth_map
+    processor.source_size = (width, height)
+    return processor.generate_mesh()
+
+
+def measure(builder, depth_map):
+    """Renvoie (durée en s, pic mémoire en octets, résultat)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = builder(depth_map)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[512, 2048, 4096])
+    parser.add_argument('--legacy-max', type=int, default=512,
+                        help="Taille maximale pour laquelle la double boucle est exécutée")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'Taille':>10} {'Méthode':>10} {'Durée':>10} {'Pic mémoire':>13} {'Faces':>12}")
+    for size in args.sizes:
+        depth_map = rng.random((size, size), dtype=np.float32)
+
+        elapsed, peak, (vertices, faces) = measure(generate_mesh, depth_map)
+        print(f"{size:>5}x{size:<4} {'numpy':>10} {elapsed:>9.3f}s {peak / 2**20:>10.0f} Mo {len(faces):>12}")
+        assert vertices.dtype == np.float32 and faces.dtype == np.int32
+        assert len(faces) == 2 * (size - 1) ** 2
+
+        if size <= args.legacy_max:
+            legacy_elapsed, legacy_peak, (_, legacy_faces) = measure(legacy_mesh, depth_map)
+            print(f"{size:>5}x{size:<4} {'boucle':>10} {legacy_elapsed:>9.3f}s {legacy_peak / 2**20:>10.0f} Mo "
+                  f"{len(legacy_faces):>12}   (x{legacy_elapsed / elapsed:.0f} plus lent)")
+            assert np.array_equal(legacy_faces, faces), "Faces différentes"
+        del vertices, faces
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Compare l'écriture d'un maillage de champ de hauteur selon le format :
+export OBJ de trimesh (ancienne méthode de save_mesh) contre les
+écrivains directs OBJ, PLY, STL et GLB.
+
+Pour chaque taille, affiche la durée d'écriture, le débit et la taille
+du fichier, puis vérifie que trimesh relit le même maillage.
+
+Usage :
+    python scripts/benchmark_mesh_formats.py [--sizes 1024 2048]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+import trimesh
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.image_processing.mesh import heightfield_mesh
+from app.image_processing.writers import MESH_FORMATS, write_mesh
+
+
+def check_roundtrip(path, file_format, vertices, faces):
+    """Vérifie que le fichier décrit le maillage écrit."""
+    loaded = trimesh.load(path, force='mesh', process=False)
+    if file_format == 'stl':
+        # Le STL ne partage pas les sommets : on compare les triangles
+        assert np.allclose(loaded.triangles, vertices[faces], atol=1e-5), "Triangles STL différents"
+    else:
+        assert np.allclose(loaded.vertices, vertices, atol=1e-5), f"Sommets {file_format} différents"
+        assert np.array_equal(loaded.faces, faces), f"Faces {file_format} différentes"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1024, 2048])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'Taille':>10} {'Méthode':>12} {'Durée':>9} {'Débit':>11} {'Fichier':>10}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            vertices, faces = heightfield_mesh(rng.random((size, size)))
+
+            path = os.path.join(workdir, 'trimesh.obj')
+            start = time.perf_counter()
+            trimesh.Trimesh(vertices=vertices, faces=faces, process=False).export(path)
+            baseline = time.perf_counter() - start
+            file_size = os.path.getsize(path)
+            print(f"{size:>5}x{size:<4} {'trimesh obj':>12} {baseline:>8.2f}s "
+                  f"{file_size / 2**20 / baseline:>7.0f} Mo/s {file_size / 2**20:>7.0f} Mo")
+            os.remove(path)
+
+            for file_format in MESH_FORMATS:
+                path = os.path.join(workdir, f'mesh.{file_format}')
+                start = time.perf_counter()
+                write_mesh(path, vertices, faces)
+                elapsed = time.perf_counter() - start
+                file_size = os.path.getsize(path)
+                print(f"{size:>5}x{size:<4} {file_format:>12} {elapsed:>8.2f}s "
+                      f"{file_size / 2**20 / elapsed:>7.0f} Mo/s {file_size / 2**20:>7.0f} Mo"
+                      f"   (x{baseline / elapsed:.0f} plus rapide)")
+                check_roundtrip(path, file_format, vertices, faces)
+                os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
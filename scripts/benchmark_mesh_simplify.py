@@ -0,0 +1,55 @@
+"""
+Mesure la simplification adaptative (RTIN) des maillages de champs de hauteur.
+
+La carte de profondeur est un bruit lissé (relief de type toile peinte).
+Pour chaque taille, affiche le temps de calcul des erreurs, le temps pour
+atteindre un budget de faces et le nombre de faces du maillage complet.
+
+Usage :
+    python scripts/benchmark_mesh_simplify.py [--sizes 1024 4096] [--target-faces 200000]
+"""
+import os
+import sys
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.image_processing.simplify import resample_terrain, rtin_errors, simplified_heightfield_mesh
+
+
+def synthetic_depth_map(size, rng):
+    depth = cv2.GaussianBlur(rng.random((size, size), dtype=np.float32), (0, 0), 8)
+    return (depth - depth.min()) / (depth.max() - depth.min())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1024, 2048, 4096])
+    parser.add_argument('--target-faces', type=int, default=200000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for size in args.sizes:
+        depth_map = synthetic_depth_map(size, rng)
+
+        start = time.perf_counter()
+        rtin_errors(resample_terrain(depth_map))
+        errors_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vertices, faces = simplified_heightfield_mesh(depth_map, target_faces=args.target_faces)
+        budget_time = time.perf_counter() - start
+
+        full_faces = 2 * (size - 1) ** 2
+        print(f"{size:>5}x{size:<5} erreurs {errors_time:6.2f}s   budget {budget_time:6.2f}s   "
+              f"{len(faces):>8} faces / {full_faces} ({len(faces) / full_faces:.1%})")
+        assert len(faces) <= args.target_faces
+        assert vertices[:, 0].max() == size - 1 and vertices[:, 1].max() == size - 1
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Compare l'export OBJ d'un maillage complet : construction en mémoire
+(carte de profondeur, maillage trimesh, export) contre écriture en flux
+par bandes de lignes.
+
+Chaque export s'exécute dans un processus neuf dont on relève la durée et
+le pic de mémoire résidente (tracemalloc, qui trace chaque flottant
+Python de la mise en forme du texte, fausserait les durées). Le script
+vérifie que les deux fichiers décrivent le même nombre de sommets et de
+faces. La construction en mémoire n'est exécutée que jusqu'à
+--in-memory-max pixels de côté.
+
+Usage :
+    python scripts/benchmark_mesh_streaming.py [--sizes 1024 2048 4096] [--tile-rows 256]
+"""
+import os
+import sys
+import time
+import argparse
+import resource
+import tempfile
+import multiprocessing
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.image_processing.processor import ImageProcessor
+
+
+def _export(image_path, output_path, streaming, tile_rows, results):
+    """Exporte le maillage et renvoie (durée en s, pic de mémoire résidente en octets)."""
+    start = time.perf_counter()
+    ImageProcessor(image_path).process_image_to_3d(output_path, streaming=streaming, tile_rows=tile_rows)
+    elapsed = time.perf_counter() - start
+    results.put((elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024))
+
+
+def measure(image_path, output_path, streaming, tile_rows):
+    """Exécute un export dans un processus neuf."""
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=_export, args=(image_path, output_path, streaming, tile_rows, results))
+    process.start()
+    elapsed, peak = results.get()
+    process.join()
+    return elapsed, peak
+
+
+def count_elements(obj_path):
+    """Nombre de sommets et de faces d'un fichier OBJ."""
+    nb_vertices = nb_faces = 0
+    with open(obj_path) as f:
+        for line in f:
+            if line.startswith('v '):
+                nb_vertices += 1
+            elif line.startswith('f '):
+                nb_faces += 1
+    return nb_vertices, nb_faces
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1024, 2048, 4096])
+    parser.add_argument('--tile-rows', type=int, default=256)
+    parser.add_argument('--in-memory-max', type=int, default=4096,
+                        help="Taille maximale pour laquelle le maillage est construit en mémoire")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'Taille':>10} {'Méthode':>10} {'Durée':>10} {'Pic RSS':>13} {'Fichier':>10}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            image_path = os.path.join(workdir, f'{size}.png')
+            cv2.imwrite(image_path, rng.integers(0, 256, (size, size), dtype=np.uint8))
+
+            streamed_path = os.path.join(workdir, f'{size}_flux.obj')
+            elapsed, peak = measure(image_path, streamed_path, True, args.tile_rows)
+            print(f"{size:>5}x{size:<4} {'flux':>10} {elapsed:>9.2f}s {peak / 2**20:>10.0f} Mo "
+                  f"{os.path.getsize(streamed_path) / 2**20:>7.0f} Mo")
+            streamed_counts = count_elements(streamed_path)
+            assert streamed_counts == (size * size, 2 * (size - 1) ** 2)
+            os.remove(streamed_path)
+
+            if size <= args.in_memory_max:
+                memory_path = os.path.join(workdir, f'{size}.obj')
+                elapsed, peak = measure(image_path, memory_path, False, args.tile_rows)
+                print(f"{size:>5}x{size:<4} {'mémoire':>10} {elapsed:>9.2f}s {peak / 2**20:>10.0f} Mo "
+                      f"{os.path.getsize(memory_path) / 2**20:>7.0f} Mo")
+                assert count_elements(memory_path) == streamed_counts, "Maillages différents"
+                os.remove(memory_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Mesure la charge utile du maillage téléchargé par le visualiseur 3D web.
+
+Pour une carte de profondeur de la taille donnée, compare :
+  - l'OBJ complet (sortie par défaut de /processing/process) ;
+  - le GLB float32 du maillage simplifié à --target-faces triangles ;
+  - le GLB quantifié (KHR_mesh_quantization) du même maillage, avec
+    coordonnées de texture et triangles réordonnés.
+La taille compressée (gzip, comme la servirait un serveur web) et le
+taux de défauts d'un cache de sommets FIFO de 32 entrées (ACMR, triangles
+non réordonnés contre réordonnés) sont affichés pour chacun.
+
+Usage :
+    python scripts/benchmark_mesh_web.py [--size 2048] [--target-faces 100000]
+"""
+import os
+import sys
+import gzip
+import time
+import argparse
+import tempfile
+from collections import deque
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.image_processing.mesh import heightfield_mesh
+from app.image_processing.simplify import simplified_heightfield_mesh
+from app.image_processing.quantized_glb import reorder_for_locality, write_quantized_glb
+from app.image_processing.writers import write_mesh
+
+VERTEX_CACHE_SIZE = 32
+
+
+def cache_miss_ratio(faces, cache_size=VERTEX_CACHE_SIZE):
+    """Sommets transformés par triangle avec un cache FIFO (ACMR)."""
+    cache = deque()
+    cached = set()
+    misses = 0
+    for vertex in faces.ravel().tolist():
+        if vertex not in cached:
+            misses += 1
+            if len(cache) == cache_size:
+                cached.discard(cache.popleft())
+            cache.append(vertex)
+            cached.add(vertex)
+    return misses / len(faces)
+
+
+def payload(path):
+    """(taille brute, taille gzip) d'un fichier."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return len(data), len(gzip.compress(data, compresslevel=6))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=2048)
+    parser.add_argument('--target-faces', type=int, default=100000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    depth_map = cv2.GaussianBlur(rng.random((args.size, args.size), dtype=np.float32), (0, 0), 6)
+    depth_map = (depth_map - depth_map.min()) / (depth_map.max() - depth_map.min())
+
+    vertices, faces = simplified_heightfield_mesh(depth_map, target_faces=args.target_faces)
+    uvs = vertices[:, :2] / (args.size - 1)
+    print(f"Maillage simplifié : {len(vertices)} sommets, {len(faces)} triangles")
+    print(f"ACMR (cache FIFO {VERTEX_CACHE_SIZE}) : {cache_miss_ratio(faces):.2f} avant réordonnancement, "
+          f"{cache_miss_ratio(reorder_for_locality(vertices, faces)[1]):.2f} après")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = []
+
+        path = os.path.join(workdir, 'full.obj')
+        write_mesh(path, *heightfield_mesh(depth_map))
+        results.append(('OBJ complet', payload(path), None))
+
+        path = os.path.join(workdir, 'float.glb')
+        write_mesh(path, vertices, faces)
+        results.append(('GLB float32', payload(path), None))
+
+        path = os.path.join(workdir, 'quantized.glb')
+        start = time.perf_counter()
+        write_quantized_glb(path, vertices, faces, uvs=uvs)
+        results.append(('GLB quantifié', payload(path), time.perf_counter() - start))
+
+        reference = results[0][1][1]
+        print(f"{'Fichier':>15} {'Brut':>10} {'gzip':>10} {'Gain':>7} {'Écriture':>9}")
+        for name, (raw, compressed), elapsed in results:
+            timing = f"{elapsed:>8.2f}s" if elapsed is not None else f"{'':>9}"
+            print(f"{name:>15} {raw / 2**10:>7.0f} Ko {compressed / 2**10:>7.0f} Ko "
+                  f"{reference / compressed:>6.1f}x {timing}")
+
+        float_raw = results[1][1][0]
+        quantized_raw = results[2][1][0]
+        assert quantized_raw < float_raw, "Le GLB quantifié devrait être plus petit que le GLB float32"
+
+
+if __name__ == '__main__':
+    main()
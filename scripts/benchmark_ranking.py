@@ -0,0 +1,97 @@
+"""
+Mesure le temps de calcul du classement par consensus du jury.
+
+Le classement est calculé sur une matrice de votes aléatoire (par défaut
+10 000 œuvres × 100 jurés), puis chargé depuis une base SQLite en mémoire
+contenant les mêmes votes.
+
+Usage :
+    python scripts/benchmark_ranking.py [--artworks 10000] [--jurors 100] [--density 0.8]
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from app.models.models import db, Artist, Artwork, User, Vote
+from app.services.ranking import compute_ranking, propose_selection, rank_votes
+
+CATEGORIES = ('peinture', 'sculpture', 'photographie', 'gravure', '')
+
+
+def random_votes(nb_jurors, nb_artworks, density, rng):
+    """Matrice de votes où chaque œuvre a une qualité propre."""
+    quality = rng.random(nb_artworks)
+    matrix = np.where(rng.random((nb_jurors, nb_artworks)) < quality, 1, -1).astype(np.int8)
+    matrix[rng.random((nb_jurors, nb_artworks)) >= density] = 0
+    return matrix
+
+
+def populate(matrix, categories):
+    nb_jurors, nb_artworks = matrix.shape
+    db.create_all()
+    db.session.execute(Artist.__table__.insert(), [
+        {'id': i + 1, 'nom': f'Nom {i}', 'prenom': 'Prenom', 'email': f'a{i}@example.com', 'categorie': categorie}
+        for i, categorie in enumerate(CATEGORIES)
+    ])
+    db.session.execute(Artwork.__table__.insert(), [
+        {'id': i + 1, 'artist_id': CATEGORIES.index(categories[i]) + 1, 'titre': f'Oeuvre {i}', 'statut': 'en_attente'}
+        for i in range(nb_artworks)
+    ])
+    db.session.execute(User.__table__.insert(), [
+        {'id': i + 1, 'username': f'membre{i}', 'email': f'membre{i}@example.com',
+         'password_hash': '-', 'is_membre': True}
+        for i in range(nb_jurors)
+    ])
+    jurors, artworks = np.nonzero(matrix)
+    db.session.execute(Vote.__table__.insert(), [
+        {'user_id': int(juror) + 1, 'artwork_id': int(artwork) + 1,
+         'vote_type': 'pour' if matrix[juror, artwork] == 1 else 'contre'}
+        for juror, artwork in zip(jurors, artworks)
+    ])
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--artworks', type=int, default=10000)
+    parser.add_argument('--jurors', type=int, default=100)
+    parser.add_argument('--density', type=float, default=0.8, help='Proportion des œuvres notées par chaque juré')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    matrix = random_votes(args.jurors, args.artworks, args.density, rng)
+    artwork_ids = np.arange(1, args.artworks + 1)
+    categories = np.array(rng.choice(CATEGORIES, size=args.artworks), dtype=object)
+
+    print(f"{args.artworks} œuvres x {args.jurors} jurés, {np.count_nonzero(matrix)} votes")
+
+    start = time.perf_counter()
+    ranking = rank_votes(matrix, artwork_ids, categories)
+    selection = propose_selection(ranking, per_category=100)
+    elapsed = time.perf_counter() - start
+    print(f"  Classement (matrice en mémoire) : {elapsed * 1000:8.1f} ms")
+    assert elapsed < 1.0, "Classement trop lent"
+    assert sorted(ranking['rank'].tolist()) == list(range(1, args.artworks + 1))
+    assert sum(1 for value in selection.values() if value == 'selectionner') <= 100 * len(CATEGORIES)
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        populate(matrix, categories)
+        start = time.perf_counter()
+        loaded = compute_ranking()
+        elapsed = time.perf_counter() - start
+        print(f"  Chargement depuis SQLite + classement : {elapsed * 1000:8.1f} ms")
+        assert np.array_equal(loaded['rank'], ranking['rank']), "Classements différents"
+
+
+if __name__ == '__main__':
+    main()
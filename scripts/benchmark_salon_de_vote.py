@@ -0,0 +1,93 @@
+"""
+Mesure le nombre de requêtes SQL et la latence du décompte du salon de vote
+sur une base SQLite en mémoire peuplée à une échelle réaliste.
+
+Usage :
+    python scripts/benchmark_salon_de_vote.py [--artworks 2000] [--jurors 40]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from sqlalchemy import event
+from app.models.models import db, Artist, Artwork, User, Vote
+from app.services.vote_tally import get_salon_tally
+
+# Seuils attendus
+MAX_QUERIES = 2
+MAX_SECONDS = 2.0
+
+
+def create_benchmark_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def populate(nb_artworks, nb_jurors, artworks_per_artist=5):
+    """Peuple la base avec des artistes, des œuvres et des votes."""
+    nb_artists = max(1, nb_artworks // artworks_per_artist)
+    db.session.execute(Artist.__table__.insert(), [
+        {'id': i + 1, 'nom': f'Nom{i}', 'prenom': f'Prenom{i}', 'email': f'artiste{i}@example.com'}
+        for i in range(nb_artists)
+    ])
+    db.session.execute(Artwork.__table__.insert(), [
+        {'id': i + 1, 'artist_id': i % nb_artists + 1, 'titre': f'Oeuvre {i}', 'statut': 'en_attente'}
+        for i in range(nb_artworks)
+    ])
+    db.session.execute(User.__table__.insert(), [
+        {'id': i + 1, 'username': f'membre{i}', 'email': f'membre{i}@example.com',
+         'password_hash': '-', 'is_membre': True}
+        for i in range(nb_jurors)
+    ])
+    db.session.execute(Vote.__table__.insert(), [
+        {'artwork_id': artwork_id, 'user_id': user_id, 'vote_type': random.choice(('pour', 'contre'))}
+        for user_id in range(1, nb_jurors + 1)
+        for artwork_id in range(1, nb_artworks + 1)
+    ])
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--artworks', type=int, default=2000)
+    parser.add_argument('--jurors', type=int, default=40)
+    args = parser.parse_args()
+
+    app = create_benchmark_app()
+    with app.app_context():
+        db.create_all()
+        populate(args.artworks, args.jurors)
+        db.session.expunge_all()
+
+        statements = []
+
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', count_statement)
+        start = time.perf_counter()
+        tally = get_salon_tally(user_id=1)
+        elapsed = time.perf_counter() - start
+        event.remove(db.engine, 'before_cursor_execute', count_statement)
+
+        nb_artworks = sum(len(groupe['artworks']) for groupe in tally['artistes_data'])
+        print(f"Œuvres : {nb_artworks} - votes : {args.artworks * args.jurors}")
+        print(f"Requêtes SQL : {len(statements)}")
+        print(f"Durée : {elapsed * 1000:.1f} ms")
+
+        assert nb_artworks == args.artworks, "Toutes les œuvres doivent être présentes"
+        assert len(tally['user_votes']) == args.artworks, "Le bulletin de l'utilisateur est incomplet"
+        assert len(statements) <= MAX_QUERIES, f"Trop de requêtes : {len(statements)}"
+        assert elapsed <= MAX_SECONDS, f"Décompte trop lent : {elapsed:.2f} s"
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Compare la latence de soumission des bulletins avec et sans le journal
+d'écriture différée, lors d'une validation simultanée de tout le jury.
+
+Chaque tour lance autant de threads que de jurés, qui soumettent en même
+temps un bulletin complet ; la base SQLite est un fichier temporaire.
+
+Usage :
+    python scripts/benchmark_vote_journal.py [--jurors 40] [--artworks 200] [--rounds 5]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from app.models.models import db, Artist, Artwork, User, Vote
+from app.services.vote_journal import vote_journal
+from app.services.vote_writer import record_ballot
+
+
+def create_benchmark_app(workdir, journal_enabled):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(workdir, 'benchmark.db')
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 60}}
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['VOTE_JOURNAL_ENABLED'] = journal_enabled
+    app.config['VOTE_JOURNAL_PATH'] = os.path.join(workdir, 'vote_journal.log')
+    db.init_app(app)
+    return app
+
+
+def populate(nb_artworks, nb_jurors):
+    db.create_all()
+    db.session.execute(Artist.__table__.insert(), [{'id': 1, 'nom': 'Nom', 'prenom': 'Prenom', 'email': 'a@example.com'}])
+    db.session.execute(Artwork.__table__.insert(), [
+        {'id': i + 1, 'artist_id': 1, 'titre': f'Oeuvre {i}', 'statut': 'en_attente'}
+        for i in range(nb_artworks)
+    ])
+    db.session.execute(User.__table__.insert(), [
+        {'id': i + 1, 'username': f'membre{i}', 'email': f'membre{i}@example.com',
+         'password_hash': '-', 'is_membre': True}
+        for i in range(nb_jurors)
+    ])
+    db.session.commit()
+
+
+def run_rounds(app, nb_artworks, nb_jurors, rounds):
+    """Lance les soumissions simultanées et renvoie les latences (s)."""
+    latencies = []
+    latencies_lock = threading.Lock()
+
+    def submit(user_id, barrier):
+        ballot = {artwork_id: random.choice(('pour', 'contre')) for artwork_id in range(1, nb_artworks + 1)}
+        with app.app_context():
+            barrier.wait()
+            start = time.perf_counter()
+            record_ballot(user_id, ballot)
+            elapsed = time.perf_counter() - start
+        with latencies_lock:
+            latencies.append(elapsed)
+
+    for _ in range(rounds):
+        barrier = threading.Barrier(nb_jurors)
+        threads = [threading.Thread(target=submit, args=(user_id, barrier)) for user_id in range(1, nb_jurors + 1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return latencies
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def benchmark(journal_enabled, args):
+    with tempfile.TemporaryDirectory() as workdir:
+        app = create_benchmark_app(workdir, journal_enabled)
+        with app.app_context():
+            populate(args.artworks, args.jurors)
+        vote_journal.init_app(app)
+
+        latencies = run_rounds(app, args.artworks, args.jurors, args.rounds)
+
+        if journal_enabled:
+            start = time.perf_counter()
+            vote_journal.flush()
+            print(f"  Vidage final du journal : {(time.perf_counter() - start) * 1000:.1f} ms")
+        with app.app_context():
+            nb_votes = Vote.query.count()
+            db.engine.dispose()
+        vote_journal.enabled = False
+
+    label = 'avec journal' if journal_enabled else 'sans journal'
+    print(f"  {label:13} p50 = {percentile(latencies, 50) * 1000:8.1f} ms   "
+          f"p99 = {percentile(latencies, 99) * 1000:8.1f} ms   votes = {nb_votes}")
+    assert nb_votes == args.jurors * args.artworks, "Des votes ont été perdus"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jurors', type=int, default=40)
+    parser.add_argument('--artworks', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.jurors} jurés x {args.artworks} œuvres, {args.rounds} tours")
+    benchmark(False, args)
+    benchmark(True, args)
+
+
+if __name__ == '__main__':
+    main()